@@ -1,3 +1,5 @@
+import logging
+
 from blueshift.library.technicals.indicators import bollinger_band, doji, macd, atr, adx
 from blueshift.finance import commission, slippage
 from blueshift.api import (
@@ -10,6 +12,8 @@ from blueshift.api import (
     time_rules,
 )
 
+log = logging.getLogger(__name__)
+
 def initialize(context):
     context.securities = [symbol('MSFT'), symbol('GOOG'), symbol('AAPL'), symbol('AMZN'), symbol('TSLA')]
 
@@ -42,6 +46,7 @@ def initialize(context):
 
 def before_trading_start(context, data):
     context.trade = True
+    update_atr_values(context, data)  # Daily ATR, once per session
 
 def stop_trading(context, data):
     context.trade = False
@@ -51,18 +56,23 @@ def run_strategy(context, data):
         return
 
     generate_signals(context, data)
-    update_atr_values(context, data)  # Update ATR values
     # generate_target_position(context, data)
     generate_target_position_static(context, data)
     rebalance(context, data)
 
 def update_atr_values(context, data):
+    """Daily ATR for the whole universe, computed once before the session opens."""
+    try:
+        price_data = data.history(context.securities, ['high', 'low', 'close'], 20, '1d')
+    except Exception as e:
+        log.warning("ATR calculation error: %s", e)
+        return
+
     for security in context.securities:
         try:
-            price_data = data.history(security, ['high', 'low', 'close'], 20, '1d')
-            context.atr_values[security] = atr(price_data, 14)
+            context.atr_values[security] = atr(price_data.xs(security), 14)
         except Exception as e:
-            print(f"ATR calculation error for {security}: {e}")
+            log.warning("ATR calculation error for %s: %s", security, e, extra={'security': security})
 
 def rebalance(context, data):
     for security in context.securities:
@@ -122,7 +132,7 @@ def generate_signals(context, data):
         price_data = data.history(context.securities, ['open', 'high', 'low', 'close', 'volume'], 
                                   context.params['indicator_lookback'], context.params['indicator_freq'])
     except Exception as e:
-        print(f"Data history error: {e}")
+        log.warning("Data history error: %s", e)
         return
 
     for security in context.securities:
@@ -149,28 +159,31 @@ def identify_patterns(px):
 
 def signal_function(px, params):
     """Generate trading signals based on patterns, volume, and indicators."""
+    # Cheapest rejections first, so most bars never reach the indicators
     pattern = identify_patterns(px)
-    upper, mid, lower = bollinger_band(px.close.values, params['BBands_period'])
-    macd_line, signal_line, _ = macd(px.close.values, params['MACD_fast'], params['MACD_slow'], params['MACD_signal'])
-    adx_value = adx(px.high.values, px.low.values, px.close.values, 14)
-    avg_volume = px.volume.values[-params['indicator_lookback']:].mean()
-    last_volume = px.volume.values[-1]
-
-    if upper - lower == 0:
+    if pattern is None:
         return 0
 
     # Check for high volume confirmation
+    avg_volume = px.volume.values[-params['indicator_lookback']:].mean()
+    last_volume = px.volume.values[-1]
     if last_volume < params['volume_threshold'] * avg_volume:
         return 0
 
+    upper, mid, lower = bollinger_band(px.close.values, params['BBands_period'])
+    if upper - lower == 0:
+        return 0
+
     # Use ADX for trend strength filtering
+    adx_value = adx(px.high.values, px.low.values, px.close.values, 14)
     if adx_value < 15:
         return 0
 
-    # Candlestick Patterns with volume confirmation
+    macd_line, signal_line, _ = macd(px.close.values, params['MACD_fast'], params['MACD_slow'], params['MACD_signal'])
     last_px = px.close.values[-1]
     dist_to_upper = 100 * (upper - last_px) / (upper - lower)
 
+    # Candlestick Patterns with volume confirmation
     if pattern == "Dragonfly Doji" and dist_to_upper < 30 and macd_line > signal_line:
         return 1  # Buy Signal
     elif pattern == "Gravestone Doji" and dist_to_upper > 70 and macd_line < signal_line:
@@ -0,0 +1,200 @@
+"""
+    Title: Intraday Technical Strategies
+    Description: Source_Code_17 with incremental indicator state and
+        cross-sectional signals. The whole universe is scored at once from
+        a (securities x bars x fields) window, and only the bars added
+        since the previous call are fed to the indicators, instead of
+        recomputing over the whole lookback window for each security.
+    Style tags: momentum and mean reversion
+    Asset class: Equities, Futures, ETFs and Currencies
+    Broker: NSE
+    Requires: the local `backtester` package (python -m backtester)
+"""
+import logging
+
+import numpy as np
+
+from blueshift.finance import commission, slippage
+from blueshift.api import (
+    symbol,
+    order_target_percent,
+    set_commission,
+    set_slippage,
+    schedule_function,
+    date_rules,
+    time_rules,
+)
+from backtester.factors import DailyFactors
+from backtester.orders import OrderManager
+from backtester.risk import RiskMonitor
+from backtester.shard import ShardedSignals, can_shard
+from backtester.signals import CrossSectionalSignals, stack_history
+
+log = logging.getLogger(__name__)
+
+def initialize(context):
+    context.securities = [symbol('MSFT'), symbol('GOOG'), symbol('AAPL'), symbol('AMZN'), symbol('TSLA')]
+
+    context.params = {
+        'indicator_lookback': 300,
+        'indicator_freq': '1m',
+        'BBands_period': 20,
+        'MACD_fast': 5,
+        'MACD_slow': 35,
+        'MACD_signal': 5,
+        'trade_freq': 2,  # Execute every 2 minutes
+        'stop_loss_multiplier': 1.5,  # ATR multiplier for stop loss
+        'take_profit_multiplier': 2.5,  # ATR multiplier for take profit
+        'leverage': 2,
+        'volume_threshold': 1.5,  # Multiplier for average volume
+        'intraday_atr': False,  # Advance the daily ATR with today's range so far
+        'order_tolerance': 0.01,  # Weight change below which a target is not resent
+        'stop_band': 0.005,  # Positions this close to a stop or target are checked every minute
+        'stop_refresh': 10,  # Minutes between full stop checks outside run_strategy
+        'signal_shards': 0,  # Worker processes for the signal pass (0: in process)
+    }
+
+    context.signals = dict((security, 0) for security in context.securities)
+    context.target_position = dict((security, 0) for security in context.securities)
+    context.atr_values = dict((security, None) for security in context.securities)
+    context.daily_factors = DailyFactors(lookback=14, window=20)
+
+    # indicator state for the whole universe, fed only with new bars
+    context.sharded = bool(context.params['signal_shards'])
+    if context.sharded and not can_shard():
+        # a sweep or walk-forward worker cannot start processes of its own
+        log.warning("signal_shards ignored in a daemonic process; signals run in process")
+        context.sharded = False
+    if context.sharded:
+        # split by security across processes; only signals come back
+        context.signal_engine = ShardedSignals(context.params, context.securities,
+                                               context.params['signal_shards'])
+    else:
+        # a sweep may serve Bollinger and MACD from kernels shared by its runs
+        context.signal_engine = CrossSectionalSignals(context.params, assets=context.securities,
+                                                      kernels=getattr(context, 'indicator_kernels', None))
+    # only targets that moved are sent, once per tick
+    context.orders = OrderManager(order_target_percent, context.params['order_tolerance'], context.portfolio)
+    # positions (entry, side, watermarks) and ATRs of the book as arrays, checked in one pass
+    context.risk = RiskMonitor(context.securities, context.params['stop_loss_multiplier'],
+                               context.params['take_profit_multiplier'])
+
+    set_commission(commission.PerShare(cost=0.0, min_trade_cost=0.0))
+    set_slippage(slippage.FixedSlippage(0.00))
+
+    schedule_function(run_strategy, date_rules.every_day(), time_rules.every_nth_minute(context.params['trade_freq']))
+    schedule_function(stop_trading, date_rules.every_day(), time_rules.market_close(minutes=30))
+
+    context.trade = True
+
+def before_trading_start(context, data):
+    context.trade = True
+    update_atr_values(context, data)  # Daily ATR, once per session
+
+def stop_trading(context, data):
+    context.trade = False
+
+def run_strategy(context, data):
+    if not context.trade:
+        return
+
+    generate_signals(context, data)
+    if context.params['intraday_atr']:
+        update_intraday_atr(context, data)
+    generate_target_position(context, data)
+    rebalance(context, data)
+
+def handle_data(context, data):
+    """Every minute, even after stop_trading: re-check the positions nearest their stop or target."""
+    context.risk.sync(context.portfolio.positions, data.current_dt)
+    stopped, taken = context.risk.poll(data, context.params['stop_band'], context.params['stop_refresh'])
+    if len(stopped) or len(taken):
+        for row in np.concatenate([stopped, taken]).tolist():
+            context.orders.target(context.securities[row], 0)
+        context.orders.flush()
+
+def degradation(context):
+    """(skip_adx, held mask or None) asked by the slot watchdog, if one is running."""
+    degraded = getattr(context, 'degradation', None)
+    if degraded is None:
+        return False, None
+    return degraded.skip_adx, degraded.held
+
+def update_atr_values(context, data):
+    """Daily ATR for the whole universe, computed once before the session opens."""
+    try:
+        context.atr_values = context.daily_factors.compute(data, context.securities)
+    except Exception as e:
+        log.warning("ATR calculation error: %s", e)
+
+def update_intraday_atr(context, data):
+    """Optional live ATR: the daily value advanced by today's range so far."""
+    try:
+        context.atr_values = context.daily_factors.intraday(data)
+    except Exception as e:
+        log.warning("ATR calculation error: %s", e)
+
+def rebalance(context, data):
+    risk = context.risk
+    risk.set_atr(context.atr_values)
+    risk.sync(context.portfolio.positions, data.current_dt)
+    prices = risk.prices(data)
+    risk.mark(prices)
+
+    # Trailing Stop Loss and Take Profit for the whole book
+    stopped, taken = risk.check(prices)
+    exits = stopped | taken
+    targets = np.array([context.target_position[security] for security in context.securities], dtype=float)
+    targets[exits] = 0
+    risk.exit(exits)
+    risk.rank(prices)
+
+    _, held = degradation(context)
+    # when degraded to positions_only, securities without a position are left alone
+    rows = range(len(targets)) if held is None else np.flatnonzero(held | exits).tolist()
+    for row in rows:
+        context.orders.target(context.securities[row], targets[row])
+    context.orders.flush()
+
+def generate_target_position(context, data):
+    for security in context.securities:
+        atr_value = context.atr_values.get(security, None)
+        if atr_value:
+            weight = min(max(0.2 / atr_value, 0.02), 0.3)  # Min weight 2%, max 30%
+            if context.signals[security] > 0:
+                context.target_position[security] = weight * context.params['leverage']
+            elif context.signals[security] < 0:
+                context.target_position[security] = -weight * context.params['leverage']
+            else:
+                context.target_position[security] = 0
+
+def generate_signals(context, data):
+    skip_adx, held = degradation(context)
+    if context.sharded:
+        try:
+            signals = context.signal_engine.update(data, context.params['indicator_lookback'],
+                                                   skip_adx, held)
+        except Exception as e:
+            log.warning("Sharded signal error: %s", e)
+            return
+        context.signals = dict(zip(context.securities, signals.tolist()))
+        return
+
+    nbars = context.params['indicator_lookback']
+    if context.params['indicator_freq'] == '1m':
+        # warm indicator state only needs the bars it has not seen yet
+        nbars = context.signal_engine.window_length(nbars, data.bar, data.source.index)
+    try:
+        price_data = data.history(context.securities, ['open', 'high', 'low', 'close', 'volume'], 
+                                  nbars, context.params['indicator_freq'])
+    except Exception as e:
+        log.warning("Data history error: %s", e)
+        return
+
+    window, stamps = stack_history(price_data, context.securities)
+    signals = context.signal_engine.update(window, stamps, skip_adx, held)
+    context.signals = dict(zip(context.securities, signals.tolist()))
+
+def analyze(context, perf):
+    if context.sharded:
+        context.signal_engine.close()
@@ -1,3 +1,5 @@
+import logging
+
 from blueshift.library.technicals.indicators import bollinger_band, doji, rsi, ema, atr, macd
 from blueshift.finance import commission, slippage
 from blueshift.api import(  symbol,
@@ -9,6 +11,8 @@ from blueshift.api import(  symbol,
                             time_rules,
                        )
 
+log = logging.getLogger(__name__)
+
 def initialize(context):
     # Universe selection
     context.securities = [symbol('MSFT'), symbol('GOOG')]
@@ -34,6 +38,7 @@ def initialize(context):
     context.signals = dict((security, 0) for security in context.securities)
     context.target_position = dict((security, 0) for security in context.securities)
     context.entry_prices = dict((security, None) for security in context.securities)
+    context.atr_values = dict((security, None) for security in context.securities)
 
     # Set trading cost and slippage
     set_commission(commission.PerShare(cost=0.0, min_trade_cost=0.0))
@@ -48,6 +53,7 @@ def initialize(context):
 
 def before_trading_start(context, data):
     context.trade = True
+    update_atr_values(context, data)  # Daily ATR, once per session
 
 def stop_trading(context, data):
     context.trade = False
@@ -60,6 +66,20 @@ def run_strategy(context, data):
     generate_target_position(context, data)
     rebalance(context, data)
 
+def update_atr_values(context, data):
+    """Daily ATR for the whole universe, computed once before the session opens."""
+    try:
+        price_data = data.history(context.securities, ['high', 'low', 'close'], 20, '1d')
+    except Exception as e:
+        log.warning("ATR calculation error: %s", e)
+        return
+
+    for security in context.securities:
+        try:
+            context.atr_values[security] = atr(price_data.xs(security), 14)
+        except Exception as e:
+            log.warning("ATR calculation error for %s: %s", security, e, extra={'security': security})
+
 def rebalance(context, data):
     for security in context.securities:
         target_weight = context.target_position[security]
@@ -82,7 +102,9 @@ def rebalance(context, data):
 def generate_target_position(context, data):
     num_secs = len(context.securities)
     for security in context.securities:
-        atr_value = atr(data.history(security, ['high', 'low', 'close'], 20, '1d'), 14)
+        atr_value = context.atr_values[security]
+        if not atr_value:
+            continue
         weight = 0.05 / atr_value  # Dynamic position sizing
         if context.signals[security] > context.params['buy_signal_threshold']:
             context.target_position[security] = weight * context.params['leverage']
@@ -96,7 +118,7 @@ def generate_signals(context, data):
         price_data = data.history(context.securities, ['open', 'high', 'low', 'close'], 
                                   context.params['indicator_lookback'], context.params['indicator_freq'])
     except Exception as e:
-        print(f"Data history error: {e}")
+        log.warning("Data history error: %s", e)
         return
 
     for security in context.securities:
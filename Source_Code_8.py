@@ -1,3 +1,5 @@
+import logging
+
 from blueshift.library.technicals.indicators import bollinger_band, doji, macd, atr, adx
 from blueshift.finance import commission, slippage
 from blueshift.api import (
@@ -10,6 +12,8 @@ from blueshift.api import (
     time_rules,
 )
 
+log = logging.getLogger(__name__)
+
 def initialize(context):
     context.securities = [symbol('MSFT'), symbol('GOOG'), symbol('AAPL'), symbol('AMZN'), symbol('TSLA')]
 
@@ -31,6 +35,7 @@ def initialize(context):
     context.signals = dict((security, 0) for security in context.securities)
     context.target_position = dict((security, 0) for security in context.securities)
     context.entry_prices = dict((security, None) for security in context.securities)
+    context.atr_values = dict((security, None) for security in context.securities)
 
     set_commission(commission.PerShare(cost=0.0, min_trade_cost=0.0))
     set_slippage(slippage.FixedSlippage(0.00))
@@ -42,6 +47,7 @@ def initialize(context):
 
 def before_trading_start(context, data):
     context.trade = True
+    update_atr_values(context, data)  # Daily ATR, once per session
 
 def stop_trading(context, data):
     context.trade = False
@@ -54,6 +60,20 @@ def run_strategy(context, data):
     generate_target_position(context, data)
     rebalance(context, data)
 
+def update_atr_values(context, data):
+    """Daily ATR for the whole universe, computed once before the session opens."""
+    try:
+        price_data = data.history(context.securities, ['high', 'low', 'close'], 20, '1d')
+    except Exception as e:
+        log.warning("ATR calculation error: %s", e)
+        return
+
+    for security in context.securities:
+        try:
+            context.atr_values[security] = atr(price_data.xs(security), 14)
+        except Exception as e:
+            log.warning("ATR calculation error for %s: %s", security, e, extra={'security': security})
+
 def rebalance(context, data):
     for security in context.securities:
         target_weight = context.target_position[security]
@@ -75,7 +95,9 @@ def rebalance(context, data):
 
 def generate_target_position(context, data):
     for security in context.securities:
-        atr_value = atr(data.history(security, ['high', 'low', 'close'], 20, '1d'), 14)
+        atr_value = context.atr_values[security]
+        if not atr_value:
+            continue
         weight = min(max(0.2 / atr_value, 0.02), 0.3)  # Min weight 2%, max 30%
         if context.signals[security] > 0:
             context.target_position[security] = weight * context.params['leverage']
@@ -90,7 +112,7 @@ def generate_signals(context, data):
                                   context.params['indicator_lookback'], context.params['indicator_freq'])
         daily_data = data.history(context.securities, ['close'], 50, '1d')  # Daily trend data
     except Exception as e:
-        print(f"Data history error: {e}")
+        log.warning("Data history error: %s", e)
         return
 
     for security in context.securities:
@@ -99,31 +121,34 @@ def generate_signals(context, data):
         context.signals[security] = signal_function(intraday_px, daily_px, context.params)
 
 def signal_function(intraday_px, daily_px, params):
+    # Cheapest rejections first, so most bars never reach the indicators
     ind1 = doji(intraday_px)
-    upper, mid, lower = bollinger_band(intraday_px.close.values, params['BBands_period'])
-    macd_line, signal_line, _ = macd(intraday_px.close.values, params['MACD_fast'], params['MACD_slow'], params['MACD_signal'])
-    adx_value = adx(intraday_px.high.values, intraday_px.low.values, intraday_px.close.values, params['ADX_period'])
+    if ind1 <= 0:
+        return 0
+
+    # Check for high volume confirmation
     avg_volume = intraday_px.volume.values[-params['indicator_lookback']:].mean()
     last_volume = intraday_px.volume.values[-1]
+    if last_volume < params['volume_threshold'] * avg_volume:
+        return 0
 
-    # Daily Bollinger Bands for trend confirmation
-    daily_upper, daily_mid, daily_lower = bollinger_band(daily_px.values, params['BBands_period'])
-    daily_trend_up = daily_px.values[-1] > daily_mid
-    daily_trend_down = daily_px.values[-1] < daily_mid
-
+    upper, mid, lower = bollinger_band(intraday_px.close.values, params['BBands_period'])
     if upper - lower == 0:
         return 0
 
-    # Check for high volume confirmation
-    if last_volume < params['volume_threshold'] * avg_volume:
+    # Use ADX for trend strength filtering
+    adx_value = adx(intraday_px.high.values, intraday_px.low.values, intraday_px.close.values, params['ADX_period'])
+    if adx_value < 15:
         return 0
 
+    macd_line, signal_line, _ = macd(intraday_px.close.values, params['MACD_fast'], params['MACD_slow'], params['MACD_signal'])
     last_px = intraday_px.close.values[-1]
     dist_to_upper = 100 * (upper - last_px) / (upper - lower)
 
-    # Use ADX for trend strength filtering
-    if adx_value < 15:
-        return 0    
+    # Daily Bollinger Bands for trend confirmation
+    daily_upper, daily_mid, daily_lower = bollinger_band(daily_px.values, params['BBands_period'])
+    daily_trend_up = daily_px.values[-1] > daily_mid
+    daily_trend_down = daily_px.values[-1] < daily_mid
 
     # Combine daily trend with intraday signals
     if daily_trend_up and ind1 > 0 and dist_to_upper < 30 and macd_line > signal_line:
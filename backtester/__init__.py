@@ -0,0 +1,11 @@
+"""
+    Offline backtester for the Source_Code_N.py strategy variants.
+
+    Replays local 1-minute bars through the strategy callbacks, with the
+    `blueshift` package in this repository standing in for the platform
+    API, e.g.
+
+        python -m backtester Source_Code_17.py --data ./minute_bars
+"""
+from backtester.data import Asset, BarData, MinuteBars, load_minute_bars
+from backtester.engine import Engine, load_strategy, run_backtest, summarize
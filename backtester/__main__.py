@@ -0,0 +1,125 @@
+"""Command line entry point: python -m backtester STRATEGY --data DIR."""
+import argparse
+
+import pandas as pd
+
+from backtester.engine import run_backtest, summarize
+from backtester.eventlog import EventLog, read_events
+from backtester.fills import FillSimulator
+from backtester.memo import IndicatorCache
+from backtester.profiling import Profiler
+from backtester.store import open_bars
+from backtester.tracing import Tracer
+from backtester.watchdog import SlotWatchdog
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m backtester')
+    parser.add_argument('strategy', help='path to a Source_Code_N.py file')
+    parser.add_argument('--data', required=True,
+                        help='columnar store, or directory of <SYMBOL>.csv '
+                             'minute bars')
+    parser.add_argument('--start', default=None,
+                        help='first traded session; earlier bars are warm-up')
+    parser.add_argument('--end', default=None)
+    parser.add_argument('--warmup', type=int, default=30,
+                        help='calendar days of history loaded before --start')
+    parser.add_argument('--capital', type=float, default=1e6)
+    parser.add_argument('--pandas', action='store_true',
+                        help='return history as pandas objects, not views')
+    parser.add_argument('--indicator-cache', type=float, default=0,
+                        metavar='MB',
+                        help='memoize indicator calls in an LRU cache of '
+                             'this size')
+    parser.add_argument('--profile', default=None, metavar='JSONL',
+                        help='time every strategy stage; per-session '
+                             'latency histograms go to this file')
+    parser.add_argument('--trace', default=None, metavar='JSON',
+                        help='write a Chrome trace of the strategy calls '
+                             'and indicators to this file')
+    parser.add_argument('--trace-every', type=int, default=20, metavar='N',
+                        help='trace one session in N (default 20; 1 traces '
+                             'every session)')
+    parser.add_argument('--slot-budget', type=float, default=None,
+                        metavar='MS',
+                        help='degrade scheduled functions that come close '
+                             'to this many milliseconds per call')
+    parser.add_argument('--commission-per-share', type=float, default=0.0,
+                        metavar='COST')
+    parser.add_argument('--commission-bps', type=float, default=0.0,
+                        metavar='BPS')
+    parser.add_argument('--spread-bps', type=float, default=0.0,
+                        metavar='BPS', help='quoted spread; half is paid '
+                                            'on every fill')
+    parser.add_argument('--impact', type=float, default=0.0,
+                        help='square-root market impact: price fraction '
+                             'paid for trading a whole bar\'s volume')
+    parser.add_argument('--event-log', default=None, metavar='JSONL',
+                        help='send strategy warnings to this file through '
+                             'a rate-limited background writer')
+    parser.add_argument('--output', default=None,
+                        help='write the daily performance frame to this csv')
+    args = parser.parse_args(argv)
+
+    first = None
+    if args.start is not None:
+        first = pd.Timestamp(args.start) - pd.Timedelta(days=args.warmup)
+    bars = open_bars(args.data, start=first, end=args.end)
+    cache = None
+    if args.indicator_cache > 0:
+        cache = IndicatorCache(int(args.indicator_cache*(1 << 20)))
+    profiler = Profiler(args.profile) if args.profile else None
+    tracer = None
+    if args.trace:
+        tracer = Tracer(args.trace, args.trace_every)
+    watchdog = None
+    if args.slot_budget is not None:
+        watchdog = SlotWatchdog(args.slot_budget/1e3)
+    fills = None
+    if (args.commission_per_share or args.commission_bps or args.spread_bps
+            or args.impact):
+        fills = FillSimulator(per_share=args.commission_per_share,
+                              bps=args.commission_bps,
+                              spread_bps=args.spread_bps, impact=args.impact)
+    event_log = EventLog(args.event_log) if args.event_log else None
+    try:
+        perf, elapsed = run_backtest(args.strategy, bars, args.capital,
+                                     args.start, args.end, args.pandas,
+                                     indicator_cache=cache, profiler=profiler,
+                                     watchdog=watchdog, tracer=tracer,
+                                     event_log=event_log, fills=fills)
+    finally:
+        if event_log is not None:
+            event_log.close()
+    if args.output:
+        perf.to_csv(args.output)
+
+    print(f"{args.strategy}: {len(bars)} bars x {len(bars.symbols)} symbols "
+          f"in {elapsed:.1f}s")
+    for key, value in summarize(perf).items():
+        print(f"  {key:>14}: {value:.4f}" if isinstance(value, float)
+              else f"  {key:>14}: {value}")
+    if cache is not None:
+        print(f"indicator cache: {cache.stats['hits']} hits, "
+              f"{cache.stats['misses']} misses, "
+              f"{cache.stats['evictions']} evictions, "
+              f"{cache.stats['uncached']} calls not cached")
+    if watchdog is not None:
+        events = watchdog.events_frame()
+        print(f"watchdog: {len(events)} events "
+              f"{events['event'].value_counts().to_dict()}")
+    if tracer is not None:
+        print(f"trace: {len(tracer.traced)} of {tracer.sessions} sessions, "
+              f"{len(tracer.events)} spans in {args.trace}")
+    if event_log is not None:
+        events = read_events(args.event_log)
+        print(f"event log: {event_log.stats['written']} written, "
+              f"{event_log.stats['suppressed']} rate limited, "
+              f"{event_log.stats['dropped']} dropped; "
+              f"{len(events)} events in {args.event_log}")
+    if profiler is not None:
+        print(profiler.report().to_string(float_format='{:.1f}'.format))
+
+
+if __name__ == '__main__':
+    main()
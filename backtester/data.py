@@ -0,0 +1,286 @@
+"""
+    Local minute-bar data: loading, session bookkeeping and the `data`
+    object (current / history) handed to the strategy callbacks.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from backtester.panel import HistoryColumn, HistoryFrame, HistoryPanel
+
+FIELDS = ('open', 'high', 'low', 'close', 'volume')
+
+
+class Asset:
+    """Minimal stand-in for a Blueshift asset, keyed by symbol."""
+    __slots__ = ('symbol', 'sid')
+
+    def __init__(self, symbol, sid):
+        self.symbol = symbol
+        self.sid = sid
+
+    def __eq__(self, other):
+        return isinstance(other, Asset) and other.symbol == self.symbol
+
+    def __lt__(self, other):
+        return self.symbol < other.symbol
+
+    def __hash__(self):
+        return hash(self.symbol)
+
+    def __repr__(self):
+        return f"Equity({self.symbol})"
+
+
+class BarSource:
+    """
+        Session bookkeeping and window access shared by the in-memory and
+        on-disk bar stores. Subclasses provide `block(field)` and
+        `daily_block(field)`, (securities x bars) and (securities x
+        sessions) arrays, so the windows of a whole universe are one
+        slice per field.
+    """
+    def _init_sessions(self, index):
+        self.index = np.asarray(index, dtype='datetime64[ns]')
+        days = self.index.astype('datetime64[D]')
+        starts = np.flatnonzero(np.r_[True, days[1:] != days[:-1]])
+        self.session_starts = starts
+        self.session_ends = np.r_[starts[1:], len(self.index)]
+        self.sessions = days[starts]
+        self.session_of_bar = np.repeat(np.arange(len(starts)),
+                                        self.session_ends - starts)
+
+    def __len__(self):
+        return len(self.index)
+
+    def column(self, sid, field):
+        return self.block(field)[sid]
+
+    def daily_column(self, sid, field):
+        return self.daily_block(field)[sid]
+
+    def price(self, sid, field, bar):
+        return self.block(field)[sid, bar]
+
+    def prices(self, sids, field, bar):
+        return self.block(field)[sids, bar]
+
+    def window(self, sid, field, end, nbars):
+        """Minute bars `end - nbars + 1 .. end` (inclusive) as a view."""
+        return self.windows(sid, field, end, nbars)
+
+    def windows(self, sids, field, end, nbars):
+        """
+            `window` of several securities: a (securities x bars) view
+            for a slice of sids, one fancy-indexed copy for a list.
+        """
+        start = max(end + 1 - nbars, 0)
+        return self.block(field)[sids, start:end + 1]
+
+    def daily_window(self, sid, field, end, nbars):
+        """
+            Daily bars up to the bar `end`. The last element is the
+            current session aggregated up to `end`, as on the platform.
+        """
+        return self.daily_windows(sid, field, end, nbars)
+
+    def daily_windows(self, sids, field, end, nbars):
+        """`daily_window` of several securities, as `windows`."""
+        session = self.session_of_bar[end]
+        start = max(session + 1 - nbars, 0)
+        daily = self.daily_block(field)[sids, start:session + 1]
+        if end == self.session_ends[session] - 1:
+            return daily
+
+        todays = self.block(field)[sids, self.session_starts[session]:end + 1]
+        if field == 'open':
+            partial = todays[..., 0]
+        elif field == 'high':
+            partial = todays.max(axis=-1)
+        elif field == 'low':
+            partial = todays.min(axis=-1)
+        elif field == 'close':
+            partial = todays[..., -1]
+        else:
+            partial = todays.sum(axis=-1)
+        return np.concatenate([daily[..., :-1], partial[..., None]], axis=-1)
+
+    def timestamps(self, end, nbars, frequency):
+        """Bar (or session) labels of a history window, as datetime64."""
+        if frequency == '1d':
+            session = self.session_of_bar[end]
+            start = max(session + 1 - nbars, 0)
+            return self.sessions[start:session + 1]
+        start = max(end + 1 - nbars, 0)
+        return self.index[start:end + 1]
+
+
+def aggregate_daily(arrays, starts, ends):
+    """Daily OHLCV from (n_assets, n_bars) minute arrays and session bounds."""
+    return {
+        'open': arrays['open'][:, starts],
+        'high': np.maximum.reduceat(arrays['high'], starts, axis=1),
+        'low': np.minimum.reduceat(arrays['low'], starts, axis=1),
+        'close': arrays['close'][:, ends - 1],
+        'volume': np.add.reduceat(arrays['volume'], starts, axis=1),
+    }
+
+
+class MinuteBars(BarSource):
+    """
+        Aligned 1-minute OHLCV bars for a universe of symbols, in memory.
+
+        `arrays[field]` is a float64 array of shape (n_assets, n_bars) and
+        `index` the matching datetime64[ns] bar timestamps. Daily bars are
+        aggregated once from the minute data.
+    """
+    def __init__(self, symbols, index, arrays):
+        self.symbols = list(symbols)
+        self.sids = dict((s, i) for i, s in enumerate(self.symbols))
+        self.arrays = arrays
+        self._init_sessions(index)
+        self.daily = aggregate_daily(arrays, self.session_starts,
+                                     self.session_ends)
+
+    def block(self, field):
+        return self.arrays[field]
+
+    def daily_block(self, field):
+        return self.daily[field]
+
+
+def load_minute_bars(data_dir, symbols=None, start=None, end=None):
+    """
+        Load `<SYMBOL>.csv` files from `data_dir`, each with a timestamp
+        column followed by open, high, low, close and volume. Bars are
+        aligned on the union of timestamps, prices forward-filled and
+        missing volume set to zero.
+    """
+    if symbols is None:
+        symbols = sorted(os.path.splitext(f)[0] for f in os.listdir(data_dir)
+                         if f.endswith('.csv'))
+    if not symbols:
+        raise ValueError(f"no minute-bar files found in {data_dir}")
+
+    frames = {}
+    for sym in symbols:
+        df = pd.read_csv(os.path.join(data_dir, f"{sym}.csv"),
+                         index_col=0, parse_dates=True)
+        df.columns = [c.lower() for c in df.columns]
+        frames[sym] = df.loc[start:end, list(FIELDS)]
+
+    index = frames[symbols[0]].index
+    for df in frames.values():
+        index = index.union(df.index)
+
+    arrays = dict((f, np.empty((len(symbols), len(index)))) for f in FIELDS)
+    for i, sym in enumerate(symbols):
+        df = frames[sym].reindex(index)
+        df['volume'] = df['volume'].fillna(0.0)
+        df = df.ffill().bfill()
+        for f in FIELDS:
+            arrays[f][i] = df[f].to_numpy(dtype=float)
+
+    return MinuteBars(symbols, index.values, arrays)
+
+
+class BarData:
+    """
+        The `data` argument of the strategy callbacks. Answers `current`
+        and `history` as of the engine clock. History windows come back as
+        zero-copy views of the bar store (see backtester.panel), or as
+        pandas objects shaped like the platform's with `as_pandas=True`.
+    """
+    def __init__(self, bars, clock, as_pandas=False):
+        self._bars = bars
+        self._clock = clock
+        self.as_pandas = as_pandas
+        # (index, sids) per asset list asked for by `current` or `history`
+        self._universes = {}
+
+    @property
+    def current_dt(self):
+        return pd.Timestamp(self._bars.index[self._clock()])
+
+    # backtester extensions, for helpers that read the bars themselves
+    @property
+    def bar(self):
+        """Number of the current bar in `source`."""
+        return self._clock()
+
+    @property
+    def source(self):
+        return self._bars
+
+    def can_trade(self, assets):
+        if isinstance(assets, Asset):
+            return True
+        return pd.Series(True, index=list(assets))
+
+    def current(self, assets, fields):
+        bar = self._clock()
+        bars = self._bars
+        if isinstance(assets, Asset):
+            if isinstance(fields, str):
+                return float(bars.price(assets.sid, fields, bar))
+            return pd.Series([bars.price(assets.sid, f, bar) for f in fields],
+                             index=list(fields))
+
+        index, sids = self._universe(assets)
+        if isinstance(fields, str):
+            return pd.Series(bars.prices(sids, fields, bar), index=index,
+                             copy=False)
+        return pd.DataFrame(dict((f, bars.prices(sids, f, bar))
+                                 for f in fields), index=index)
+
+    def _universe(self, assets):
+        """(pandas index, sids) of an asset list; sids a slice if it can."""
+        key = tuple(assets)
+        universe = self._universes.get(key)
+        if universe is None:
+            sids = np.array([a.sid for a in key], dtype=int)
+            if len(sids) and (np.diff(sids) == 1).all():
+                # a view instead of a fancy-indexed copy
+                sids = slice(int(sids[0]), int(sids[-1]) + 1)
+            universe = self._universes[key] = (pd.Index(key, dtype=object),
+                                               sids)
+        return universe
+
+    def history(self, assets, fields, nbars, frequency):
+        if frequency not in ('1m', '1d'):
+            raise ValueError(f"unsupported frequency {frequency}")
+        bar = self._clock()
+        windows = (self._bars.daily_windows if frequency == '1d'
+                   else self._bars.windows)
+        index = self._bars.timestamps(bar, nbars, frequency)
+
+        if isinstance(assets, Asset):
+            sid = assets.sid
+            if isinstance(fields, str):
+                out = HistoryColumn(windows(sid, fields, bar, nbars),
+                                    index, fields, assets)
+            else:
+                out = HistoryFrame(dict((f, windows(sid, f, bar, nbars))
+                                        for f in fields), index, assets)
+        else:
+            assets = list(assets)
+            sids = self._universe(assets)[1]
+            rows = None
+            if not isinstance(sids, slice):
+                # views over the span of the universe, read through the
+                # rows of its assets, instead of fancy-indexed copies
+                lo = int(sids.min())
+                rows = sids - lo
+                sids = slice(lo, int(sids.max()) + 1)
+            # one slice per field for the whole universe
+            if isinstance(fields, str):
+                block = windows(sids, fields, bar, nbars)
+                if rows is not None:
+                    block = [block[row] for row in rows]
+                out = HistoryFrame(dict(zip(assets, block)), index)
+            else:
+                out = HistoryPanel(dict((f, windows(sids, f, bar, nbars))
+                                        for f in fields), assets, index, rows)
+
+        return out.to_pandas() if self.as_pandas else out
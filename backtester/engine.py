@@ -0,0 +1,432 @@
+"""
+    Event-driven replay of local minute bars through an unmodified
+    Source_Code_N.py strategy: initialize, before_trading_start, the
+    scheduled functions and handle_data run as they would on Blueshift.
+"""
+import importlib.util
+import itertools
+import logging
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+import blueshift.api
+from backtester.data import Asset, BarData
+from backtester.memo import install
+from blueshift.finance import commission, slippage
+
+_module_ids = itertools.count()
+
+
+def load_strategy(path):
+    """Import a strategy file as a fresh, isolated module."""
+    name = f"_strategy_{next(_module_ids)}_" + \
+        os.path.splitext(os.path.basename(path))[0]
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class Position:
+    __slots__ = ('asset', 'quantity', 'cost_basis', 'last_price')
+
+    def __init__(self, asset):
+        self.asset = asset
+        self.quantity = 0
+        self.cost_basis = 0.0
+        self.last_price = 0.0
+
+    def __repr__(self):
+        return f"Position({self.asset}, quantity={self.quantity})"
+
+
+class Order:
+    __slots__ = ('id', 'asset', 'quantity', 'created')
+
+    def __init__(self, oid, asset, quantity, created):
+        self.id = oid
+        self.asset = asset
+        self.quantity = quantity
+        self.created = created
+
+
+class Portfolio:
+    def __init__(self, capital_base):
+        self.starting_cash = float(capital_base)
+        self.cash = float(capital_base)
+        self.positions = {}
+
+    @property
+    def positions_value(self):
+        return sum(p.quantity*p.last_price for p in self.positions.values())
+
+    @property
+    def gross_exposure(self):
+        return sum(abs(p.quantity)*p.last_price
+                   for p in self.positions.values())
+
+    @property
+    def portfolio_value(self):
+        return self.cash + self.positions_value
+
+
+class Context:
+    """
+        Attribute bag passed to the strategy as `context`. `overrides` are
+        merged into `context.params` when initialize assigns it, so every
+        later read, including the rest of initialize, sees them.
+    """
+    def __init__(self, portfolio, overrides=None):
+        object.__setattr__(self, '_overrides', dict(overrides or {}))
+        self.portfolio = portfolio
+
+    def __setattr__(self, name, value):
+        if name == 'params' and self._overrides:
+            unknown = set(self._overrides) - set(value)
+            if unknown:
+                raise ValueError(f"unknown strategy params {sorted(unknown)}")
+            value = dict(value, **self._overrides)
+        object.__setattr__(self, name, value)
+
+
+class Engine:
+    """
+        Runs one strategy module over a `MinuteBars` instance. Orders are
+        filled at the close of the bar following the one they were placed
+        in, through the commission and slippage models the strategy sets.
+        Sessions before `start` only serve as history for the indicators;
+        replay stops after the session `end`. `params` overrides entries
+        of the strategy's `context.params`. With an `indicator_cache`
+        (backtester.memo.IndicatorCache), the indicator functions the
+        strategy imported are memoized through it. A
+        `profiler` (backtester.profiling.Profiler) times the strategy's
+        functions, data calls and orders, and dumps them every session.
+        A `watchdog` (backtester.watchdog.SlotWatchdog) guards the
+        scheduled functions against their slot budget. A `tracer`
+        (backtester.tracing.Tracer) records the strategy's calls and
+        indicators of sampled sessions and is written out by `finish`.
+        With an `event_log` (backtester.eventlog.EventLog), what the
+        strategy logs goes there, stamped with the bar time, instead of
+        to stderr. A `fills` (backtester.fills.FillSimulator) prices each
+        bar's fills in one batch and replaces the commission and slippage
+        models the strategy sets. `kernels`, a KernelTable of
+        backtester.kernels, is handed to the strategy as
+        `context.indicator_kernels`.
+    """
+    def __init__(self, strategy, bars, capital_base=1e6, start=None,
+                 end=None, as_pandas=False, params=None,
+                 indicator_cache=None, profiler=None, watchdog=None,
+                 tracer=None, event_log=None, fills=None, kernels=None):
+        if isinstance(strategy, str):
+            strategy = load_strategy(strategy)
+        if indicator_cache is not None:
+            install(strategy, indicator_cache)
+            indicator_cache.watch(bars)
+        self.profiler = profiler
+        self.watchdog = watchdog
+        self.tracer = tracer
+        if profiler is not None:
+            profiler.instrument(strategy)
+            self.order_target_percent = profiler.timed(
+                'order_target_percent', self.order_target_percent)
+        if tracer is not None:
+            tracer.instrument(strategy)
+        self.strategy = strategy
+        self.bars = bars
+        self.portfolio = Portfolio(capital_base)
+        self.context = Context(self.portfolio, params)
+        if kernels is not None:
+            self.context.indicator_kernels = kernels
+        self.bar = 0
+        self.data = BarData(bars, lambda: self.bar, as_pandas)
+        if profiler is not None:
+            self.data = profiler.wrap_data(self.data)
+        if tracer is not None:
+            self.data = tracer.wrap_data(self.data)
+        self.event_log = event_log
+        self._log_handler = None
+        self._log_propagate = None
+        if event_log is not None:
+            self._log_handler = event_log.handler(
+                lambda: self.data.current_dt)
+            logger = logging.getLogger(strategy.__name__)
+            logger.addHandler(self._log_handler)
+            self._log_propagate = logger.propagate
+            logger.propagate = False
+        self.first_session = 0
+        self.last_session = len(bars.sessions)
+        if start is not None:
+            self.first_session = int(np.searchsorted(
+                bars.sessions, np.datetime64(pd.Timestamp(start), 'D')))
+        if end is not None:
+            self.last_session = int(np.searchsorted(
+                bars.sessions, np.datetime64(pd.Timestamp(end), 'D'),
+                side='right'))
+
+        self.fills = fills
+        self.commission = commission.PerShare(cost=0.0, min_trade_cost=0.0)
+        self.slippage = slippage.FixedSlippage(0.0)
+        self._schedules = []
+        self._open_orders = {}
+        self._order_ids = itertools.count()
+        self._counts = dict(orders=0, fills=0, commission=0.0)
+        self._records = None
+        self._next_session = self.first_session
+        self._session = (0, 0)
+        self._todays = []
+        self._before_trading_start = getattr(strategy, 'before_trading_start',
+                                             None)
+        self._handle_data = getattr(strategy, 'handle_data', None)
+
+    # api hooks, reached through blueshift.api
+    def symbol(self, sym):
+        try:
+            return Asset(sym, self.bars.sids[sym])
+        except KeyError:
+            raise ValueError(f"no data for symbol {sym}") from None
+
+    def set_commission(self, model):
+        self.commission = model
+
+    def set_slippage(self, model):
+        self.slippage = model
+
+    def schedule_function(self, func, date_rule, time_rule):
+        if self.watchdog is not None:
+            func = self.watchdog.wrap(func)
+        self._schedules.append(
+            (func, date_rule.mask(self.bars.sessions), time_rule))
+
+    def order_target_percent(self, asset, percent):
+        price = self.bars.price(asset.sid, 'close', self.bar)
+        if not price > 0:
+            return None
+        if not np.isfinite(percent):
+            raise ValueError(f"invalid target percent {percent} for {asset}")
+        target = int(percent*self.portfolio.portfolio_value/price)
+        pos = self.portfolio.positions.get(asset)
+        held = pos.quantity if pos else 0
+        # a new target replaces whatever is still pending for the asset
+        self._open_orders.pop(asset, None)
+        quantity = target - held
+        if quantity == 0:
+            return None
+        order = Order(next(self._order_ids), asset, quantity, self.bar)
+        self._open_orders[asset] = order
+        self._counts['orders'] += 1
+        return order.id
+
+    # simulation
+    def _fill_orders(self):
+        if self.fills is not None:
+            return self._fill_batch()
+        bars = self.bars
+        for asset, order in list(self._open_orders.items()):
+            if order.created >= self.bar:
+                continue
+            del self._open_orders[asset]
+            close = bars.price(asset.sid, 'close', self.bar)
+            volume = bars.price(asset.sid, 'volume', self.bar)
+            price = self.slippage.simulate(order.quantity, close, volume)
+            cost = self.commission.calculate(order.quantity, price)
+            self._apply_fill(asset, order.quantity, price, cost)
+
+    def _fill_batch(self):
+        due = [(asset, order) for asset, order in self._open_orders.items()
+               if order.created < self.bar]
+        if not due:
+            return
+        sids = [asset.sid for asset, _ in due]
+        quantity = [order.quantity for _, order in due]
+        prices, costs = self.fills.fill(
+            quantity, self.bars.prices(sids, 'close', self.bar),
+            self.bars.prices(sids, 'volume', self.bar))
+        for (asset, order), price, cost in zip(due, prices.tolist(),
+                                               costs.tolist()):
+            del self._open_orders[asset]
+            self._apply_fill(asset, order.quantity, price, cost)
+
+    def _apply_fill(self, asset, quantity, price, cost):
+        pos = self.portfolio.positions.get(asset)
+        if pos is None:
+            pos = self.portfolio.positions[asset] = Position(asset)
+        new_qty = pos.quantity + quantity
+        if new_qty == 0:
+            pos.cost_basis = 0.0
+        elif pos.quantity == 0 or (new_qty > 0) != (pos.quantity > 0):
+            pos.cost_basis = price
+        elif abs(new_qty) > abs(pos.quantity):
+            pos.cost_basis = (pos.cost_basis*pos.quantity
+                              + price*quantity)/new_qty
+        pos.quantity = new_qty
+        self.portfolio.cash -= quantity*price + cost
+        self._counts['fills'] += 1
+        self._counts['commission'] += cost
+
+    def flatten(self):
+        """
+            Cancel the pending orders and close every position at the
+            current bar's close, through the same fill path as an order.
+        """
+        self._open_orders.clear()
+        for asset, pos in self.portfolio.positions.items():
+            if pos.quantity:
+                self._open_orders[asset] = Order(
+                    next(self._order_ids), asset, -pos.quantity,
+                    self.bar - 1)
+                self._counts['orders'] += 1
+        if self._open_orders:
+            self._fill_orders()
+            self._mark_to_market()
+
+    def _mark_to_market(self):
+        bars, bar = self.bars, self.bar
+        for pos in self.portfolio.positions.values():
+            pos.last_price = bars.price(pos.asset.sid, 'close', bar)
+
+    def run(self):
+        """Replay every session and return the daily performance frame."""
+        self.advance()
+        self.finish()
+        return self.performance()
+
+    def advance(self, until=None):
+        """
+            Replay the sessions up to and including the date `until` (all
+            remaining sessions by default), calling initialize first if the
+            run has not started. Can be called repeatedly; indicator state
+            and positions carry over, as in one continuous run.
+        """
+        bars = self.bars
+        last = self.last_session
+        if until is not None:
+            last = min(last, int(np.searchsorted(
+                bars.sessions, np.datetime64(pd.Timestamp(until), 'D'),
+                side='right')))
+
+        blueshift.api.register_engine(self)
+        try:
+            self.begin()
+            for session in range(self._next_session, last):
+                self.open_session(session)
+                start = bars.session_starts[session]
+                end = bars.session_ends[session]
+                for bar in range(start, end):
+                    self.step(bar)
+                self.close_session(session)
+        finally:
+            blueshift.api.register_engine(None)
+
+    # stepping interface, also driven bar by bar by backtester.host; the
+    # caller registers the engine with blueshift.api around each call
+    def begin(self):
+        """Call initialize, once."""
+        if self._records is None:
+            self._records = []
+            self._next_session = self.first_session
+            self.strategy.initialize(self.context)
+
+    def open_session(self, session):
+        """Run before_trading_start and pick the schedules of the day."""
+        bars = self.bars
+        start = bars.session_starts[session]
+        self._session = (start, bars.session_ends[session] - start)
+        self._todays = [(func, rule) for func, mask, rule in self._schedules
+                        if mask[session]]
+        self.bar = max(start - 1, 0)
+        if self.tracer is not None:
+            self.tracer.begin_session(bars.sessions[session])
+        if self._before_trading_start:
+            self._before_trading_start(self.context, self.data)
+
+    def step(self, bar):
+        """Fill pending orders, then call the strategy for one bar."""
+        self.bar = bar
+        if self._open_orders:
+            self._fill_orders()
+        self._mark_to_market()
+        start, length = self._session
+        minute = bar - start
+        context, data = self.context, self.data
+        for func, rule in self._todays:
+            if rule.matches(minute, length):
+                func(context, data)
+        if self._handle_data:
+            self._handle_data(context, data)
+
+    def close_session(self, session):
+        self._records.append(self._record(session))
+        self._next_session = session + 1
+        if self.profiler is not None:
+            self.profiler.end_session(self.bars.sessions[session])
+        if self.tracer is not None:
+            self.tracer.end_session()
+
+    def finish(self):
+        """Call the strategy's analyze, once the replay is over."""
+        if self.tracer is not None:
+            self.tracer.write()
+        if self._log_handler is not None:
+            logger = logging.getLogger(self.strategy.__name__)
+            logger.removeHandler(self._log_handler)
+            logger.propagate = self._log_propagate
+            self._log_handler = None
+            self.event_log.flush()
+        if hasattr(self.strategy, 'analyze'):
+            blueshift.api.register_engine(self)
+            try:
+                self.strategy.analyze(self.context, None)
+            finally:
+                blueshift.api.register_engine(None)
+
+    def performance(self):
+        """Daily performance frame of the sessions replayed so far."""
+        perf = pd.DataFrame(self._records or [],
+                            columns=['date', 'portfolio_value', 'cash',
+                                     'gross_exposure'] + list(self._counts))
+        perf = perf.set_index('date')
+        perf['returns'] = perf['portfolio_value'].pct_change().fillna(
+            perf['portfolio_value'].iloc[0]/self.portfolio.starting_cash - 1
+            if len(perf) else 0.0)
+        return perf
+
+    def _record(self, session):
+        pf = self.portfolio
+        record = dict(date=pd.Timestamp(self.bars.sessions[session]),
+                      portfolio_value=pf.portfolio_value, cash=pf.cash,
+                      gross_exposure=pf.gross_exposure)
+        record.update(self._counts)
+        return record
+
+
+def run_backtest(strategy, bars, capital_base=1e6, start=None, end=None,
+                 as_pandas=False, params=None, indicator_cache=None,
+                 profiler=None, watchdog=None, tracer=None, event_log=None,
+                 fills=None, kernels=None):
+    """
+        Convenience wrapper: run `strategy` (a path or module) over `bars`
+        between `start` and `end` and return (perf, elapsed_seconds).
+    """
+    engine = Engine(strategy, bars, capital_base, start, end, as_pandas,
+                    params, indicator_cache, profiler, watchdog, tracer,
+                    event_log, fills, kernels)
+    t0 = time.perf_counter()
+    perf = engine.run()
+    return perf, time.perf_counter() - t0
+
+
+def summarize(perf):
+    """Headline statistics for a daily performance frame."""
+    returns = perf['returns'].to_numpy()
+    vol = returns.std()
+    equity = perf['portfolio_value'].to_numpy()
+    drawdown = 1 - equity/np.maximum.accumulate(equity)
+    return {
+        'total_return': np.prod(1 + returns) - 1,
+        'sharpe': np.sqrt(252)*returns.mean()/vol if vol > 0 else 0.0,
+        'max_drawdown': drawdown.max(),
+        'orders': int(perf['orders'].iloc[-1]),
+    }
@@ -0,0 +1,163 @@
+"""
+    Non-blocking structured event log for strategy warnings.
+
+    Strategies log through the standard `logging` module (a module-level
+    `log = logging.getLogger(__name__)`), which works unchanged on
+    Blueshift. In a backtest, `EventLog.handler` is attached to the
+    strategy's logger. Its `emit` only checks a rate limit and puts the
+    record on a bounded queue, so a bad data day costs the strategy a dict
+    lookup per warning instead of a blocking write to stdout. A writer
+    thread formats the records and appends them to a JSON-lines file,
+    one object per event:
+
+        time        simulation time of the bar (if the engine gives a clock)
+        level       WARNING, ERROR, ...
+        event       the message template, e.g. "Data history error: %s"
+        message     the formatted message
+        error       exception class being handled, if any
+        security    the `security` passed in `extra`, if any
+        suppressed  events of the same key dropped since the previous one
+                    written, by the rate limit or a full queue
+
+    Rate limiting is a token bucket per (event, error, security): `burst`
+    events at once, then `rate` per second of the clock. When the queue is
+    full, records are dropped and counted rather than waited on; the
+    next event of the same key that is written reports them.
+    `read_events` loads a sink back as a DataFrame.
+"""
+import json
+import logging
+import queue
+import sys
+import threading
+import time
+
+import pandas as pd
+
+_STOP = object()
+
+
+class _Handler(logging.Handler):
+    """logging handler feeding an EventLog, with its own clock."""
+    def __init__(self, log, clock):
+        super().__init__()
+        self.log = log
+        self.clock = clock
+
+    def emit(self, record):
+        self.log.put(record, self.clock)
+
+
+class EventLog:
+    """
+        Bounded queue of log records drained to `sink` (a path) by a
+        background thread. `stats` counts written, suppressed (rate
+        limit) and dropped (queue full) events.
+    """
+    def __init__(self, sink, capacity=10000, rate=1/3600, burst=10):
+        self.sink = sink
+        self.rate = rate
+        self.burst = burst
+        self.stats = dict(written=0, suppressed=0, dropped=0)
+        self._buckets = {}
+        self._queue = queue.Queue(capacity)
+        self._fp = open(sink, 'a')
+        self._thread = threading.Thread(target=self._drain, daemon=True,
+                                        name='eventlog-writer')
+        self._thread.start()
+
+    def handler(self, clock=None):
+        """A logging.Handler for this log; `clock()` gives the event time."""
+        return _Handler(self, clock)
+
+    def _allow(self, key, now):
+        """Token bucket check; returns (allowed, suppressed so far)."""
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [self.burst, now, 0]
+        tokens = min(self.burst, bucket[0] + (now - bucket[1])*self.rate)
+        bucket[1] = now
+        if tokens < 1:
+            bucket[0] = tokens
+            bucket[2] += 1
+            self.stats['suppressed'] += 1
+            return False, 0
+        bucket[0] = tokens - 1
+        suppressed, bucket[2] = bucket[2], 0
+        return True, suppressed
+
+    def put(self, record, clock=None):
+        """Queue `record` unless rate limited or the queue is full."""
+        stamp = clock() if clock is not None else None
+        error = record.exc_info[0] if record.exc_info else sys.exc_info()[0]
+        error = error.__name__ if error is not None else None
+        security = getattr(record, 'security', None)
+        now = time.time() if stamp is None else pd.Timestamp(stamp).timestamp()
+        key = (record.msg, error, str(security))
+        allowed, suppressed = self._allow(key, now)
+        if not allowed:
+            return
+        try:
+            self._queue.put_nowait((record, stamp, error, suppressed))
+        except queue.Full:
+            self.stats['dropped'] += 1
+            # owed to the next event of the key that gets through
+            self._buckets[key][2] += suppressed + 1
+
+    def _event(self, record, stamp, error, suppressed):
+        security = getattr(record, 'security', None)
+        try:
+            message = record.getMessage()
+        except Exception:
+            message = str(record.msg)
+        return dict(time=None if stamp is None else str(stamp),
+                    level=record.levelname, logger=record.name,
+                    event=str(record.msg), message=message, error=error,
+                    security=None if security is None else str(security),
+                    suppressed=suppressed)
+
+    def _drain(self):
+        q, fp = self._queue, self._fp
+        while True:
+            item = q.get()
+            batch = [item]
+            while True:
+                try:
+                    batch.append(q.get_nowait())
+                except queue.Empty:
+                    break
+            stop = False
+            for item in batch:
+                if item is _STOP:
+                    stop = True
+                    continue
+                fp.write(json.dumps(self._event(*item)) + '\n')
+                self.stats['written'] += 1
+            fp.flush()
+            for _ in batch:
+                q.task_done()
+            if stop:
+                return
+
+    def flush(self):
+        """Wait until every queued event is written."""
+        self._queue.join()
+
+    def close(self):
+        """Write what is queued, stop the writer and close the sink."""
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join()
+        if not self._fp.closed:
+            self._fp.close()
+
+
+def read_events(path):
+    """The events of a sink as a DataFrame, one row per event."""
+    columns = ['time', 'level', 'logger', 'event', 'message', 'error',
+               'security', 'suppressed']
+    with open(path) as fp:
+        rows = [json.loads(line) for line in fp if line.strip()]
+    events = pd.DataFrame(rows, columns=columns)
+    events['time'] = pd.to_datetime(events['time'], errors='coerce')
+    return events
@@ -0,0 +1,75 @@
+"""
+    Daily factors computed once per session for the whole universe.
+
+    Daily bars do not change while the session is running, so ATR and the
+    other daily inputs are computed in before_trading_start from a single
+    history call, as (assets x days) arrays, and cached for the day.
+"""
+import numpy as np
+
+
+def batch_atr(high, low, close, lookback=14):
+    """
+        Wilder ATR at the last bar for every row of (n_assets, n_bars)
+        arrays; same convention as the per-security `atr`.
+    """
+    high, low, close = (np.atleast_2d(np.asarray(a, dtype=float))
+                        for a in (high, low, close))
+    prev = np.concatenate([close[:, :1], close[:, :-1]], axis=1)
+    tr = np.maximum(high, prev) - np.minimum(low, prev)
+    if tr.shape[1] <= lookback:
+        return np.full(tr.shape[0], np.nan)
+    value = tr[:, 1:lookback + 1].mean(axis=1)
+    decay, gain = 1.0 - 1.0/lookback, 1.0/lookback
+    for i in range(lookback + 1, tr.shape[1]):
+        value = decay*value + gain*tr[:, i]
+    return value
+
+
+def intraday_atr(daily_atr, prev_close, high, low, lookback=14):
+    """
+        ATR as if the session closed now: one more Wilder step with the
+        true range of today's bar so far.
+    """
+    tr = np.maximum(high, prev_close) - np.minimum(low, prev_close)
+    return (1.0 - 1.0/lookback)*daily_atr + tr/lookback
+
+
+class DailyFactors:
+    """
+        Per-session cache of daily ATR for a universe. `compute` is meant
+        for before_trading_start; `atr` and `intraday` are then cheap
+        lookups during the session.
+    """
+    def __init__(self, lookback=14, window=20):
+        self.lookback = lookback
+        self.window = window
+        self.assets = []
+        self.values = np.empty(0)
+        self.prev_close = np.empty(0)
+
+    def compute(self, data, assets):
+        self.assets = list(assets)
+        panel = data.history(self.assets, ['high', 'low', 'close'],
+                             self.window, '1d')
+        frames = [panel.xs(asset) for asset in self.assets]
+        high, low, close = (np.array([np.asarray(px[f], dtype=float)
+                                      for px in frames])
+                            for f in ('high', 'low', 'close'))
+        self.values = batch_atr(high, low, close, self.lookback)
+        self.prev_close = close[:, -1]
+        return self.as_dict()
+
+    def as_dict(self):
+        return dict((asset, value if np.isfinite(value) else None)
+                    for asset, value in zip(self.assets, self.values))
+
+    def intraday(self, data):
+        """Intraday-adjusted ATR from today's high and low so far."""
+        panel = data.history(self.assets, ['high', 'low'], 1, '1d')
+        high = np.array([panel.xs(a)['high'].values[-1] for a in self.assets])
+        low = np.array([panel.xs(a)['low'].values[-1] for a in self.assets])
+        values = intraday_atr(self.values, self.prev_close, high, low,
+                              self.lookback)
+        return dict((asset, value if np.isfinite(value) else None)
+                    for asset, value in zip(self.assets, values))
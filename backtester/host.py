@@ -0,0 +1,144 @@
+"""
+    Several strategies on one bar feed: python -m backtester.host
+    Source_Code_*.py --data DIR.
+
+    Every strategy file is loaded as its own module with its own Engine
+    (portfolio, orders, schedules), and all engines share one set of bars.
+    The host replays the sessions once and at every bar hands control to
+    each engine in turn, registering it with blueshift.api for the
+    duration of its callbacks. Indicator calls with identical inputs are
+    computed once for all of them through a shared IndicatorCache.
+"""
+import argparse
+import os
+import time
+import traceback
+
+import pandas as pd
+
+import blueshift.api
+from backtester.engine import Engine, summarize
+from backtester.memo import IndicatorCache
+from backtester.store import open_bars
+
+
+class StrategyHost:
+    """
+        Runs `strategies` (paths or modules) side by side over `bars`. A
+        strategy that raises is stopped and reported in `errors`; the
+        others carry on.
+    """
+    def __init__(self, strategies, bars, capital_base=1e6, start=None,
+                 end=None, as_pandas=False, share_indicators=True,
+                 cache_bytes=64 << 20):
+        self.bars = bars
+        self.cache = IndicatorCache(cache_bytes) if share_indicators else None
+        self.engines = {}
+        self.errors = {}
+        for strategy in strategies:
+            engine = Engine(strategy, bars, capital_base, start, end,
+                            as_pandas, indicator_cache=self.cache)
+            name = (os.path.basename(strategy) if isinstance(strategy, str)
+                    else strategy.__name__)
+            if name in self.engines:
+                name = f"{name}#{len(self.engines)}"
+            self.engines[name] = engine
+
+    def _call(self, name, method, *args):
+        engine = self.engines[name]
+        blueshift.api.register_engine(engine)
+        try:
+            method(*args)
+        except Exception:
+            self.errors[name] = traceback.format_exc()
+        finally:
+            blueshift.api.register_engine(None)
+
+    def _running(self):
+        return [n for n in self.engines if n not in self.errors]
+
+    def run(self):
+        """Replay the feed once; return {name: daily perf frame}."""
+        bars = self.bars
+        engines = self.engines
+        for name in self._running():
+            self._call(name, engines[name].begin)
+
+        first = min(e.first_session for e in engines.values())
+        last = max(e.last_session for e in engines.values())
+        for session in range(first, last):
+            # engines started with the same start/end move in lockstep
+            active = [n for n in self._running() if
+                      engines[n].first_session <= session
+                      < engines[n].last_session]
+            for name in active:
+                self._call(name, engines[name].open_session, session)
+
+            for bar in range(bars.session_starts[session],
+                             bars.session_ends[session]):
+                for name in active:
+                    if name not in self.errors:
+                        self._call(name, engines[name].step, bar)
+
+            for name in active:
+                if name not in self.errors:
+                    engines[name].close_session(session)
+
+        for name in self._running():
+            self._call(name, engines[name].finish)
+        results = {}
+        for name, engine in engines.items():
+            perf = engine.performance()
+            if len(perf):
+                results[name] = perf
+        return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m backtester.host')
+    parser.add_argument('strategies', nargs='+',
+                        help='paths to Source_Code_N.py files')
+    parser.add_argument('--data', required=True,
+                        help='columnar store, or directory of <SYMBOL>.csv '
+                             'minute bars')
+    parser.add_argument('--start', default=None)
+    parser.add_argument('--end', default=None)
+    parser.add_argument('--warmup', type=int, default=30)
+    parser.add_argument('--capital', type=float, default=1e6)
+    parser.add_argument('--no-shared-cache', action='store_true',
+                        help='compute every indicator call separately')
+    parser.add_argument('--cache-mb', type=float, default=64,
+                        help='memory cap of the shared indicator cache')
+    parser.add_argument('--output', default=None,
+                        help='write the summary table to this csv')
+    args = parser.parse_args(argv)
+
+    first = None
+    if args.start is not None:
+        first = pd.Timestamp(args.start) - pd.Timedelta(days=args.warmup)
+    bars = open_bars(args.data, start=first, end=args.end)
+    host = StrategyHost(args.strategies, bars, args.capital, args.start,
+                        args.end, share_indicators=not args.no_shared_cache,
+                        cache_bytes=int(args.cache_mb*(1 << 20)))
+    t0 = time.perf_counter()
+    results = host.run()
+    elapsed = time.perf_counter() - t0
+
+    table = pd.DataFrame(dict((name, summarize(perf))
+                              for name, perf in results.items())).T
+    if args.output:
+        table.to_csv(args.output)
+    print(f"{len(host.engines)} strategies over {len(bars)} bars in "
+          f"{elapsed:.1f}s")
+    if host.cache is not None:
+        stats = host.cache.stats
+        print(f"shared indicator cache: {stats['hits']} hits, "
+              f"{stats['misses']} misses, {stats['evictions']} evictions, "
+              f"{stats['uncached']} calls not cached")
+    print(table.to_string())
+    for name, error in host.errors.items():
+        print(f"\n{name} stopped:\n{error}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,268 @@
+"""
+    Multi-parameter indicator kernels for parameter sweeps.
+
+    Each kernel takes one close series and a list of parameter sets and
+    returns (n_params, n_bars) matrices with the full series of every
+    variant, computed in a single pass over the bars instead of one pass
+    per combination. Row i at bar t equals what the per-bar function in
+    blueshift.library.technicals.indicators returns on close[:t + 1] with
+    the i-th parameters; bars before a variant is defined are NaN.
+
+    `KernelTable` puts them behind the signal engine of a sweep: a worker
+    computes the Bollinger and MACD series of every variant of its grid
+    once per security, and each of its runs only looks its own variant up
+    (see backtester.sweep --kernels).
+"""
+import numpy as np
+import pandas as pd
+
+
+def ema_matrix(x, spans, starts=0):
+    """
+        EMA series for every span, row i seeded with the SMA of
+        x[starts[i]:starts[i] + spans[i]] as in `ema_series`. `x` is one
+        series shared by all rows, or a (n_rows, n_bars) array with a
+        series per row. Identical (span, start) rows are computed once.
+    """
+    x = np.asarray(x, dtype=float)
+    spans = np.atleast_1d(np.asarray(spans, dtype=int))
+    starts = np.broadcast_to(np.asarray(starts, dtype=int), spans.shape)
+    n_bars = x.shape[-1]
+    shared = x.ndim == 1
+    if shared:
+        keys, rows = np.unique(np.column_stack([spans, starts]), axis=0,
+                               return_inverse=True)
+        rows = rows.ravel()
+    else:
+        keys, rows = np.column_stack([spans, starts]), np.arange(len(spans))
+
+    alpha = 2.0/(keys[:, 0] + 1)
+    seeds = keys[:, 1] + keys[:, 0] - 1
+    # rows of x feeding each computed row, when every row has its own series
+    series = x if shared else x[rows]
+    seed_at = {}
+    for k, (span, start) in enumerate(keys):
+        if seeds[k] < n_bars:
+            src = series if shared else series[k]
+            seed_at.setdefault(int(seeds[k]), []).append(
+                (k, src[start:start + span].mean()))
+
+    out = np.full((n_bars, len(keys)), np.nan)
+    if seed_at:
+        value = np.full(len(keys), np.nan)
+        columns = series if shared else np.ascontiguousarray(series.T)
+        for t in range(min(seed_at), n_bars):
+            value += alpha*(columns[t] - value)
+            seeded = seed_at.get(t)
+            if seeded:
+                for k, seed in seeded:
+                    value[k] = seed
+            out[t] = value
+    return out.T[rows] if shared else out.T
+
+
+def bollinger_matrix(close, periods, nbdev=2.0):
+    """
+        (upper, mid, lower) matrices, one row per period, population std.
+        Every window sum and sum of squares is a difference of running
+        totals, so all periods share one cumulative sum of the series and
+        one of its squares, and each period costs a few array operations
+        on them. The totals restart every block of at least the longest
+        period, relative to the block's first value, so they stay small
+        and a window spans at most two blocks. A window with a NaN is NaN.
+    """
+    x = np.asarray(close, dtype=float).ravel()
+    periods = np.atleast_1d(np.asarray(periods, dtype=int))
+    n = len(x)
+    mid = np.full((len(periods), n), np.nan)
+    dev = np.full_like(mid, np.nan)
+    if n == 0:
+        return mid, mid, mid
+
+    block = max(256, int(periods.max()))
+    nblocks = -(-n//block)
+    blocks = np.arange(n)//block
+    anchor = x[::block].copy()
+    anchor[np.isnan(anchor)] = 0.0
+    missing = np.isnan(x)
+    d = np.where(missing, 0.0, x - anchor[blocks])
+    # running totals of d, d**2 and NaNs within each block, up to each bar
+    terms = np.zeros((3, nblocks*block))
+    terms[0, :n], terms[1, :n], terms[2, :n] = d, d*d, missing
+    upto = terms.reshape(3, nblocks, block).cumsum(axis=2)
+    block_total = upto[:, :, -1]
+    upto = upto.reshape(3, -1)[:, :n]
+    before = upto - terms[:, :n]
+
+    for i, period in enumerate(periods):
+        if n < period:
+            continue
+        # windows first..last, first = last - period + 1
+        last, first = blocks[period - 1:], blocks[:n - period + 1]
+        split = first != last
+        # the part in the block of `last`, relative to its anchor, and
+        # the part in the block before, if any, relative to its own
+        own = upto[:, period - 1:] - np.where(split, 0.0,
+                                              before[:, :n - period + 1])
+        head = np.where(split, block_total[:, first]
+                        - before[:, :n - period + 1], 0.0)
+        shift = anchor[first] - anchor[last]
+        count = np.where(split, (first + 1)*block
+                         - np.arange(n - period + 1), 0)
+        sum1 = own[0] + head[0] + count*shift
+        sum2 = own[1] + head[1] + 2*shift*head[0] + count*shift*shift
+        mean = sum1/period
+        var = np.maximum(sum2/period - mean*mean, 0.0)
+        defined = own[2] + head[2] == 0
+        mid[i, period - 1:] = np.where(defined, anchor[last] + mean, np.nan)
+        dev[i, period - 1:] = np.where(defined, nbdev*np.sqrt(var), np.nan)
+    return mid + dev, mid, mid - dev
+
+
+def macd_matrix(close, params):
+    """
+        (line, signal, histogram) matrices for a list of (fast, slow,
+        signal) tuples, with the seeding of `macd`. Every distinct EMA is
+        computed once and all of them advance together bar by bar.
+    """
+    x = np.asarray(close, dtype=float).ravel()
+    params = np.atleast_2d(np.asarray(params, dtype=int))
+    fast, slow, signal = params.T
+    n = len(params)
+    # fast and slow EMAs of the same close series in one pass
+    emas = ema_matrix(x, np.r_[fast, slow],
+                      np.r_[np.maximum(slow - fast, 0), np.zeros(n, int)])
+    line = emas[:n] - emas[n:]
+    signal_line = ema_matrix(line, signal, slow - 1)
+    return line, signal_line, line - signal_line
+
+
+class KernelTable:
+    """
+        Bollinger and MACD series of `bars` up to the session `end`,
+        shared by the runs of a sweep worker. The first request for a
+        Bollinger period computes every period in `periods` (and the one
+        asked) for the requested securities, one bollinger_matrix call per
+        security. MACD depends on the bar its EMAs were seeded at, so the
+        first request with a new seed bar computes every (fast, slow,
+        signal) in `macds` of every requested security from that bar on,
+        all in one pass over the bars. `bands` and `macd` return state
+        objects for CrossSectionalSignals.
+    """
+    def __init__(self, bars, periods=(), macds=(), end=None):
+        self.bars = bars
+        self.periods = set(int(p) for p in periods)
+        self.macds = set(tuple(int(v) for v in m) for m in macds)
+        self.stop = len(bars.index)
+        if end is not None:
+            session = int(np.searchsorted(
+                bars.sessions, np.datetime64(pd.Timestamp(end), 'D'),
+                side='right'))
+            self.stop = int(bars.session_ends[session - 1]) if session else 0
+        self._bands = {}
+        self._macd = {}
+
+    def bar_of(self, stamp):
+        return int(np.searchsorted(self.bars.index,
+                                   np.datetime64(stamp, 'ns')))
+
+    def _close(self, sid, seed=0):
+        return np.asarray(self.bars.column(sid, 'close')[seed:self.stop],
+                          dtype=float)
+
+    def band_series(self, sids, period):
+        """
+            (upper, mid, lower) arrays of shape (n_bars, len(sids)), bands
+            2 standard deviations wide.
+        """
+        sids = tuple(sids)
+        if (sids, period) not in self._bands:
+            periods = sorted(self.periods | {period})
+            rows = [bollinger_matrix(self._close(sid), periods)
+                    for sid in sids]
+            for i, p in enumerate(periods):
+                self._bands[sids, p] = tuple(
+                    np.column_stack([row[k][i] for row in rows])
+                    for k in range(3))
+        return self._bands[sids, period]
+
+    def macd_series(self, sids, params, seed):
+        """
+            (line, signal) arrays of shape (n_bars - seed, len(sids)),
+            EMAs seeded at bar `seed`.
+        """
+        sids = tuple(sids)
+        if (sids, params, seed) not in self._macd:
+            triples = sorted(self.macds | {params})
+            # one row per (security, triple), as macd_matrix on each close
+            fast, slow, signal = (np.tile(v, len(sids))
+                                  for v in np.array(triples).T)
+            close = np.repeat([self._close(sid, seed) for sid in sids],
+                              len(triples), axis=0)
+            emas = ema_matrix(np.r_[close, close], np.r_[fast, slow],
+                              np.r_[np.maximum(slow - fast, 0),
+                                    np.zeros(len(fast), int)])
+            line = emas[:len(fast)] - emas[len(fast):]
+            signal_line = ema_matrix(line, signal, slow - 1)
+            shape = (len(sids), len(triples), -1)
+            line, signal_line = line.reshape(shape), signal_line.reshape(shape)
+            for i, triple in enumerate(triples):
+                self._macd[sids, triple, seed] = (line[:, i].T,
+                                                  signal_line[:, i].T)
+        return self._macd[sids, params, seed]
+
+    def bands(self, sids, period):
+        return KernelBands(self, sids, int(period))
+
+    def macd(self, sids, fast, slow, signal):
+        return KernelMACD(self, sids, (int(fast), int(slow), int(signal)))
+
+
+class KernelBands:
+    """StreamingBollinger over a universe, read from a KernelTable."""
+    def __init__(self, table, sids, period):
+        self.table = table
+        self.sids = list(sids)
+        self.period = period
+        self._value = (np.nan, np.nan, np.nan)
+
+    def sync(self, values, stamps):
+        if len(stamps):
+            bands = self.table.band_series(self.sids, self.period)
+            bar = self.table.bar_of(stamps[-1])
+            self._value = tuple(band[bar] for band in bands)
+        return self._value
+
+    def value(self):
+        return self._value
+
+
+class KernelMACD:
+    """
+        StreamingMACD over a universe, read from a KernelTable. Like the
+        streaming object it seeds its EMAs at the first bar of the first
+        window, and again whenever a window does not overlap the last.
+    """
+    def __init__(self, table, sids, params):
+        self.table = table
+        self.sids = list(sids)
+        self.params = params
+        self.last_stamp = None
+        self._seed = None
+        self._value = (np.nan, np.nan, np.nan)
+
+    def sync(self, values, stamps):
+        stamps = np.asarray(stamps, dtype='datetime64[ns]')
+        if not len(stamps):
+            return self._value
+        if self.last_stamp is None or stamps[0] > self.last_stamp:
+            self._seed = self.table.bar_of(stamps[0])
+        self.last_stamp = stamps[-1]
+        line, signal = self.table.macd_series(self.sids, self.params,
+                                              self._seed)
+        k = self.table.bar_of(stamps[-1]) - self._seed
+        self._value = (line[k], signal[k], line[k] - signal[k])
+        return self._value
+
+    def value(self):
+        return self._value
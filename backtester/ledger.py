@@ -0,0 +1,106 @@
+"""
+    Position ledger with persistent entry and watermark state.
+
+    One row per security of the universe, as parallel arrays: quantity,
+    side (+1, -1 or 0), entry price, entry time and the highest and
+    lowest price seen since entry. A fill touches one row in O(1): an
+    entry or a side change resets the entry price, time and watermarks,
+    adding to a position averages the entry price, and reducing it keeps
+    the entry. Nothing is reset by re-sending the same target, so a stop
+    that trails the watermark really trails.
+
+    Fills come in through `fill` (quantity delta and price), or through
+    `sync` from the platform's `context.portfolio.positions`, which only
+    does work for the positions whose quantity changed. `mark` advances
+    the watermarks with the prices of some rows.
+"""
+import numpy as np
+
+
+class PositionLedger:
+    """Per-security position state of `assets`, in `assets` order."""
+    __slots__ = ('assets', 'rows', 'quantity', 'side', 'entry',
+                 'entry_time', 'high', 'low')
+
+    def __init__(self, assets):
+        self.assets = list(assets)
+        self.rows = dict((asset, i) for i, asset in enumerate(self.assets))
+        n = len(self.assets)
+        self.quantity = np.zeros(n)
+        self.side = np.zeros(n, dtype=np.int8)
+        self.entry = np.full(n, np.nan)
+        self.entry_time = np.full(n, np.datetime64('NaT'),
+                                  dtype='datetime64[ns]')
+        self.high = np.full(n, np.nan)
+        self.low = np.full(n, np.nan)
+
+    def __len__(self):
+        return len(self.assets)
+
+    def _update(self, row, quantity, entry, when):
+        side = int(quantity > 0) - int(quantity < 0)
+        if side == 0:
+            self.entry[row] = self.high[row] = self.low[row] = np.nan
+            self.entry_time[row] = np.datetime64('NaT')
+        elif side != self.side[row]:
+            self.entry[row] = self.high[row] = self.low[row] = entry
+            self.entry_time[row] = np.datetime64(when, 'ns')
+        else:
+            self.entry[row] = entry
+        self.quantity[row] = quantity
+        self.side[row] = side
+
+    def fill(self, asset, quantity, price, when):
+        """Apply a fill of `quantity` (signed) shares at `price`."""
+        row = self.rows[asset]
+        held = self.quantity[row]
+        new = held + quantity
+        entry = self.entry[row]
+        if held == 0 or (new > 0) != (held > 0):
+            entry = price
+        elif abs(new) > abs(held):
+            entry = (entry*held + price*quantity)/new
+        self._update(row, new, entry, when)
+
+    def sync(self, positions, when):
+        """
+            Catch up with a {asset: position} mapping (quantity and
+            cost_basis); positions missing from it are flat. Returns the
+            rows that changed.
+        """
+        changed = []
+        seen = set()
+        rows, held = self.rows, self.quantity
+        for asset, pos in positions.items():
+            row = rows.get(asset)
+            if row is None:
+                continue
+            seen.add(row)
+            if pos.quantity != held[row]:
+                self._update(row, pos.quantity, pos.cost_basis, when)
+                changed.append(row)
+        for row in np.flatnonzero(self.side).tolist():
+            if row not in seen:
+                self._update(row, 0, np.nan, when)
+                changed.append(row)
+        return changed
+
+    def mark(self, rows, prices):
+        """
+            Advance the watermarks of the open positions among `rows` to
+            `prices`. Returns True if any of them moved.
+        """
+        rows = np.asarray(rows)
+        prices = np.asarray(prices, dtype=float)
+        high, low = self.high[rows], self.low[rows]
+        with np.errstate(invalid='ignore'):
+            up = prices > high
+            down = prices < low
+        if not (up.any() or down.any()):
+            return False
+        self.high[rows[up]] = prices[up]
+        self.low[rows[down]] = prices[down]
+        return True
+
+    def open_rows(self):
+        return np.flatnonzero(self.side)
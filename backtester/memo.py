@@ -0,0 +1,168 @@
+"""
+    Memoization of the blueshift.library indicator functions.
+
+    Calls are keyed by the function, its scalar arguments and, for each
+    window argument, (security, field, last bar, window length): two
+    strategies asking for the same Bollinger band on the same window
+    share one computation whichever objects they pass in. A HistoryFrame
+    or HistoryColumn of one security carries its security, field and
+    index. A bare array, such as `px.close.values`, is a view into one of
+    the bar blocks the cache `watch`es, and its offset and shape in that
+    block stand for the same key. Keys cost a few attribute reads whatever
+    the window length. A call with any other argument (a pandas frame, an
+    array the strategy computed) is not cached. `install` reroutes the
+    indicator names a strategy module imported through a cache.
+"""
+import sys
+from collections import OrderedDict
+
+import numpy as np
+
+from blueshift.library.technicals import indicators
+
+from backtester.data import FIELDS
+from backtester.panel import HistoryColumn
+
+INDICATORS = ('bollinger_band', 'macd', 'adx', 'atr', 'ema', 'sma', 'rsi',
+              'obv', 'doji')
+
+UNCACHED = object()
+
+
+def _owner(array):
+    """The array that owns the memory `array` views."""
+    while isinstance(array.base, np.ndarray):
+        array = array.base
+    return array
+
+
+def _address(array):
+    return array.ctypes.data
+
+
+def window_key(value, blocks):
+    """
+        Hashable key of an indicator argument: scalars as is, windows as
+        (security, field, last bar, length), or UNCACHED. `blocks` maps
+        id() of the watched bar blocks to their (block, address).
+    """
+    if value is None or isinstance(value, (bool, int, float, str,
+                                           np.generic)):
+        return value
+    asset = getattr(value, 'asset', None)
+    if asset is not None:
+        # HistoryColumn (by field name) or HistoryFrame (by its columns)
+        index = value.index
+        stamp = index[-1] if len(index) else None
+        return (asset, getattr(value, 'name', None)
+                or tuple(value.columns), stamp, len(index))
+    if isinstance(value, HistoryColumn):
+        value = value.values
+    if isinstance(value, np.ndarray):
+        owner = blocks.get(id(_owner(value)))
+        if owner is None:
+            return UNCACHED
+        return (id(owner[0]), _address(value) - owner[1], value.shape,
+                value.strides)
+    if isinstance(value, tuple):
+        keys = tuple(window_key(v, blocks) for v in value)
+        return UNCACHED if UNCACHED in keys else keys
+    return UNCACHED
+
+
+def _size(value):
+    """Rough memory footprint of a cached key or result, in bytes."""
+    if isinstance(value, np.ndarray):
+        return value.nbytes + 112
+    if isinstance(value, tuple):
+        return sys.getsizeof(value) + sum(_size(v) for v in value)
+    return sys.getsizeof(value)
+
+
+class IndicatorCache:
+    """
+        LRU cache of indicator results keyed by window. Once the entries
+        take more than `max_bytes` (estimated), the least recently used
+        are evicted. `stats` counts hits, misses, evictions and the calls
+        that could not be keyed.
+    """
+    def __init__(self, max_bytes=64 << 20):
+        self.max_bytes = int(max_bytes)
+        self.nbytes = 0
+        self._results = OrderedDict()
+        self._blocks = {}
+        self.stats = dict(hits=0, misses=0, evictions=0, uncached=0)
+
+    def watch(self, bars):
+        """
+            Key the array views of `bars`' minute and daily blocks by
+            their place in them. The cache holds on to the blocks, so an
+            address can not be reused by another window.
+        """
+        for field in FIELDS:
+            for block in (bars.block(field), bars.daily_block(field)):
+                owner = _owner(block)
+                self._blocks[id(owner)] = (owner, _address(owner))
+
+    def __len__(self):
+        return len(self._results)
+
+    def clear(self):
+        self._results.clear()
+        self.nbytes = 0
+
+    def hit_rate(self):
+        calls = self.stats['hits'] + self.stats['misses']
+        return self.stats['hits']/calls if calls else 0.0
+
+    def call(self, func, args, kwargs):
+        blocks = self._blocks
+        key = (func.__name__, tuple(window_key(a, blocks) for a in args),
+               tuple(sorted((k, window_key(v, blocks))
+                            for k, v in kwargs.items())))
+        if UNCACHED in key[1] or any(UNCACHED in kv for kv in key[2]):
+            self.stats['uncached'] += 1
+            return func(*args, **kwargs)
+        results = self._results
+        entry = results.get(key)
+        if entry is not None:
+            results.move_to_end(key)
+            self.stats['hits'] += 1
+            return entry[0]
+
+        self.stats['misses'] += 1
+        result = func(*args, **kwargs)
+        size = _size(key) + _size(result)
+        if size > self.max_bytes:
+            return result
+        results[key] = (result, size)
+        self.nbytes += size
+        while self.nbytes > self.max_bytes:
+            _, (_, evicted) = results.popitem(last=False)
+            self.nbytes -= evicted
+            self.stats['evictions'] += 1
+        return result
+
+    def wrap(self, func):
+        """`func` with its calls going through the cache."""
+        def cached(*args, **kwargs):
+            return self.call(func, args, kwargs)
+        cached.__name__ = func.__name__
+        cached.__doc__ = func.__doc__
+        cached.__wrapped__ = func
+        return cached
+
+
+def install(module, cache, names=INDICATORS):
+    """
+        Point the indicator functions `module` imported from
+        blueshift.library.technicals.indicators at `cache`. Returns the
+        names that were rerouted.
+    """
+    installed = []
+    for name in names:
+        func = getattr(indicators, name)
+        if getattr(module, name, None) is func:
+            setattr(module, name, cache.wrap(func))
+            installed.append(name)
+    return installed
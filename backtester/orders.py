@@ -0,0 +1,104 @@
+"""
+    Order diffing for target-weight strategies.
+
+    A strategy that calls order_target_percent for every security on every
+    tick mostly repeats itself: the book already sits at the target.
+    `OrderManager` collects the tick's targets with `target` (a later
+    target for the same security replaces an earlier one), and `flush`
+    submits, in one pass, only those that differ by more than `tolerance`
+    from the security's current weight in the portfolio,
+    quantity*last_price/portfolio_value. An order that was rejected, or
+    only partly filled, leaves the weight off target, so the target is
+    sent again on the next tick. Exits to zero and side changes are
+    always sent.
+
+    Without a portfolio, the weight last submitted for the security
+    stands in for its current weight.
+"""
+
+
+class OrderManager:
+    """
+        Targets of a tick diffed against the current weights of
+        `portfolio` (context.portfolio), in front of `order_func`
+        (order_target_percent). `submitted` keeps the last weight sent
+        per asset; `stats` counts the targets requested and the orders
+        submitted and skipped.
+    """
+    def __init__(self, order_func, tolerance=0.0, portfolio=None):
+        self.order_func = order_func
+        self.tolerance = float(tolerance)
+        self.portfolio = portfolio
+        self.submitted = {}
+        self._forgotten = set()
+        self._targets = {}
+        self.stats = dict(requested=0, submitted=0, skipped=0)
+
+    def target(self, asset, weight):
+        """Stage `weight` for `asset`; sent by the next `flush` if it moved."""
+        self._targets[asset] = weight
+        self.stats['requested'] += 1
+
+    def weights(self, assets):
+        """
+            {asset: current weight} of `assets`; None for an asset whose
+            weight is unknown or was forgotten.
+        """
+        if self.portfolio is None:
+            return dict((asset, None if asset in self._forgotten
+                         else self.submitted.get(asset)) for asset in assets)
+        positions = self.portfolio.positions
+        value = self.portfolio.portfolio_value
+        weights = {}
+        for asset in assets:
+            pos = positions.get(asset)
+            if asset in self._forgotten:
+                weights[asset] = None
+            elif pos is None or not pos.quantity or not value:
+                weights[asset] = 0.0
+            else:
+                weights[asset] = pos.quantity*pos.last_price/value
+        return weights
+
+    def changed(self, weight, current):
+        if current is None:
+            return weight != 0
+        if weight == 0 or current == 0 or (weight > 0) != (current > 0):
+            return weight != current
+        return abs(weight - current) > self.tolerance
+
+    def orders(self):
+        """The (asset, weight) list the next flush would submit."""
+        current = self.weights(self._targets)
+        return [(asset, weight) for asset, weight in self._targets.items()
+                if self.changed(weight, current[asset])]
+
+    def flush(self):
+        """
+            Submit the tick's changed targets as one list and return it as
+            (asset, weight, order_id) tuples.
+        """
+        batch = self.orders()
+        self.stats['skipped'] += len(self._targets) - len(batch)
+        self._targets = {}
+        sent = []
+        for asset, weight in batch:
+            sent.append((asset, weight, self.order_func(asset, weight)))
+            self.submitted[asset] = weight
+            self._forgotten.discard(asset)
+        self.stats['submitted'] += len(sent)
+        return sent
+
+    def forget(self, asset=None):
+        """
+            Forget the current weight of `asset` (of every asset by
+            default), so its next target is sent whatever it is.
+        """
+        if asset is None:
+            self._forgotten.update(self.submitted)
+            if self.portfolio is not None:
+                self._forgotten.update(self.portfolio.positions)
+            self.submitted.clear()
+        else:
+            self._forgotten.add(asset)
+            self.submitted.pop(asset, None)
@@ -0,0 +1,136 @@
+"""
+    Lightweight, pandas-compatible containers for history windows.
+
+    They wrap NumPy views of the bar store (one copy per field for a
+    universe that is not a run of consecutive securities) instead of
+    copying into new DataFrames, and support the subset of the pandas
+    API the strategies use: `panel.xs(asset)`, `frame.close` /
+    `frame['close']`, `.values`, `len()` and `to_pandas()` for anything
+    else.
+"""
+import numpy as np
+import pandas as pd
+
+
+class HistoryColumn:
+    """
+        One field of one asset; `.values` is the underlying array view.
+        `asset` is None for a column of a frame of assets.
+    """
+    __slots__ = ('values', 'index', 'name', 'asset')
+
+    def __init__(self, values, index, name=None, asset=None):
+        self.values = values
+        self.index = index
+        self.name = name
+        self.asset = asset
+
+    def __array__(self, dtype=None, copy=None):
+        if dtype is None:
+            return self.values
+        return self.values.astype(dtype, copy=False)
+
+    def __len__(self):
+        return len(self.values)
+
+    def __getitem__(self, key):
+        return self.values[key]
+
+    @property
+    def iloc(self):
+        return self.values
+
+    def to_numpy(self):
+        return self.values
+
+    def to_pandas(self):
+        return pd.Series(self.values, index=pd.Index(self.index),
+                         name=self.name)
+
+
+class HistoryFrame:
+    """
+        Several columns sharing one index: the fields of `asset`, or the
+        assets of a field (`asset` None).
+    """
+    __slots__ = ('_columns', 'index', 'asset')
+
+    def __init__(self, columns, index, asset=None):
+        self._columns = columns
+        self.index = index
+        self.asset = asset
+
+    def __getitem__(self, key):
+        return HistoryColumn(self._columns[key], self.index, key, self.asset)
+
+    def __getattr__(self, name):
+        try:
+            return HistoryColumn(self._columns[name], self.index, name,
+                                 self.asset)
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __contains__(self, key):
+        return key in self._columns
+
+    def __len__(self):
+        return len(self.index)
+
+    @property
+    def columns(self):
+        return list(self._columns)
+
+    @property
+    def values(self):
+        return np.column_stack(list(self._columns.values()))
+
+    def to_pandas(self):
+        return pd.DataFrame(self._columns, index=pd.Index(self.index))
+
+
+class HistoryPanel:
+    """
+        Multi-asset, multi-field history as one (securities x bars) block
+        per field; `xs(asset)` gives a HistoryFrame of views into them.
+        `rows` places the assets in the blocks when they are not its rows
+        in order, as for a view over the span of a shuffled universe.
+    """
+    __slots__ = ('_blocks', '_rows', '_order', 'index', 'fields')
+
+    def __init__(self, blocks, assets, index, rows=None):
+        self._blocks = blocks
+        if rows is None:
+            rows = range(len(assets))
+        self._order = None if isinstance(rows, range) else np.asarray(rows)
+        self._rows = dict(zip(assets, rows))
+        self.index = index
+        self.fields = list(blocks)
+
+    def xs(self, asset):
+        row = self._rows[asset]
+        return HistoryFrame(dict((f, block[row]) for f, block
+                                 in self._blocks.items()), self.index, asset)
+
+    def __len__(self):
+        return len(self._rows)*len(self.index)
+
+    @property
+    def assets(self):
+        return list(self._rows)
+
+    def to_array(self, assets=None, fields=None):
+        """(n_assets, n_bars, n_fields) float array, in one copy."""
+        fields = self.fields if fields is None else list(fields)
+        blocks = [self._blocks[f] for f in fields]
+        rows = self._order
+        if assets is not None and list(assets) != self.assets:
+            rows = [self._rows[asset] for asset in assets]
+        if rows is not None:
+            blocks = [block[rows] for block in blocks]
+        return np.stack(blocks, axis=-1)
+
+    def to_pandas(self):
+        rows = slice(None) if self._order is None else self._order
+        data = dict((f, self._blocks[f][rows].ravel()) for f in self.fields)
+        return pd.DataFrame(data, index=pd.MultiIndex.from_product(
+            [self.assets, pd.Index(self.index)]))
@@ -0,0 +1,61 @@
+"""
+    Vectorized candlestick classification.
+
+    `classify_patterns` applies the rules of identify_patterns to whole
+    arrays of bars at once, e.g. the last bar of every security or a full
+    (securities x bars) history, and returns int8 pattern codes instead
+    of strings.
+"""
+import numpy as np
+
+NONE = 0
+DOJI = 1
+GRAVESTONE_DOJI = 2
+DRAGONFLY_DOJI = 3
+HAMMER = 4
+INVERTED_HAMMER = 5
+
+PATTERN_NAMES = {
+    NONE: None,
+    DOJI: "Doji",
+    GRAVESTONE_DOJI: "Gravestone Doji",
+    DRAGONFLY_DOJI: "Dragonfly Doji",
+    HAMMER: "Hammer",
+    INVERTED_HAMMER: "Inverted Hammer",
+}
+
+
+def classify_patterns(open_, high, low, close, body_ratio=0.1):
+    """
+        Pattern code for every bar of same-shaped OHLC arrays. A body under
+        `body_ratio` of the range is a doji (gravestone or dragonfly when
+        one shadow is more than twice the other); otherwise an up bar with
+        a long lower shadow is a hammer and a down bar with a long upper
+        shadow an inverted hammer. Plain dojis, which identify_patterns
+        reports as None, get their own code.
+    """
+    open_, high, low, close = np.broadcast_arrays(
+        *(np.asarray(a, dtype=float) for a in (open_, high, low, close)))
+    upper = high - close
+    lower = close - low
+    narrow = np.abs(close - open_) < (high - low)*body_ratio
+
+    conditions = [
+        narrow & (upper > 2*lower),
+        narrow & (lower > 2*upper),
+        narrow,
+        (close > open_) & (lower > 2*upper),
+        (close < open_) & (upper > 2*lower),
+    ]
+    choices = [GRAVESTONE_DOJI, DRAGONFLY_DOJI, DOJI, HAMMER, INVERTED_HAMMER]
+    return np.select(conditions, choices, NONE).astype(np.int8)
+
+
+def label_bars(bars, start=0, end=None):
+    """(n_assets, n_bars) pattern codes for a BarSource between two bars."""
+    end = len(bars) if end is None else end
+    columns = dict((f, np.array([bars.column(sid, f)[start:end]
+                                 for sid in range(len(bars.symbols))]))
+                   for f in ('open', 'high', 'low', 'close'))
+    return classify_patterns(columns['open'], columns['high'],
+                             columns['low'], columns['close'])
@@ -0,0 +1,169 @@
+"""
+    Lazy, cost-ordered evaluation of per-security filters and indicators.
+
+    A pipeline is declared as stages over the rows (securities) of a
+    history window. Indicators produce a value per row, filters drop rows,
+    and each stage states its relative cost and the stages it reads. At
+    every step the filter that is cheapest to decide, counting the
+    indicators it would have to compute first, runs next; indicators only
+    run for the rows still alive when something needs them, and not at
+    all once every row has been rejected. `stats` counts the rows each
+    filter saw and rejected and the rows each indicator was computed for.
+"""
+import numpy as np
+
+
+class Stage:
+    """
+        `func(rows, *values)` gets a Rows view of the surviving securities
+        and the arrays of the stages in `requires`, aligned with them.
+    """
+    __slots__ = ('name', 'func', 'cost', 'requires')
+
+    def __init__(self, name, func, cost=1.0, requires=()):
+        self.name = name
+        self.func = func
+        self.cost = float(cost)
+        self.requires = tuple(requires)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.name!r}, cost={self.cost:g})"
+
+
+class Indicator(Stage):
+    """Computes one array (or scalar per row) for the rows it is given."""
+
+
+class Filter(Stage):
+    """Returns a boolean mask; rows where it is False get signal 0."""
+
+
+class Rows:
+    """The surviving rows of a window; `window` is sliced on first use."""
+    __slots__ = ('index', '_source', '_window')
+
+    def __init__(self, source, index):
+        self._source = source
+        self.index = index
+        self._window = None
+
+    def __len__(self):
+        return len(self.index)
+
+    @property
+    def window(self):
+        if self._window is None:
+            if len(self.index) == self._source.shape[0]:
+                self._window = self._source
+            else:
+                self._window = self._source[self.index]
+        return self._window
+
+
+class Pipeline:
+    """
+        Filters and indicators feeding a final `rule(rows, *values)` that
+        returns the signal of every row that passed all filters.
+    """
+    def __init__(self, stages, rule, requires=()):
+        self.indicators = dict((s.name, s) for s in stages
+                               if isinstance(s, Indicator))
+        self.filters = [s for s in stages if isinstance(s, Filter)]
+        self.rule = rule
+        self.requires = tuple(requires)
+        names = set(self.indicators)
+        if len(names) + len(self.filters) != len(stages) or \
+                names & set(s.name for s in self.filters):
+            raise ValueError('stage names must be unique')
+        for stage in list(self.filters) + list(self.indicators.values()):
+            missing = set(stage.requires) - names
+            if missing:
+                raise ValueError(f"{stage.name} requires unknown stages "
+                                 f"{sorted(missing)}")
+        self.values = {}
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.stats = dict(calls=0)
+        for stage in self.filters:
+            self.stats[stage.name] = dict(evaluated=0, rejected=0)
+        for name in self.indicators:
+            self.stats[name] = dict(computed=0)
+
+    def _missing_cost(self, names, values, seen=None):
+        seen = set() if seen is None else seen
+        cost = 0.0
+        for name in names:
+            if name in values or name in seen:
+                continue
+            seen.add(name)
+            stage = self.indicators[name]
+            cost += stage.cost + self._missing_cost(stage.requires, values,
+                                                    seen)
+        return cost
+
+    def _resolve(self, names, rows, values):
+        for name in names:
+            if name in values:
+                continue
+            stage = self.indicators[name]
+            self._resolve(stage.requires, rows, values)
+            result = stage.func(rows, *(values[r] for r in stage.requires))
+            values[name] = np.broadcast_to(np.asarray(result),
+                                           (len(rows),)).copy()
+            self.stats[name]['computed'] += len(rows)
+
+    def run(self, window, rows=None):
+        """
+            int8 signal per row of `window`, or of the `rows` (a boolean
+            mask or indices) only, the others getting 0. The indicator
+            values computed on the way are left in `values` as full-length
+            arrays, NaN for rows they were not computed for.
+        """
+        self.stats['calls'] += 1
+        n = len(window)
+        if rows is None:
+            index = np.arange(n)
+        else:
+            index = np.asarray(rows)
+            if index.dtype == bool:
+                index = np.flatnonzero(index)
+        rows = Rows(window, index)
+        values = {}
+        self.values = dict((name, np.full(n, np.nan))
+                           for name in self.indicators)
+        pending = list(self.filters)
+        while pending and len(rows):
+            stage = min(pending, key=lambda s: s.cost + self._missing_cost(
+                s.requires, values))
+            pending.remove(stage)
+            self._resolve(stage.requires, rows, values)
+            keep = np.asarray(stage.func(rows, *(values[r] for r
+                                                 in stage.requires)),
+                              dtype=bool)
+            keep = np.broadcast_to(keep, (len(rows),))
+            self.stats[stage.name]['evaluated'] += len(rows)
+            self.stats[stage.name]['rejected'] += len(rows) - int(keep.sum())
+            if not keep.all():
+                self._scatter(rows.index, values)
+                rows = Rows(window, rows.index[keep])
+                values = dict((k, v[keep]) for k, v in values.items())
+
+        signals = np.zeros(n, dtype=np.int8)
+        if len(rows):
+            self._resolve(self.requires, rows, values)
+            signals[rows.index] = self.rule(rows, *(values[r] for r
+                                                    in self.requires))
+        self._scatter(rows.index, values)
+        return signals
+
+    def _scatter(self, index, values):
+        # keep the values of rows about to be dropped, for inspection
+        for name, value in values.items():
+            self.values[name][index] = value
+
+    def rejection_rates(self):
+        """Share of the rows it evaluated that each filter rejected."""
+        return dict((f.name, self.stats[f.name]['rejected']
+                     / max(self.stats[f.name]['evaluated'], 1))
+                    for f in self.filters)
@@ -0,0 +1,64 @@
+"""
+    Fixed-capacity ring buffer whose most recent values are always
+    available as one contiguous NumPy view.
+"""
+import numpy as np
+
+
+class RingBuffer:
+    """
+        Float ring buffer of `capacity` values. Every value is written twice,
+        at `i` and `i + capacity`, so the last n values are always the
+        contiguous slice ending at `pos + capacity` and `view` never copies.
+        A value may be an array of `shape`, e.g. one bar of a universe.
+    """
+    __slots__ = ('capacity', 'count', '_pos', '_data')
+
+    def __init__(self, capacity, shape=()):
+        if capacity < 1:
+            raise ValueError('ring buffer capacity must be positive')
+        self.capacity = int(capacity)
+        self.count = 0
+        self._pos = 0
+        self._data = np.full((2*self.capacity,) + tuple(shape), np.nan)
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def append(self, value):
+        pos = self._pos
+        self._data[pos] = self._data[pos + self.capacity] = value
+        self._pos = (pos + 1) % self.capacity
+        self.count += 1
+
+    def extend(self, values):
+        values = np.asarray(values, dtype=float)
+        n = len(values)
+        if n == 0:
+            return
+        cap = self.capacity
+        if n > cap:
+            values = values[-cap:]
+            self._pos = (self._pos + n - cap) % cap
+        m = len(values)
+        idx = (self._pos + np.arange(m)) % cap
+        self._data[idx] = values
+        self._data[idx + cap] = values
+        self._pos = (self._pos + m) % cap
+        self.count += n
+
+    def reset(self, values=()):
+        self.count = 0
+        self._pos = 0
+        self._data[:] = np.nan
+        self.extend(values)
+
+    def view(self, n=None):
+        """The last `n` values (all held values by default), oldest first."""
+        held = len(self)
+        n = held if n is None else min(n, held)
+        end = self._pos + self.capacity
+        return self._data[end - n:end]
+
+    def last(self):
+        return self._data[self._pos + self.capacity - 1]
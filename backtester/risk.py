@@ -0,0 +1,159 @@
+"""
+    Stop-loss and take-profit checks for a whole book at once.
+
+    The per-security loop of the strategies (a data.current call, then
+    scalar stop and target levels, for every security on every tick) is
+    replaced by arrays aligned with the universe: the positions of a
+    `PositionLedger` (backtester.ledger) and the ATR per security, the
+    multipliers as scalars. One bulk data.current call gives every price,
+    and one comparison per level every exit. The levels are those of the
+    strategies, with the stop trailing the watermark instead of the entry
+    and mirrored for short positions:
+
+        long:   stop = max(high*(1 - atr*stop_mult), high - atr*stop_mult)
+                take = entry + atr*take_mult
+        short:  stop = min(low*(1 + atr*stop_mult), low + atr*stop_mult)
+                take = entry - atr*take_mult
+
+    A flat security, or one with a missing or zero ATR, never triggers.
+    The stop wins when both levels are crossed. A triggered security
+    stays disarmed until the ledger sees its position change.
+
+    The levels only change with a fill, a new watermark or a new ATR, so
+    they are computed then and kept. For checks on every bar, `rank`
+    orders the book by relative distance to the nearer trigger, and
+    `poll` then prices only the prefix of that order within `band` of a
+    trigger, with a full check and re-rank every `refresh` polls. A
+    coarse schedule can then keep the signal work while stops are
+    watched every minute. Watermarks advance with the prices the checks
+    read.
+"""
+import numpy as np
+
+from backtester.ledger import PositionLedger
+
+
+class RiskMonitor:
+    """
+        Stop and take-profit levels of the positions of `assets` (or of
+        an existing `ledger`), in `assets` order.
+    """
+    def __init__(self, assets, stop_multiplier, take_multiplier, ledger=None):
+        self.ledger = ledger if ledger is not None else PositionLedger(assets)
+        self.assets = self.ledger.assets
+        self.stop_multiplier = stop_multiplier
+        self.take_multiplier = take_multiplier
+        n = len(self.assets)
+        self.atr = np.full(n, np.nan)
+        self.stop = np.full(n, np.nan)
+        self.take = np.full(n, np.nan)
+        self._exiting = np.zeros(n, dtype=bool)
+        # rows by distance to their nearer trigger, as of the last rank
+        self.order = np.arange(n)
+        self.distance = np.zeros(n)
+        self.age = 0
+
+    def set_atr(self, values):
+        """ATR per asset, from an array or a {asset: value or None} dict."""
+        if isinstance(values, dict):
+            values = [values.get(asset) for asset in self.assets]
+        self.atr = np.array([np.nan if v is None else v for v in values],
+                            dtype=float)
+        self._arm()
+
+    def sync(self, positions, when):
+        """Update the ledger from the portfolio's positions."""
+        changed = self.ledger.sync(positions, when)
+        if changed:
+            self._exiting[changed] = False
+            self._arm()
+        return changed
+
+    def prices(self, data, field='close'):
+        """Current prices of every asset from one data.current call."""
+        prices = data.current(self.assets, field)
+        return np.asarray(getattr(prices, 'values', prices), dtype=float)
+
+    def _arm(self):
+        ledger = self.ledger
+        side = ledger.side
+        atr = np.where((self.atr > 0) & (side != 0) & ~self._exiting,
+                       self.atr, np.nan)
+        risk = atr*self.stop_multiplier
+        self.stop = np.where(side > 0,
+                             np.maximum(ledger.high*(1 - risk),
+                                        ledger.high - risk),
+                             np.minimum(ledger.low*(1 + risk),
+                                        ledger.low + risk))
+        self.take = ledger.entry + side*atr*self.take_multiplier
+
+    def levels(self):
+        """(stop, take) price arrays; NaN where nothing is armed."""
+        return self.stop, self.take
+
+    def check(self, prices, rows=None):
+        """
+            (stopped, taken) boolean arrays for the current `prices`, of
+            every asset or of `rows` only.
+        """
+        stop, take, side = self.stop, self.take, self.ledger.side
+        if rows is not None:
+            stop, take, side = stop[rows], take[rows], side[rows]
+        with np.errstate(invalid='ignore'):
+            stopped = side*(prices - stop) <= 0
+            taken = ~stopped & (side*(take - prices) <= 0)
+        return stopped, taken
+
+    def exit(self, mask):
+        """Disarm the assets in `mask` until their position changes."""
+        self._exiting[mask] = True
+        self.stop[mask] = np.nan
+        self.take[mask] = np.nan
+
+    def mark(self, prices, rows=None):
+        """Advance the watermarks with `prices` and re-arm if they moved."""
+        if rows is None:
+            rows = np.arange(len(self.assets))
+        if self.ledger.mark(rows, prices):
+            self._arm()
+
+    def rank(self, prices):
+        """Order the book by relative distance of `prices` to a trigger."""
+        side = self.ledger.side
+        with np.errstate(invalid='ignore', divide='ignore'):
+            distance = np.fmin(side*(prices - self.stop),
+                               side*(self.take - prices))/prices
+        distance[np.isnan(distance)] = np.inf
+        self.order = np.argsort(distance, kind='stable')
+        self.distance = distance[self.order]
+        self.age = 0
+
+    def near(self, band):
+        """Rows within `band` (relative) of a trigger at the last rank."""
+        return self.order[:np.searchsorted(self.distance, band, 'right')]
+
+    def poll(self, data, band=0.01, refresh=5, field='close'):
+        """
+            Per-bar check: the rows near a trigger, or the whole book
+            (re-ranked) once every `refresh` polls. Triggered rows are
+            disarmed and returned as (stopped, taken) row arrays.
+        """
+        self.age += 1
+        full = self.age >= refresh
+        if full:
+            prices = self.prices(data, field)
+            rows = np.arange(len(self.assets))
+        else:
+            rows = self.near(band)
+            if not len(rows):
+                return rows, rows
+            prices = np.array([data.current(self.assets[i], field)
+                               for i in rows], dtype=float)
+        self.mark(prices, rows)
+        stopped, taken = self.check(prices, rows)
+        stopped, taken = rows[stopped], rows[taken]
+        self.exit(stopped)
+        self.exit(taken)
+        if full:
+            self.rank(prices)
+        return stopped, taken
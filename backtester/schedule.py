@@ -0,0 +1,100 @@
+"""
+    Date and time rules for schedule_function, evaluated against the
+    sessions and minute offsets of the local bar data.
+"""
+import numpy as np
+
+
+class DateRule:
+    """Selects the sessions on which a scheduled function may fire."""
+    def __init__(self, kind, days_offset=0):
+        self.kind = kind
+        self.days_offset = int(days_offset)
+
+    def mask(self, sessions):
+        """
+            Boolean array over `sessions` (datetime64[D]) marking the
+            active days.
+        """
+        n = len(sessions)
+        if self.kind == 'every_day':
+            return np.ones(n, dtype=bool)
+
+        if self.kind in ('week_start', 'week_end'):
+            # numpy weeks start on Thursday (1970-01-01), shift to Monday
+            period = (sessions.astype('int64') + 3) // 7
+        else:
+            period = sessions.astype('datetime64[M]').astype('int64')
+
+        mask = np.zeros(n, dtype=bool)
+        starts = np.flatnonzero(np.r_[True, period[1:] != period[:-1]])
+        ends = np.r_[starts[1:], n]
+        for start, end in zip(starts, ends):
+            if self.kind in ('week_start', 'month_start'):
+                idx = start + self.days_offset
+            else:
+                idx = end - 1 - self.days_offset
+            if start <= idx < end:
+                mask[idx] = True
+        return mask
+
+
+class TimeRule:
+    """Selects the minutes within a session on which a function fires."""
+    def __init__(self, kind, minutes=0):
+        self.kind = kind
+        self.minutes = int(minutes)
+
+    def matches(self, minute, session_length):
+        """`minute` is the zero-based bar offset from the session open."""
+        if self.kind == 'every_nth_minute':
+            return minute % self.minutes == 0
+        if self.kind == 'market_open':
+            return minute == min(self.minutes, session_length - 1)
+        # market_close: the bar `minutes` before the close, at least the
+        # last bar
+        return minute == max(session_length - max(self.minutes, 1), 0)
+
+
+class date_rules:
+    """Factory for date rules, mirrors blueshift.api.date_rules."""
+    @staticmethod
+    def every_day():
+        return DateRule('every_day')
+
+    @staticmethod
+    def week_start(days_offset=0):
+        return DateRule('week_start', days_offset)
+
+    @staticmethod
+    def week_end(days_offset=0):
+        return DateRule('week_end', days_offset)
+
+    @staticmethod
+    def month_start(days_offset=0):
+        return DateRule('month_start', days_offset)
+
+    @staticmethod
+    def month_end(days_offset=0):
+        return DateRule('month_end', days_offset)
+
+
+class time_rules:
+    """Factory for time rules, mirrors blueshift.api.time_rules."""
+    @staticmethod
+    def market_open(hours=0, minutes=0):
+        return TimeRule('market_open', 60*hours + minutes)
+
+    @staticmethod
+    def market_close(hours=0, minutes=0):
+        return TimeRule('market_close', 60*hours + minutes)
+
+    @staticmethod
+    def every_nth_minute(minutes=1):
+        if int(minutes) < 1:
+            raise ValueError('every_nth_minute needs a positive interval')
+        return TimeRule('every_nth_minute', minutes)
+
+    @staticmethod
+    def every_nth_hour(hours=1):
+        return time_rules.every_nth_minute(60*hours)
@@ -0,0 +1,225 @@
+"""
+    Cross-sectional signals of a large universe, sharded across processes.
+
+    `ShardedSignals` splits the universe into contiguous shards of
+    securities, one worker process each. A worker keeps the indicator
+    state of its shard (a CrossSectionalSignals) for the whole run and
+    reads its own history windows, one slice per field holding only the
+    bars the state has not seen: from a columnar store it maps the same
+    read-only files as the engine, and an in-memory bar source is
+    inherited by the forked worker. On every tick the coordinator sends
+    each worker only the current bar number and window length, and gets
+    back the int8 signal vector of its shard; no bars cross a process
+    boundary. The workers run the tick in parallel, so the signal pass
+    scales with cores while generate_target_position and rebalance stay
+    in the strategy, on the concatenated vector.
+
+    Only minute history ('1m') is served, as the signal pipeline needs.
+
+    Workers cannot be started from a daemonic process, such as a sweep or
+    walk-forward worker: `can_shard` tells whether this process can, and
+    `update` raises a RuntimeError saying so when it cannot.
+
+    Sharding pays for its pipes only on a large universe with spare
+    cores. `python -m backtester.shard` times the signal pass per tick on
+    a synthetic universe, in process and over N shards.
+"""
+import argparse
+import multiprocessing
+import time
+import traceback
+
+import numpy as np
+import pandas as pd
+
+from backtester.data import FIELDS, Asset, BarData, MinuteBars
+from backtester.signals import CrossSectionalSignals
+
+
+def _span(sids):
+    """`sids` as a slice when they are consecutive, else as an array."""
+    sids = np.asarray(sids, dtype=int)
+    if len(sids) and (np.diff(sids) == 1).all():
+        return slice(int(sids[0]), int(sids[-1]) + 1)
+    return sids
+
+
+def _window(bars, sids, bar, nbars):
+    """(securities x bars x FIELDS) window and its stamps."""
+    stamps = bars.timestamps(bar, nbars, '1m')
+    window = np.stack([bars.windows(sids, field, bar, nbars)
+                       for field in FIELDS], axis=-1)
+    return window, stamps
+
+
+def _serve(conn, source, sids, params, adx_period, adx_threshold):
+    """
+        Worker loop: (bar, nbars, skip_adx, rows) in, signals of `sids`
+        out, until None.
+    """
+    if isinstance(source, str):
+        from backtester.store import ColumnarStore
+        source = ColumnarStore(source)
+    engine = CrossSectionalSignals(params, adx_period, adx_threshold)
+    sids = _span(sids)
+    while True:
+        task = conn.recv()
+        if task is None:
+            break
+        bar, nbars, skip_adx, rows = task
+        try:
+            # only the bars the shard's state has not seen yet
+            nbars = engine.window_length(nbars, bar, source.index)
+            window, stamps = _window(source, sids, bar, nbars)
+            conn.send(engine.update(window, stamps, skip_adx, rows))
+        except Exception:
+            conn.send(traceback.format_exc())
+    conn.close()
+
+
+def can_shard():
+    """True if this process may start the shard workers."""
+    return not multiprocessing.current_process().daemon
+
+
+class ShardedSignals:
+    """
+        CrossSectionalSignals of `assets` split over `shards` worker
+        processes, started by the first `update`. Call `close` to stop
+        them; they are daemons and also end with the run.
+    """
+    def __init__(self, params, assets, shards, adx_period=14,
+                 adx_threshold=15):
+        self.params = params
+        self.assets = list(assets)
+        self.shards = max(1, min(int(shards), len(self.assets)))
+        self.adx_period = adx_period
+        self.adx_threshold = adx_threshold
+        self._workers = []
+
+    def _start(self, data):
+        if not can_shard():
+            raise RuntimeError(
+                "ShardedSignals cannot start workers from a daemonic process "
+                "(a sweep or walk-forward worker); use in-process signals")
+        bars = data.source
+        source = getattr(bars, 'path', None) or bars
+        sids = np.array([asset.sid for asset in self.assets])
+        ctx = multiprocessing.get_context()
+        for part in np.array_split(sids, self.shards):
+            parent, child = ctx.Pipe()
+            proc = ctx.Process(target=_serve, daemon=True, args=(
+                child, source, part.tolist(), dict(self.params),
+                self.adx_period, self.adx_threshold))
+            proc.start()
+            child.close()
+            self._workers.append((proc, parent))
+
+    def update(self, data, nbars, skip_adx=False, rows=None):
+        """
+            Signals of the whole universe as of `data`'s current bar; see
+            CrossSectionalSignals.update for `skip_adx` and `rows` (here a
+            boolean mask over `assets`).
+        """
+        if not self._workers:
+            self._start(data)
+        parts = [None]*len(self._workers)
+        if rows is not None:
+            parts = np.array_split(np.asarray(rows, dtype=bool),
+                                   len(self._workers))
+        for (_, conn), part in zip(self._workers, parts):
+            conn.send((data.bar, int(nbars), skip_adx, part))
+        parts = [conn.recv() for _, conn in self._workers]
+        for part in parts:
+            if isinstance(part, str):
+                raise RuntimeError(f"signal shard failed:\n{part}")
+        return np.concatenate(parts)
+
+    def close(self):
+        for proc, conn in self._workers:
+            try:
+                conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+            conn.close()
+        for proc, _ in self._workers:
+            proc.join(timeout=5)
+            if proc.is_alive():
+                proc.terminate()
+        self._workers = []
+
+
+def _synthetic_bars(names, nbars, seed=0):
+    rng = np.random.default_rng(seed)
+    index = (np.datetime64('2023-01-02T09:15') +
+             np.arange(nbars).astype('timedelta64[m]'))
+    close = 100*np.exp(np.cumsum(rng.normal(0, 1e-3, (names, nbars)), axis=1))
+    spread = np.abs(rng.normal(0, 5e-4, (names, nbars)))*close
+    arrays = dict(open=close, high=close + spread, low=close - spread,
+                  close=close, volume=np.full((names, nbars), 1e4))
+    return MinuteBars([f"S{i}" for i in range(names)], index, arrays)
+
+
+def measure(names, shards, params, ticks=200, nbars=None):
+    """
+        Seconds per tick of the signal pass over `names` synthetic
+        securities: window gather plus update, in process and with each
+        shard count in `shards`. Returns {0 or shards: seconds}.
+    """
+    lookback = params['indicator_lookback']
+    bars = _synthetic_bars(names, nbars or lookback + ticks + 1)
+    assets = [Asset(symbol, sid) for sid, symbol in enumerate(bars.symbols)]
+    sids = slice(0, names)
+    ticks = range(len(bars) - ticks, len(bars))
+    timings = {}
+
+    # as Source_Code_18 runs it: the window the state still needs
+    engine = CrossSectionalSignals(params, assets=assets)
+    t0 = time.perf_counter()
+    for bar in ticks:
+        nbars = engine.window_length(lookback, bar, bars.index)
+        engine.update(*_window(bars, sids, bar, nbars))
+    timings[0] = (time.perf_counter() - t0)/len(ticks)
+
+    for n in shards:
+        clock = [ticks[0]]
+        data = BarData(bars, lambda: clock[0])
+        sharded = ShardedSignals(params, assets, n)
+        try:
+            sharded.update(data, lookback)  # start the workers
+            t0 = time.perf_counter()
+            for bar in ticks:
+                clock[0] = bar
+                sharded.update(data, lookback)
+            timings[n] = (time.perf_counter() - t0)/len(ticks)
+        finally:
+            sharded.close()
+    return timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Time the signal pass per tick, in process and sharded.")
+    parser.add_argument('--names', type=int, nargs='+',
+                        default=[50, 300, 1000])
+    parser.add_argument('--shards', type=int, nargs='+', default=[2, 4])
+    parser.add_argument('--ticks', type=int, default=200)
+    parser.add_argument('--lookback', type=int, default=300)
+    args = parser.parse_args(argv)
+
+    # Source_Code_18's signal parameters
+    params = dict(indicator_lookback=args.lookback, BBands_period=20,
+                  MACD_fast=5, MACD_slow=35, MACD_signal=5,
+                  volume_threshold=1.5)
+    rows = {}
+    for names in args.names:
+        rows[names] = measure(names, args.shards, params, args.ticks)
+    table = pd.DataFrame(rows).T*1e3
+    table.index.name = 'names'
+    table.columns = ['in process'] + [f"{n} shards" for n in args.shards]
+    print(f"ms per tick, {multiprocessing.cpu_count()} cpus")
+    print(table.to_string(float_format='{:.2f}'.format))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,240 @@
+"""
+    Cross-sectional signal engine for the Doji / Bollinger strategy.
+
+    Computes the indicators of signal_function (Source_Code_17) for every
+    security at once from a (securities x bars x fields) window: Bollinger
+    distance, MACD cross, ADX, the volume filter and the candlestick gate.
+    Bollinger, MACD, ADX and average-volume state is carried between
+    calls by the backtester.streaming indicators, fed arrays over the
+    universe, so a tick costs a few vector operations per new bar however
+    many securities there are, and once the state is warm the history
+    window only needs the bars it has not seen (`window_length`). The
+    rules are declared as a lazy backtester.pipeline, so the cheap gates
+    reject securities before the indicators that need the whole window
+    run for them.
+"""
+import numpy as np
+
+from backtester.data import FIELDS
+from backtester.pipeline import Filter, Indicator, Pipeline
+from backtester.streaming import (
+    StreamingADX,
+    StreamingBollinger,
+    StreamingMACD,
+    StreamingMean,
+)
+from backtester.patterns import (
+    DRAGONFLY_DOJI,
+    GRAVESTONE_DOJI,
+    HAMMER,
+    INVERTED_HAMMER,
+    classify_patterns,
+)
+
+SIGNAL_PATTERNS = (DRAGONFLY_DOJI, GRAVESTONE_DOJI, HAMMER, INVERTED_HAMMER)
+
+OPEN, HIGH, LOW, CLOSE, VOLUME = (FIELDS.index(f) for f in
+                                  ('open', 'high', 'low', 'close', 'volume'))
+
+
+def stack_history(panel, assets, fields=FIELDS):
+    """
+        (n_assets, n_bars, n_fields) array and bar timestamps of a
+        multi-asset history result, a HistoryPanel or the pandas frame.
+    """
+    assets = list(assets)
+    if hasattr(panel, 'to_array'):
+        return panel.to_array(assets, fields), np.asarray(panel.index)
+    frames = [panel.xs(asset) for asset in assets]
+    window = np.stack([frames[i][list(fields)].to_numpy(dtype=float)
+                       for i in range(len(assets))])
+    return window, np.asarray(frames[0].index)
+
+
+def _at(value, rows):
+    """Rows of a per-security state array; the state is NaN until ready."""
+    return value[rows.index] if np.ndim(value) else np.full(len(rows), value)
+
+
+def signal_pipeline(params, macd=None, adx=None, bands=None, adx_period=14,
+                    adx_threshold=15, volume=None):
+    """
+        The rules of signal_function as a Pipeline over (securities x bars
+        x fields) windows. With `macd`, `adx`, `bands` and `volume` state
+        objects (StreamingMACD, StreamingADX, StreamingBollinger and
+        StreamingMean over the universe) already advanced to the last bar,
+        those indicators are lookups; without them they are computed from
+        the window, only for the securities that reach them.
+    """
+    lookback = params['indicator_lookback']
+    period = params['BBands_period']
+
+    def last_volume(rows):
+        return rows.window[:, -1, VOLUME]
+
+    if volume is None:
+        def avg_volume(rows):
+            return rows.window[:, -lookback:, VOLUME].mean(axis=1)
+    else:
+        def avg_volume(rows):
+            return _at(volume.value(), rows)
+
+    if bands is None:
+        def bb_mid(rows):
+            close = rows.window[:, :, CLOSE]
+            if close.shape[1] < period:
+                return np.nan
+            return close[:, -period:].mean(axis=1)
+
+        def bb_dev(rows):
+            close = rows.window[:, :, CLOSE]
+            if close.shape[1] < period:
+                return np.nan
+            return 2.0*close[:, -period:].std(axis=1)
+        bb_cost = 2
+    else:
+        def bb_mid(rows):
+            return _at(bands.value()[1], rows)
+
+        def bb_dev(rows):
+            upper, mid, _ = bands.value()
+            return _at(upper - mid, rows)
+        bb_cost = 0.1
+
+    def pattern(rows):
+        last = rows.window[:, -1]
+        return classify_patterns(last[:, OPEN], last[:, HIGH], last[:, LOW],
+                                 last[:, CLOSE])
+
+    if macd is None:
+        def macd_cross(rows):
+            state = StreamingMACD(params['MACD_fast'], params['MACD_slow'],
+                                  params['MACD_signal'])
+            line, signal, _ = state.warmup(rows.window[:, :, CLOSE].T)
+            return np.sign(line - signal)
+        macd_cost = 20.0
+    else:
+        def macd_cross(rows):
+            line, signal, _ = macd.value()
+            return np.sign(_at(line, rows) - _at(signal, rows))
+        macd_cost = 0.1
+
+    if adx is None:
+        def adx_value(rows):
+            window = rows.window
+            return StreamingADX(adx_period).warmup(window[:, :, HIGH].T,
+                                                   window[:, :, LOW].T,
+                                                   window[:, :, CLOSE].T)
+        adx_cost = 30.0
+    else:
+        def adx_value(rows):
+            return _at(adx.value(), rows)
+        adx_cost = 0.1
+
+    def rule(rows, pattern, mid, dev, cross):
+        last_px = rows.window[:, -1, CLOSE]
+        upper, lower = mid + dev, mid - dev
+        with np.errstate(divide='ignore', invalid='ignore'):
+            dist_to_upper = 100*(upper - last_px)/(upper - lower)
+        buy = (((pattern == DRAGONFLY_DOJI) & (dist_to_upper < 30))
+               | (pattern == HAMMER)) & (cross > 0)
+        sell = (((pattern == GRAVESTONE_DOJI) & (dist_to_upper > 70))
+                | (pattern == INVERTED_HAMMER)) & (cross < 0)
+        return np.where(buy, 1, np.where(sell, -1, 0))
+
+    stages = [
+        Indicator('last_volume', last_volume, cost=0.1),
+        Indicator('avg_volume', avg_volume, cost=1),
+        Indicator('bb_mid', bb_mid, cost=bb_cost/2),
+        Indicator('bb_dev', bb_dev, cost=bb_cost),
+        Indicator('pattern', pattern, cost=0.5),
+        Indicator('macd_cross', macd_cross, cost=macd_cost),
+        Indicator('adx', adx_value, cost=adx_cost),
+        Filter('pattern_gate',
+               lambda rows, code: np.isin(code, SIGNAL_PATTERNS),
+               cost=0.1, requires=('pattern',)),
+        Filter('volume', lambda rows, last, avg: ~(
+            last < params['volume_threshold']*avg),
+            cost=0.1, requires=('last_volume', 'avg_volume')),
+        Filter('flat_bands', lambda rows, mid, dev: (mid + dev) - (mid - dev)
+               != 0, cost=0.1, requires=('bb_mid', 'bb_dev')),
+        Filter('trend', lambda rows, value: ~(value < adx_threshold),
+               cost=0.1, requires=('adx',)),
+    ]
+    return Pipeline(stages, rule,
+                    requires=('pattern', 'bb_mid', 'bb_dev', 'macd_cross'))
+
+
+class CrossSectionalSignals:
+    """
+        Signal vector for a universe from one history window per tick.
+
+        `update(window, stamps)` takes a float array of shape (n_assets,
+        n_bars, len(FIELDS)) and its bar timestamps, feeds the bars not
+        seen yet to the Bollinger/MACD/ADX/volume state (re-warming from
+        the window when it does not overlap what was seen) and returns
+        int8 signals of -1, 0 or 1 from `pipeline`, whose `stats` count
+        the securities each filter rejected. The indicator values it
+        computed are in `last`. `window_length` gives the shortest window
+        the next update can take.
+        With `skip_adx` the ADX is not advanced and, as the trend filter
+        cannot pass without it, every signal is 0; with `rows` only those
+        securities are scored. Given a backtester.kernels.KernelTable and
+        the `assets` of the window rows, Bollinger and MACD are looked up
+        in the table instead of being advanced here.
+    """
+    def __init__(self, params, adx_period=14, adx_threshold=15, assets=None,
+                 kernels=None):
+        self.params = params
+        if kernels is not None:
+            sids = [asset.sid for asset in assets]
+            self.macd = kernels.macd(sids, params['MACD_fast'],
+                                     params['MACD_slow'],
+                                     params['MACD_signal'])
+            self.bands = kernels.bands(sids, params['BBands_period'])
+        else:
+            self.macd = StreamingMACD(params['MACD_fast'], params['MACD_slow'],
+                                      params['MACD_signal'])
+            self.bands = StreamingBollinger(params['BBands_period'])
+        self.adx = StreamingADX(adx_period)
+        self.volume = StreamingMean(params['indicator_lookback'])
+        self.pipeline = signal_pipeline(params, self.macd, self.adx,
+                                        self.bands,
+                                        adx_threshold=adx_threshold,
+                                        volume=self.volume)
+        self.last = {}
+
+    def window_length(self, lookback, bar, index):
+        """
+            Bars of history the update at `bar` (of the bar timestamps
+            `index`) needs: from the oldest bar the state has last seen,
+            or the whole `lookback` when it is cold or further behind.
+        """
+        stamps = [state.last_stamp for state in
+                  (self.bands, self.macd, self.adx, self.volume)
+                  if hasattr(state, 'last_stamp')]
+        if any(stamp is None for stamp in stamps):
+            return lookback
+        seen = int(np.searchsorted(index, min(stamps)))
+        return int(min(lookback, bar - seen + 1))
+
+    def _advance(self, window, stamps, skip_adx=False):
+        stamps = np.asarray(stamps, dtype='datetime64[ns]')
+        close = window[:, :, CLOSE].T
+        self.bands.sync(close, stamps)
+        self.macd.sync(close, stamps)
+        self.volume.sync(window[:, :, VOLUME].T, stamps)
+        if not skip_adx:
+            # a skipped ADX catches up with the missed bars on its next sync
+            self.adx.sync(window[:, :, HIGH].T, window[:, :, LOW].T, close,
+                          stamps)
+
+    def update(self, window, stamps, skip_adx=False, rows=None):
+        window = np.asarray(window, dtype=float)
+        self._advance(window, stamps, skip_adx)
+        if skip_adx:
+            self.last = {}
+            return np.zeros(len(window), dtype=np.int8)
+        signals = self.pipeline.run(window, rows)
+        self.last = self.pipeline.values
+        return signals
@@ -0,0 +1,104 @@
+"""
+    On-disk columnar minute-bar store.
+
+    Layout under the store directory:
+
+        meta.json           symbols, bar and session counts, layout version
+        index.i8            bar timestamps, int64 nanoseconds
+        <field>.f8          minute bars, float64 (symbols x bars)
+        daily_<field>.f8    daily bars aggregated at build time, float64
+                            (symbols x sessions)
+
+    Every field is opened as a read-only memory map the first time it is
+    touched. A security's bars are one contiguous row, and the windows of
+    a universe one slice of the map, so history reads come from the page
+    cache and a multi-year store costs nothing to open.
+
+        python -m backtester.store CSV_DIR STORE_DIR
+"""
+import json
+import os
+import sys
+
+import numpy as np
+
+from backtester.data import FIELDS, BarSource, load_minute_bars
+
+_META = 'meta.json'
+_INDEX = 'index.i8'
+_VERSION = 2
+
+
+def write_store(bars, path):
+    """Write a `MinuteBars` (or any BarSource) to `path` as a store."""
+    os.makedirs(path, exist_ok=True)
+    bars.index.astype('datetime64[ns]').view('int64').tofile(
+        os.path.join(path, _INDEX))
+    for field in FIELDS:
+        for name, column in ((field, bars.column),
+                             (f"daily_{field}", bars.daily_column)):
+            # a row at a time, so the source is never copied whole
+            with open(os.path.join(path, f"{name}.f8"), 'wb') as fp:
+                for sid in range(len(bars.symbols)):
+                    np.ascontiguousarray(column(sid, field),
+                                         dtype='<f8').tofile(fp)
+    with open(os.path.join(path, _META), 'w') as fp:
+        json.dump({'symbols': list(bars.symbols), 'fields': list(FIELDS),
+                   'bars': len(bars.index), 'sessions': len(bars.sessions),
+                   'version': _VERSION}, fp, indent=2)
+
+
+def is_store(path):
+    return os.path.isfile(os.path.join(path, _META))
+
+
+class ColumnarStore(BarSource):
+    """Read-only, memory-mapped bar source over a write_store directory."""
+    def __init__(self, path):
+        with open(os.path.join(path, _META)) as fp:
+            meta = json.load(fp)
+        if meta.get('version', 1) != _VERSION:
+            raise ValueError(f"{path}: old store layout, rebuild it with "
+                             "python -m backtester.store")
+        self.path = path
+        self.symbols = meta['symbols']
+        self.sids = dict((s, i) for i, s in enumerate(self.symbols))
+        self._blocks = {}
+        self._daily = {}
+        self._init_sessions(np.memmap(os.path.join(path, _INDEX),
+                                      dtype='<i8', mode='r',
+                                      shape=(meta['bars'],)).view('M8[ns]'))
+        if len(self.sessions) != meta['sessions']:
+            raise ValueError(f"{path}: index does not match its daily bars")
+
+    def _open(self, name, length):
+        # plain ndarray view over the map: slices skip the memmap wrapper
+        return np.memmap(os.path.join(self.path, f"{name}.f8"),
+                         dtype='<f8', mode='r',
+                         shape=(len(self.symbols), length)).view(np.ndarray)
+
+    def block(self, field):
+        block = self._blocks.get(field)
+        if block is None:
+            block = self._blocks[field] = self._open(field, len(self.index))
+        return block
+
+    def daily_block(self, field):
+        block = self._daily.get(field)
+        if block is None:
+            block = self._daily[field] = self._open(f"daily_{field}",
+                                                    len(self.sessions))
+        return block
+
+
+def open_bars(path, start=None, end=None):
+    """A ColumnarStore if `path` is one, else its CSV files in memory."""
+    if is_store(path):
+        return ColumnarStore(path)
+    return load_minute_bars(path, start=start, end=end)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3:
+        sys.exit('usage: python -m backtester.store CSV_DIR STORE_DIR')
+    write_store(load_minute_bars(sys.argv[1]), sys.argv[2])
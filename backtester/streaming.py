@@ -0,0 +1,373 @@
+"""
+    Incremental versions of the indicators in signal_function.
+
+    Each object holds the state of one indicator for one security and
+    advances in O(1) per new bar. `sync` takes the same history window the
+    batch functions get and feeds only the bars newer than the last one it
+    has seen, so it can be dropped into generate_signals as is.
+
+    The updates are plain array arithmetic, so the same objects also carry
+    the state of a whole universe sharing the same bars: feed them arrays
+    with one value per security (windows of shape (n_bars, n_assets)) and
+    every value they return is an array over the universe.
+"""
+import math
+
+import numpy as np
+
+from backtester.ringbuffer import RingBuffer
+
+
+def _rows(column, start=0):
+    """Values of a window from bar `start` on: floats, or one array per bar."""
+    column = column[start:]
+    return column.tolist() if column.ndim == 1 else list(column)
+
+
+class StreamingIndicator:
+    """
+        Timestamp bookkeeping shared by the streaming indicators. Subclasses
+        implement `update(*row)`, `warmup(*columns)` and `value()`.
+    """
+    # a window with at least this many unseen bars is cheaper to reload
+    rewarm_after = math.inf
+
+    def __init__(self):
+        self.last_stamp = None
+
+    def _sync(self, stamps, *columns):
+        stamps = np.asarray(stamps, dtype='datetime64[ns]')
+        columns = [np.asarray(c, dtype=float) for c in columns]
+        columns = [c if c.ndim > 1 else c.ravel() for c in columns]
+        if self.last_stamp is None:
+            start = 0
+        else:
+            start = int(np.searchsorted(stamps, self.last_stamp,
+                                        side='right'))
+        if start == 0 or len(stamps) - start >= self.rewarm_after:
+            # first call, or the window no longer overlaps what was seen
+            self.warmup(*columns)
+        else:
+            for row in zip(*(_rows(c, start) for c in columns)):
+                self.update(*row)
+        if len(stamps):
+            self.last_stamp = stamps[-1]
+        return self.value()
+
+
+class StreamingBollinger(StreamingIndicator):
+    """
+        Bollinger bands over the last `period` values. Mean and sum of
+        squared deviations are updated with the sliding-window form of
+        Welford's algorithm, and recomputed exactly every `refresh` bars
+        so rounding error cannot accumulate over a multi-year run.
+    """
+    def __init__(self, period, nbdev=2.0, refresh=4096):
+        super().__init__()
+        self.period = int(period)
+        self.nbdev = nbdev
+        self.refresh = refresh
+        self.rewarm_after = self.period
+        self._window = None
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._since_refresh = 0
+        self._bands = None
+
+    @property
+    def ready(self):
+        return self._window is not None and len(self._window) == self.period
+
+    def _buffer(self, shape):
+        if self._window is None or self._window.view().shape[1:] != shape:
+            self._window = RingBuffer(self.period, shape)
+        return self._window
+
+    def update(self, value):
+        window = self._buffer(np.shape(value))
+        if len(window) < self.period:
+            n = len(window) + 1
+            delta = value - self._mean
+            self._mean = self._mean + delta/n
+            self._m2 = self._m2 + delta*(value - self._mean)
+        else:
+            old = window.view()[0]
+            mean = self._mean + (value - old)/self.period
+            self._m2 = self._m2 + (value - old)*(
+                value - mean + old - self._mean)
+            self._mean = mean
+        window.append(value)
+        self._bands = None
+
+        self._since_refresh += 1
+        if self._since_refresh >= self.refresh:
+            self._recompute()
+        return self.value()
+
+    def _recompute(self):
+        values = self._window.view()
+        self._mean = values.mean(axis=0)
+        self._m2 = ((values - self._mean)**2).sum(axis=0)
+        self._since_refresh = 0
+        self._bands = None
+
+    def warmup(self, values):
+        """Reset and load the last `period` values in one batch pass."""
+        values = np.asarray(values, dtype=float)
+        if values.ndim == 1:
+            values = values.ravel()
+        self._buffer(values.shape[1:]).reset(values[-self.period:])
+        self._recompute()
+        return self.value()
+
+    def sync(self, values, stamps):
+        """Feed the values of a history window not seen yet; return bands."""
+        return self._sync(stamps, values)
+
+    def value(self):
+        """(upper, mid, lower), NaN until `period` values have been seen."""
+        if not self.ready:
+            return np.nan, np.nan, np.nan
+        if self._bands is None:
+            dev = self.nbdev*np.sqrt(np.maximum(self._m2, 0.0)/self.period)
+            self._bands = (self._mean + dev, self._mean, self._mean - dev)
+        return self._bands
+
+
+class StreamingMean(StreamingIndicator):
+    """
+        Mean of the last `period` values (of all of them until there are
+        `period`) from a running sum, recomputed exactly every `refresh`
+        bars. The average volume of the signal filter.
+    """
+    def __init__(self, period, refresh=4096):
+        super().__init__()
+        self.period = int(period)
+        self.refresh = refresh
+        self.rewarm_after = self.period
+        self._window = None
+        self._sum = 0.0
+        self._since_refresh = 0
+
+    def _buffer(self, shape):
+        if self._window is None or self._window.view().shape[1:] != shape:
+            self._window = RingBuffer(self.period, shape)
+        return self._window
+
+    def update(self, value):
+        window = self._buffer(np.shape(value))
+        if len(window) == self.period:
+            self._sum = self._sum - window.view()[0]
+        self._sum = self._sum + value
+        window.append(value)
+        self._since_refresh += 1
+        if self._since_refresh >= self.refresh:
+            self._recompute()
+        return self.value()
+
+    def _recompute(self):
+        self._sum = self._window.view().sum(axis=0)
+        self._since_refresh = 0
+
+    def warmup(self, values):
+        """Reset and load the last `period` values in one batch pass."""
+        values = np.asarray(values, dtype=float)
+        if values.ndim == 1:
+            values = values.ravel()
+        self._buffer(values.shape[1:]).reset(values[-self.period:])
+        self._recompute()
+        return self.value()
+
+    def sync(self, values, stamps):
+        """Feed the values of a history window not seen yet."""
+        return self._sync(stamps, values)
+
+    def value(self):
+        if self._window is None or not len(self._window):
+            return np.nan
+        return self._sum/len(self._window)
+
+
+class StreamingMACD(StreamingIndicator):
+    """
+        MACD with the fast, slow and signal EMA states carried between
+        calls. Seeding follows the batch `macd`: the slow EMA starts from
+        the mean of the first `slow` values, the fast EMA from the mean of
+        the last `fast` of those, and the signal EMA from the mean of the
+        first `signal` MACD values, so `warmup` over a window reproduces
+        the batch call on that window.
+    """
+    def __init__(self, fast=12, slow=26, signal=9):
+        super().__init__()
+        self.fast, self.slow, self.signal = int(fast), int(slow), int(signal)
+        self._alpha_fast = 2.0/(self.fast + 1)
+        self._alpha_slow = 2.0/(self.slow + 1)
+        self._alpha_signal = 2.0/(self.signal + 1)
+        self.reset()
+
+    def reset(self):
+        self.last_stamp = None
+        self._seed = []
+        self._lines = []
+        self._fast_ema = self._slow_ema = self._signal_ema = None
+        self._value = (np.nan, np.nan, np.nan)
+
+    @property
+    def ready(self):
+        return self._signal_ema is not None
+
+    def update(self, value):
+        if self._slow_ema is None:
+            self._seed.append(value)
+            if len(self._seed) < self.slow:
+                return self._value
+            self._slow_ema = sum(self._seed)/self.slow
+            self._fast_ema = sum(self._seed[-self.fast:])/self.fast
+            self._seed = None
+        else:
+            self._fast_ema = self._fast_ema + \
+                self._alpha_fast*(value - self._fast_ema)
+            self._slow_ema = self._slow_ema + \
+                self._alpha_slow*(value - self._slow_ema)
+        line = self._fast_ema - self._slow_ema
+
+        if self._signal_ema is None:
+            self._lines.append(line)
+            if len(self._lines) < self.signal:
+                self._value = (line, np.nan, np.nan)
+                return self._value
+            self._signal_ema = sum(self._lines)/self.signal
+            self._lines = None
+        else:
+            self._signal_ema = self._signal_ema + \
+                self._alpha_signal*(line - self._signal_ema)
+        self._value = (line, self._signal_ema, line - self._signal_ema)
+        return self._value
+
+    def warmup(self, values):
+        """Reset and replay `values`: same result as macd() on them."""
+        self.reset()
+        values = np.asarray(values, dtype=float)
+        for value in _rows(values if values.ndim > 1 else values.ravel()):
+            self.update(value)
+        return self._value
+
+    def sync(self, values, stamps):
+        """Advance by the values of a history window not seen yet."""
+        return self._sync(stamps, values)
+
+    def value(self):
+        """(macd line, signal line, histogram) at the last bar."""
+        return self._value
+
+
+class StreamingADX(StreamingIndicator):
+    """
+        Wilder's ADX with the smoothed +DM, -DM and true-range sums and the
+        ADX itself carried between calls, O(1) per bar. The first `period`
+        directional moves seed the sums and the first `period` DX values
+        seed the ADX, as in the batch `adx`.
+    """
+    def __init__(self, period=14):
+        super().__init__()
+        self.period = int(period)
+        self._decay = 1.0 - 1.0/self.period
+        self._gain = 1.0/self.period
+        self.reset()
+
+    def reset(self):
+        self.last_stamp = None
+        self._prev = None
+        self._seen = 0
+        self._plus = self._minus = self._tr = 0.0
+        self._dx_seed = []
+        self._adx = None
+
+    @property
+    def ready(self):
+        return self._adx is not None
+
+    def update(self, high, low, close):
+        prev = self._prev
+        self._prev = (high, low, close)
+        if prev is None:
+            return np.nan
+        prev_high, prev_low, prev_close = prev
+
+        up = high - prev_high
+        down = prev_low - low
+        plus_dm = np.where((up > down) & (up > 0), up, 0.0)
+        minus_dm = np.where((down > up) & (down > 0), down, 0.0)
+        tr = np.maximum(high, prev_close) - np.minimum(low, prev_close)
+
+        if self._seen < self.period:
+            self._plus = self._plus + plus_dm
+            self._minus = self._minus + minus_dm
+            self._tr = self._tr + tr
+            self._seen += 1
+            if self._seen < self.period:
+                return np.nan
+        else:
+            self._plus = self._decay*self._plus + plus_dm
+            self._minus = self._decay*self._minus + minus_dm
+            self._tr = self._decay*self._tr + tr
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            di_plus = 100*self._plus/self._tr
+            di_minus = 100*self._minus/self._tr
+            total = di_plus + di_minus
+            dx = np.where((self._tr > 0) & (total > 0),
+                          100*np.abs(di_plus - di_minus)/total, 0.0)
+
+        if self._adx is None:
+            self._dx_seed.append(dx)
+            if len(self._dx_seed) < self.period:
+                return np.nan
+            self._adx = sum(self._dx_seed)/self.period
+            self._dx_seed = None
+        else:
+            self._adx = self._decay*self._adx + self._gain*dx
+        return self._adx
+
+    def warmup(self, high, low, close, check=False):
+        """
+            Reset and replay a window of bars. With `check`, the inputs are
+            validated and the result compared against the batch `adx` on
+            the same window.
+        """
+        high, low, close = (np.asarray(c, dtype=float)
+                            for c in (high, low, close))
+        if high.ndim == 1 or low.ndim == 1 or close.ndim == 1:
+            high, low, close = high.ravel(), low.ravel(), close.ravel()
+        if check:
+            if not high.shape == low.shape == close.shape:
+                raise ValueError('high, low and close differ in length')
+            if not (np.isfinite(high).all() and np.isfinite(low).all()
+                    and np.isfinite(close).all()):
+                raise ValueError('ADX warm-up window contains NaN or inf')
+
+        self.reset()
+        for row in zip(_rows(high), _rows(low), _rows(close)):
+            self.update(*row)
+        value = self.value()
+
+        if check:
+            from blueshift.library.technicals.indicators import adx
+            if high.ndim == 1:
+                expected = adx(high, low, close, self.period)
+            else:
+                expected = np.array([adx(h, l, c, self.period) for h, l, c
+                                     in zip(high.T, low.T, close.T)])
+            if not np.allclose(value, expected, rtol=1e-9, atol=1e-9,
+                               equal_nan=True):
+                raise ValueError(f"streaming ADX {value} does not match "
+                                 f"batch adx {expected}")
+        return value
+
+    def sync(self, high, low, close, stamps):
+        """Advance by the bars of a history window not seen yet."""
+        return self._sync(stamps, high, low, close)
+
+    def value(self):
+        """ADX at the last bar, NaN until 2*period bars have been seen."""
+        return np.nan if self._adx is None else self._adx
@@ -0,0 +1,173 @@
+"""
+    Parallel parameter sweeps: python -m backtester.sweep STRATEGY --data
+    DIR --grid GRID.json.
+
+    The grid maps entries of the strategy's `context.params` to lists of
+    values and is expanded to every combination. A comma-separated key
+    varies several entries together, e.g. {"MACD_fast,MACD_slow,
+    MACD_signal": [[12, 26, 9], [5, 35, 5]]}. Backtests run in a process
+    pool; each worker opens the bars once and keeps them for all its runs,
+    and with a columnar store (python -m backtester.store) every worker
+    maps the same read-only files, so the market data sits in memory once.
+    The results come back as one table, a row per grid point. With a
+    cache size, each worker memoizes indicator calls across its runs, so
+    indicators the grid does not vary are computed once per worker. With
+    `kernels`, each worker computes the Bollinger and MACD series of every
+    BBands_period and MACD triple of the grid in one kernel pass per
+    security (backtester.kernels.KernelTable), and the signal engine of
+    each run (Source_Code_18) reads its own variant from them.
+"""
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import time
+import traceback
+
+import pandas as pd
+
+from backtester.engine import load_strategy, run_backtest, summarize
+from backtester.kernels import KernelTable
+from backtester.memo import IndicatorCache
+from backtester.store import open_bars
+
+# per-worker state, set by _init_worker
+_worker = {}
+
+
+def expand_grid(grid):
+    """Every combination of a parameter grid, as a list of params dicts."""
+    keys = list(grid)
+    points = []
+    for values in itertools.product(*(grid[k] for k in keys)):
+        point = {}
+        for key, value in zip(keys, values):
+            names = [n.strip() for n in key.split(',')]
+            if len(names) == 1:
+                point[names[0]] = value
+            elif len(value) != len(names):
+                raise ValueError(f"{key}: expected {len(names)} values, "
+                                 f"got {value!r}")
+            else:
+                point.update(zip(names, value))
+        points.append(point)
+    return points
+
+
+def grid_variants(points):
+    """The BBands_period values and MACD triples a list of points uses."""
+    periods = set(p['BBands_period'] for p in points
+                  if 'BBands_period' in p)
+    macds = set((p['MACD_fast'], p['MACD_slow'], p['MACD_signal'])
+                for p in points
+                if all(k in p for k in ('MACD_fast', 'MACD_slow',
+                                        'MACD_signal')))
+    return periods, macds
+
+
+def _init_worker(strategy, data, first, start, end, capital_base,
+                 cache_bytes=0, variants=None):
+    bars = open_bars(data, start=first, end=end)
+    _worker.update(strategy=strategy, start=start, end=end,
+                   capital_base=capital_base, bars=bars,
+                   cache=IndicatorCache(cache_bytes) if cache_bytes else None,
+                   kernels=None if variants is None
+                   else KernelTable(bars, *variants, end=end))
+
+
+def _run_point(task):
+    i, params = task
+    w = _worker
+    row = dict(run=i, **params)
+    t0 = time.perf_counter()
+    try:
+        # a fresh module per run: strategies keep state at module level
+        perf, _ = run_backtest(load_strategy(w['strategy']), w['bars'],
+                               w['capital_base'], w['start'], w['end'],
+                               params=params, indicator_cache=w['cache'],
+                               kernels=w['kernels'])
+        row.update(summarize(perf))
+        row['final_value'] = perf['portfolio_value'].iloc[-1]
+        row['error'] = None
+    except Exception:
+        row['error'] = traceback.format_exc(limit=3).strip().splitlines()[-1]
+    row['elapsed'] = time.perf_counter() - t0
+    row['pid'] = os.getpid()
+    return row
+
+
+def run_sweep(strategy, data, grid, start=None, end=None, warmup=30,
+              capital_base=1e6, processes=None, output=None, cache_bytes=0,
+              kernels=False):
+    """
+        Backtest `strategy` over `data` (store or CSV directory) for every
+        point of `grid` (a dict, or a list of params dicts) and return the
+        results as a DataFrame indexed by run number. A failing point is
+        recorded with its error instead of stopping the sweep. With
+        `output`, the table is also written there as csv. `cache_bytes`
+        sizes each worker's indicator cache (0 turns it off); `kernels`
+        turns on the shared kernel series.
+    """
+    points = expand_grid(grid) if isinstance(grid, dict) else list(grid)
+    first = None
+    if start is not None:
+        first = pd.Timestamp(start) - pd.Timedelta(days=warmup)
+    processes = processes or os.cpu_count() or 1
+    processes = min(processes, len(points)) or 1
+
+    initargs = (strategy, data, first, start, end, capital_base,
+                cache_bytes, grid_variants(points) if kernels else None)
+    tasks = list(enumerate(points))
+    if processes == 1:
+        _init_worker(*initargs)
+        rows = [_run_point(task) for task in tasks]
+    else:
+        with multiprocessing.Pool(processes, _init_worker, initargs) as pool:
+            rows = list(pool.imap_unordered(_run_point, tasks, chunksize=1))
+
+    results = pd.DataFrame(rows).set_index('run').sort_index()
+    if output:
+        results.to_csv(output)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m backtester.sweep')
+    parser.add_argument('strategy', help='path to a Source_Code_N.py file')
+    parser.add_argument('--data', required=True,
+                        help='columnar store, or directory of <SYMBOL>.csv '
+                             'minute bars')
+    parser.add_argument('--grid', required=True,
+                        help='json file mapping params to lists of values')
+    parser.add_argument('--start', default=None)
+    parser.add_argument('--end', default=None)
+    parser.add_argument('--warmup', type=int, default=30)
+    parser.add_argument('--capital', type=float, default=1e6)
+    parser.add_argument('--processes', type=int, default=None,
+                        help='worker processes (default: all cores)')
+    parser.add_argument('--cache-mb', type=float, default=0,
+                        help='per-worker indicator cache shared by its runs')
+    parser.add_argument('--kernels', action='store_true',
+                        help='compute the Bollinger and MACD series of all '
+                             'grid variants once per worker')
+    parser.add_argument('--output', default='sweep.csv')
+    args = parser.parse_args(argv)
+
+    with open(args.grid) as fp:
+        grid = json.load(fp)
+    t0 = time.perf_counter()
+    results = run_sweep(args.strategy, args.data, grid, args.start, args.end,
+                        args.warmup, args.capital, args.processes,
+                        args.output, int(args.cache_mb*(1 << 20)),
+                        args.kernels)
+    failed = int(results['error'].notna().sum())
+    print(f"{len(results)} runs in {time.perf_counter() - t0:.1f}s, "
+          f"{failed} failed; results in {args.output}")
+    if 'sharpe' in results:
+        print(results.sort_values('sharpe', ascending=False).head(10)
+              .drop(columns=['error', 'pid']).to_string())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+"""
+    Chrome trace-event export of a backtest.
+
+    `Tracer.instrument` wraps the functions a strategy module defines
+    (before_trading_start, run_strategy, signal_function, stop_trading,
+    ...) and the indicator functions it imported (bollinger_band, macd,
+    adx, ...) so that every call becomes a complete ("X") event with its
+    start and duration. Calls nest by time on one thread, so a viewer
+    shows each session as a flame chart: session > run_strategy >
+    generate_signals > signal_function > adx. `write` saves the events as
+    a trace-event JSON file that chrome://tracing, Perfetto or speedscope
+    open from disk; nothing leaves the machine.
+
+    Only every `sample_every`-th session is traced (one in 20 by default),
+    and recording stops at `max_events` (100,000, about 10 MB of JSON),
+    so a multi-year run gives a file of bounded size.
+    Outside a sampled session a wrapped call costs one attribute check.
+"""
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+
+from blueshift.library.technicals import indicators
+
+from backtester.memo import INDICATORS
+from backtester.profiling import strategy_functions
+
+_clock = time.perf_counter_ns
+
+
+class _TracedData:
+    """`data` with history and current calls traced."""
+    def __init__(self, data, tracer):
+        self._data = data
+        self.history = tracer.timed('data.history', data.history, 'data')
+        self.current = tracer.timed('data.current', data.current, 'data')
+
+    def __getattr__(self, name):
+        return getattr(self._data, name)
+
+
+class Tracer:
+    """
+        Spans of the sampled sessions, written to `path` by `write`.
+        Sessions are counted from the first `begin_session`; session 0 is
+        always traced.
+    """
+    def __init__(self, path, sample_every=20, max_events=100_000):
+        if sample_every < 1:
+            raise ValueError(
+                f"sample_every must be >= 1, got {sample_every}")
+        self.path = path
+        self.sample_every = int(sample_every)
+        self.max_events = int(max_events)
+        self.events = []
+        self.active = False
+        self.sessions = 0
+        self.traced = []
+        self.dropped = 0
+        self.pid = os.getpid()
+        self.tid = threading.get_native_id()
+        self._origin = _clock()
+        self._session = None
+
+    def _us(self, ns):
+        return (ns - self._origin)/1e3
+
+    def _emit(self, name, cat, t0, t1, args=None):
+        if len(self.events) >= self.max_events:
+            self.dropped += 1
+            return
+        event = dict(name=name, cat=cat, ph='X', ts=self._us(t0),
+                     dur=(t1 - t0)/1e3, pid=self.pid, tid=self.tid)
+        if args:
+            event['args'] = args
+        self.events.append(event)
+
+    def timed(self, name, func, cat='strategy'):
+        """`func` with every call in a sampled session traced as `name`."""
+        emit = self._emit
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not self.active:
+                return func(*args, **kwargs)
+            t0 = _clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                emit(name, cat, t0, _clock())
+        return wrapper
+
+    def instrument(self, module, names=None, indicator_names=INDICATORS):
+        """
+            Trace the functions `module` defines itself (or just `names`)
+            and the indicators it imported from
+            blueshift.library.technicals.indicators, memoized or not,
+            replacing them in its namespace. Returns the traced names.
+        """
+        done = []
+        for name, func in strategy_functions(module, names):
+            setattr(module, name, self.timed(name, func))
+            done.append(name)
+        for name in indicator_names:
+            func = getattr(module, name, None)
+            if func is not None and \
+                    inspect.unwrap(func) is getattr(indicators, name):
+                setattr(module, name, self.timed(name, func, 'indicator'))
+                done.append(name)
+        return done
+
+    def wrap_data(self, data):
+        return _TracedData(data, self)
+
+    def begin_session(self, label=None):
+        """Start a session; it is traced if it falls on the sample."""
+        index = self.sessions
+        self.sessions += 1
+        self.active = (index % self.sample_every == 0
+                       and len(self.events) < self.max_events)
+        if self.active:
+            self._session = (str(label), _clock())
+            self.traced.append(str(label))
+
+    def end_session(self):
+        if self.active:
+            label, t0 = self._session
+            self._emit('session', 'session', t0, _clock(),
+                       dict(session=label))
+        self.active = False
+        self._session = None
+
+    def write(self, path=None):
+        """Save the trace as JSON (object format) and return the path."""
+        path = path or self.path
+        meta = [dict(name='process_name', ph='M', pid=self.pid, tid=self.tid,
+                     args=dict(name='backtest')),
+                dict(name='thread_name', ph='M', pid=self.pid, tid=self.tid,
+                     args=dict(name='strategy'))]
+        trace = dict(traceEvents=meta + self.events, displayTimeUnit='ms',
+                     otherData=dict(sessions=self.sessions,
+                                    sample_every=self.sample_every,
+                                    traced=self.traced,
+                                    dropped_events=self.dropped))
+        with open(path, 'w') as fp:
+            json.dump(trace, fp)
+        return path
@@ -0,0 +1,205 @@
+"""
+    Walk-forward optimization: python -m backtester.walkforward STRATEGY
+    --data DIR --grid GRID.json --in-sample 60 --out-of-sample 20.
+
+    The traded period is cut into folds: each tunes `context.params` over
+    a grid on `in_sample` sessions and trades the best point on the next
+    `out_of_sample` sessions, then the window rolls forward by the
+    out-of-sample length. Folds run in parallel in a process pool.
+
+    Each grid point of a fold is one Engine that stops at the end of the
+    in-sample window. The winner is not restarted for the out-of-sample
+    sessions: its engine simply advances, so indicator state and ring
+    buffers carry over and a fold costs one pass over its data. Its
+    positions do not: they are closed at the last in-sample close, so the
+    out-of-sample statistics only count trades made on out-of-sample
+    bars. The out-of-sample returns of all folds are stitched into one
+    series. A grid point that fails is recorded with its error in the
+    per-point table, as in backtester.sweep.
+
+    Without a `start`, the first `warmup` calendar days of the data only
+    serve as indicator history and the first fold starts after them.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import time
+import traceback
+
+import numpy as np
+import pandas as pd
+
+from backtester.engine import Engine, load_strategy, summarize
+from backtester.store import open_bars
+from backtester.sweep import _init_worker, _worker, expand_grid
+
+
+def make_folds(sessions, in_sample, out_of_sample, start=None, end=None):
+    """
+        (is_start, is_end, oos_start, oos_end) session dates of every fold
+        that fits between `start` and `end`; the last out-of-sample window
+        may be shorter.
+    """
+    sessions = np.asarray(sessions, dtype='datetime64[D]')
+    lo = 0 if start is None else int(np.searchsorted(
+        sessions, np.datetime64(pd.Timestamp(start), 'D')))
+    hi = len(sessions) if end is None else int(np.searchsorted(
+        sessions, np.datetime64(pd.Timestamp(end), 'D'), side='right'))
+    folds = []
+    for first in range(lo, hi - in_sample, out_of_sample):
+        split = first + in_sample
+        last = min(split + out_of_sample, hi)
+        folds.append(tuple(pd.Timestamp(sessions[i]) for i in
+                           (first, split - 1, split, last - 1)))
+    return folds
+
+
+def _window_stats(perf, since=None):
+    """summarize() of a slice of a perf frame, with orders in the slice."""
+    window = perf if since is None else perf.loc[since:]
+    stats = summarize(window)
+    before = perf['orders'].iloc[len(perf) - len(window) - 1] \
+        if len(window) < len(perf) else 0
+    stats['orders'] = int(window['orders'].iloc[-1] - before)
+    return stats
+
+
+def _run_fold(task):
+    fold, (is_start, is_end, oos_start, oos_end), points, metric = task
+    w = _worker
+    t0 = time.perf_counter()
+    best = None
+    tried = []
+    for i, params in enumerate(points):
+        point = dict(fold=fold, run=i, **params)
+        point[f"is_{metric}"] = np.nan
+        point['error'] = None
+        try:
+            engine = Engine(load_strategy(w['strategy']), w['bars'],
+                            w['capital_base'], is_start, oos_end,
+                            params=params,
+                            indicator_cache=w['cache'])
+            engine.advance(is_end)
+            score = summarize(engine.performance())[metric]
+            point[f"is_{metric}"] = score
+        except Exception:
+            point['error'] = \
+                traceback.format_exc(limit=3).strip().splitlines()[-1]
+            tried.append(point)
+            continue
+        tried.append(point)
+        if np.isfinite(score) and (best is None or score > best[0]):
+            best = (score, params, engine)
+
+    row = dict(fold=fold, is_start=is_start, is_end=is_end,
+               oos_start=oos_start, oos_end=oos_end,
+               failed=sum(p['error'] is not None for p in tried))
+    if best is None:
+        row.update(error='no grid point completed the in-sample window')
+        return row, pd.Series(dtype=float), tried
+
+    score, params, engine = best
+    # trade the out-of-sample window from a flat book
+    engine.flatten()
+    engine.advance(oos_end)
+    engine.finish()
+    perf = engine.performance()
+    row.update(params)
+    row[f"is_{metric}"] = score
+    row.update(('oos_' + k, v) for k, v in
+               _window_stats(perf, oos_start).items())
+    row['elapsed'] = time.perf_counter() - t0
+    row['pid'] = os.getpid()
+    return row, perf.loc[oos_start:, 'returns'], tried
+
+
+def walk_forward(strategy, data, grid, in_sample=60, out_of_sample=20,
+                 start=None, end=None, warmup=30, capital_base=1e6,
+                 metric='sharpe', processes=None):
+    """
+        Run every fold and return (folds, returns, points): a DataFrame
+        with the chosen params and in/out-of-sample statistics of each
+        fold, the stitched out-of-sample daily returns, and a DataFrame
+        with the in-sample score or the error of every grid point of every
+        fold.
+    """
+    points = expand_grid(grid) if isinstance(grid, dict) else list(grid)
+    first = None
+    if start is not None:
+        first = pd.Timestamp(start) - pd.Timedelta(days=warmup)
+    bars = open_bars(data, start=first, end=end)
+    if start is None:
+        start = pd.Timestamp(bars.sessions[0]) + pd.Timedelta(days=warmup)
+    folds = make_folds(bars.sessions, in_sample, out_of_sample, start, end)
+    if not folds:
+        raise ValueError(f"fewer than {in_sample + 1} sessions to walk")
+
+    initargs = (strategy, data, first, start, end, capital_base)
+    tasks = [(i, fold, points, metric) for i, fold in enumerate(folds)]
+    processes = min(processes or os.cpu_count() or 1, len(tasks))
+    if processes == 1:
+        _init_worker(*initargs)
+        results = [_run_fold(task) for task in tasks]
+    else:
+        with multiprocessing.Pool(processes, _init_worker, initargs) as pool:
+            results = pool.map(_run_fold, tasks, chunksize=1)
+
+    table = pd.DataFrame([row for row, _, _ in results]).set_index('fold')
+    returns = pd.concat([r for _, r, _ in results if len(r)]) \
+        if any(len(r) for _, r, _ in results) else pd.Series(dtype=float)
+    tried = pd.DataFrame([p for _, _, fold in results for p in fold])
+    return table, returns, tried
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m backtester.walkforward')
+    parser.add_argument('strategy', help='path to a Source_Code_N.py file')
+    parser.add_argument('--data', required=True,
+                        help='columnar store, or directory of <SYMBOL>.csv '
+                             'minute bars')
+    parser.add_argument('--grid', required=True,
+                        help='json file mapping params to lists of values')
+    parser.add_argument('--in-sample', type=int, default=60,
+                        help='sessions each fold tunes on')
+    parser.add_argument('--out-of-sample', type=int, default=20,
+                        help='sessions each fold trades the chosen params')
+    parser.add_argument('--metric', default='sharpe',
+                        choices=['sharpe', 'total_return'])
+    parser.add_argument('--start', default=None)
+    parser.add_argument('--end', default=None)
+    parser.add_argument('--warmup', type=int, default=30)
+    parser.add_argument('--capital', type=float, default=1e6)
+    parser.add_argument('--processes', type=int, default=None)
+    parser.add_argument('--output', default='walkforward.csv')
+    parser.add_argument('--points', default=None,
+                        help='also write the in-sample result of every grid '
+                             'point of every fold to this csv')
+    args = parser.parse_args(argv)
+
+    with open(args.grid) as fp:
+        grid = json.load(fp)
+    t0 = time.perf_counter()
+    folds, returns, points = walk_forward(
+        args.strategy, args.data, grid, args.in_sample, args.out_of_sample,
+        args.start, args.end, args.warmup, args.capital, args.metric,
+        args.processes)
+    folds.to_csv(args.output)
+    if args.points:
+        points.to_csv(args.points, index=False)
+
+    failed = int(points['error'].notna().sum())
+    print(f"{len(folds)} folds in {time.perf_counter() - t0:.1f}s, "
+          f"{failed} of {len(points)} grid points failed; "
+          f"results in {args.output}")
+    if failed:
+        print(points['error'].value_counts().to_string())
+    print(folds.drop(columns=['pid'], errors='ignore').to_string())
+    if len(returns):
+        equity = (1 + returns).cumprod()
+        print(f"out-of-sample total return {equity.iloc[-1] - 1:.4f}, "
+              f"sharpe {np.sqrt(252)*returns.mean()/returns.std():.4f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+"""
+    Slot watchdog for scheduled functions.
+
+    A function scheduled every n minutes has n minutes of wall-clock time
+    before its next slot (in a backtest, whatever `budget` says). The
+    watchdog times each call and, when a call gets close to the budget,
+    steps the next calls down a fixed ladder of degradations:
+
+        normal          everything runs
+        skip_adx        no ADX is computed, and the trend filter rejects
+                        every trade it would have gated
+        positions_only  as skip_adx, and only the securities with an open
+                        position are scored and rebalanced
+
+    What a call should skip is published as `context.degradation`, a
+    `Degradation`. A strategy that computes ADX through a module-level
+    `adx` (the blueshift indicator) needs no change for skip_adx: for the
+    duration of the call `adx` is swapped for a stub returning 0, below
+    every trend threshold. Anything else has to read the flags itself:
+    Source_Code_18, whose ADX lives in its signal engine, passes
+    `skip_adx` and the `held` mask on to it. context.securities is never
+    changed, so arrays aligned with it stay aligned; a strategy that
+    ignores `held` simply gets no positions_only savings.
+
+    A call that overruns its slot also makes the watchdog skip the next
+    slot instead of letting it start late on stale data. After `patience`
+    calls comfortably inside the budget the level steps back up. Every
+    change and skip is appended to `events`.
+"""
+import inspect
+import time
+
+import numpy as np
+import pandas as pd
+
+LEVELS = ('normal', 'skip_adx', 'positions_only')
+
+
+def _no_adx(*args, **kwargs):
+    # no trend: fails every `adx_value < threshold` filter
+    return 0.0
+
+
+class Degradation:
+    """
+        The degradation asked of one call: its `level` name, `skip_adx`,
+        and from positions_only on `held`, a boolean mask over
+        context.securities of the securities with an open position (None
+        below that level).
+    """
+    __slots__ = ('level', 'skip_adx', 'held')
+
+    def __init__(self, level=LEVELS[0], skip_adx=False, held=None):
+        self.level = level
+        self.skip_adx = skip_adx
+        self.held = held
+
+    def __repr__(self):
+        return f"Degradation({self.level!r})"
+
+    def __str__(self):
+        return self.level
+
+
+class SlotWatchdog:
+    """
+        Guards scheduled functions against `budget` seconds per call.
+        Calls over `warn` of the budget degrade one level; calls under
+        `recover` of it for `patience` calls in a row restore one.
+    """
+    def __init__(self, budget, warn=0.8, recover=0.5, patience=5,
+                 clock=time.perf_counter):
+        self.budget = float(budget)
+        self.warn = warn
+        self.recover = recover
+        self.patience = patience
+        self.clock = clock
+        self.level = 0
+        self.events = []
+        self._calm = 0
+        self._skip = set()
+
+    def _event(self, data, func, event, duration=np.nan):
+        self.events.append(dict(time=data.current_dt, func=func.__name__,
+                                event=event, level=LEVELS[self.level],
+                                duration_ms=duration*1e3,
+                                budget_ms=self.budget*1e3))
+
+    def wrap(self, func):
+        """`func` called through the watchdog."""
+        def guarded(context, data):
+            if func in self._skip:
+                self._skip.discard(func)
+                self._event(data, func, 'skip')
+                return
+            t0 = self.clock()
+            self._call(func, context, data)
+            self._assess(func, data, self.clock() - t0)
+        guarded.__name__ = func.__name__
+        guarded.__wrapped__ = func
+        return guarded
+
+    def _call(self, func, context, data):
+        held = None
+        if self.level >= 2 and hasattr(context, 'securities'):
+            positions = context.portfolio.positions
+            held = np.array([s in positions and positions[s].quantity != 0
+                             for s in context.securities], dtype=bool)
+        context.degradation = Degradation(LEVELS[self.level],
+                                          self.level >= 1, held)
+        namespace = inspect.unwrap(func).__globals__
+        adx = None
+        if self.level >= 1 and 'adx' in namespace:
+            adx = namespace['adx']
+            namespace['adx'] = _no_adx
+        try:
+            func(context, data)
+        finally:
+            if adx is not None:
+                namespace['adx'] = adx
+
+    def _assess(self, func, data, duration):
+        if duration > self.budget:
+            # the next slot would start late; drop it rather than stack up
+            self._skip.add(func)
+            self._event(data, func, 'overrun', duration)
+        if duration > self.warn*self.budget:
+            self._calm = 0
+            if self.level < len(LEVELS) - 1:
+                self.level += 1
+                self._event(data, func, 'degrade', duration)
+        elif duration < self.recover*self.budget:
+            self._calm += 1
+            if self.level and self._calm >= self.patience:
+                self.level -= 1
+                self._calm = 0
+                self._event(data, func, 'recover', duration)
+        else:
+            self._calm = 0
+
+    def events_frame(self):
+        return pd.DataFrame(self.events, columns=[
+            'time', 'func', 'event', 'level', 'duration_ms', 'budget_ms'])
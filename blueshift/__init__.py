@@ -0,0 +1,5 @@
+"""
+    Local stand-in for the parts of the Blueshift platform the strategy
+    variants import, so they can be replayed offline by `backtester`
+    without edits. On the hosted platform the real package is used.
+"""
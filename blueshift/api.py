@@ -0,0 +1,46 @@
+"""
+    Offline implementation of the blueshift.api names used by the
+    strategies. Every call is forwarded to the engine currently running.
+"""
+from backtester.schedule import date_rules, time_rules
+
+__all__ = ['symbol', 'order_target_percent', 'set_commission',
+           'set_slippage', 'schedule_function', 'date_rules', 'time_rules']
+
+_engine = None
+
+
+def register_engine(engine):
+    """Make `engine` the target of the api calls (None to clear)."""
+    global _engine
+    _engine = engine
+
+
+def get_engine():
+    if _engine is None:
+        raise RuntimeError('blueshift.api called outside a running backtest')
+    return _engine
+
+
+def symbol(sym):
+    return get_engine().symbol(sym)
+
+
+def order_target_percent(asset, percent):
+    return get_engine().order_target_percent(asset, percent)
+
+
+def set_commission(model):
+    get_engine().set_commission(model)
+
+
+def set_slippage(model):
+    get_engine().set_slippage(model)
+
+
+def schedule_function(func, date_rule=None, time_rule=None):
+    if date_rule is None:
+        date_rule = date_rules.every_day()
+    if time_rule is None:
+        time_rule = time_rules.market_open()
+    get_engine().schedule_function(func, date_rule, time_rule)
@@ -0,0 +1 @@
+from blueshift.finance import commission, slippage
@@ -0,0 +1,22 @@
+"""Commission models accepted by set_commission."""
+
+
+class PerShare:
+    """Fixed cost per share traded, with a minimum per trade."""
+    def __init__(self, cost=0.0, min_trade_cost=0.0):
+        self.cost = cost
+        self.min_trade_cost = min_trade_cost
+
+    def calculate(self, quantity, price):
+        if quantity == 0:
+            return 0.0
+        return max(abs(quantity)*self.cost, self.min_trade_cost)
+
+
+class PerDollar:
+    """Cost as a fraction of the traded value."""
+    def __init__(self, cost=0.0):
+        self.cost = cost
+
+    def calculate(self, quantity, price):
+        return abs(quantity)*price*self.cost
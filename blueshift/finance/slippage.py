@@ -0,0 +1,12 @@
+"""Slippage models accepted by set_slippage."""
+
+
+class FixedSlippage:
+    """Fills half the `spread` away from the bar price, against the trade."""
+    def __init__(self, spread=0.0):
+        self.spread = spread
+
+    def simulate(self, quantity, price, volume):
+        if quantity > 0:
+            return price + self.spread/2
+        return price - self.spread/2
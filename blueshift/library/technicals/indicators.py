@@ -0,0 +1,161 @@
+"""
+    NumPy versions of the blueshift.library technical indicators used by
+    the strategies. As on the platform, each returns the value(s) for the
+    last bar only; the conventions (SMA-seeded EMAs, Wilder smoothing,
+    population standard deviation) follow TA-Lib.
+"""
+import numpy as np
+
+
+def _series(px):
+    return np.asarray(px, dtype=float).ravel()
+
+
+def _column(px, field):
+    return np.asarray(px[field], dtype=float).ravel()
+
+
+def ema_series(x, lookback, start=0):
+    """Full EMA series of `x`, seeded with the SMA of x[start:start+lookback]."""
+    x = _series(x)
+    out = np.full(len(x), np.nan)
+    seed = start + lookback - 1
+    if seed >= len(x):
+        return out
+    alpha = 2.0/(lookback + 1)
+    value = x[start:seed + 1].mean()
+    out[seed] = value
+    for i in range(seed + 1, len(x)):
+        value += alpha*(x[i] - value)
+        out[i] = value
+    return out
+
+
+def wilder_series(x, lookback, start=0, seed_sum=False):
+    """
+        Wilder smoothing of `x` from index `start`. Seeded with the mean of
+        the first `lookback` values (or their sum, for the running-sum form
+        used by ADX).
+    """
+    x = _series(x)
+    out = np.full(len(x), np.nan)
+    seed = start + lookback - 1
+    if seed >= len(x):
+        return out
+    value = x[start:seed + 1].sum()
+    if seed_sum:
+        decay, gain = 1.0 - 1.0/lookback, 1.0
+    else:
+        value /= lookback
+        decay, gain = 1.0 - 1.0/lookback, 1.0/lookback
+    out[seed] = value
+    for i in range(seed + 1, len(x)):
+        value = decay*value + gain*x[i]
+        out[i] = value
+    return out
+
+
+def true_range(high, low, close):
+    """True range; the first element is high - low."""
+    high, low, close = _series(high), _series(low), _series(close)
+    prev = np.r_[close[0], close[:-1]]
+    return np.maximum(high, prev) - np.minimum(low, prev)
+
+
+def ema(px, lookback):
+    return ema_series(px, lookback)[-1]
+
+
+def sma(px, lookback):
+    x = _series(px)
+    if len(x) < lookback:
+        return np.nan
+    return x[-lookback:].mean()
+
+
+def bollinger_band(px, lookback, nbdev=2.0):
+    """Upper, mid and lower band over the last `lookback` bars."""
+    x = _series(px)
+    if len(x) < lookback:
+        return np.nan, np.nan, np.nan
+    window = x[-lookback:]
+    mid = window.mean()
+    dev = nbdev*window.std()
+    return mid + dev, mid, mid - dev
+
+
+def macd(px, fast=12, slow=26, signal=9):
+    """MACD line, signal line and histogram for the last bar."""
+    x = _series(px)
+    # TA-Lib aligns the fast EMA seed with the end of the slow one
+    fast_ema = ema_series(x, fast, start=max(slow - fast, 0))
+    slow_ema = ema_series(x, slow)
+    line = fast_ema - slow_ema
+    signal_line = ema_series(line, signal, start=slow - 1)
+    return line[-1], signal_line[-1], line[-1] - signal_line[-1]
+
+
+def rsi(px, lookback=14):
+    x = _series(px)
+    if len(x) <= lookback:
+        return np.nan
+    change = np.diff(x)
+    gain = wilder_series(np.maximum(change, 0), lookback)[-1]
+    loss = wilder_series(np.maximum(-change, 0), lookback)[-1]
+    if loss == 0:
+        return 100.0
+    return 100.0 - 100.0/(1.0 + gain/loss)
+
+
+def atr(px, lookback=14):
+    """Average true range from a frame with high, low and close columns."""
+    tr = true_range(_column(px, 'high'), _column(px, 'low'),
+                    _column(px, 'close'))
+    return wilder_series(tr, lookback, start=1)[-1]
+
+
+def directional_movement(high, low):
+    """+DM and -DM series; the first element of each is zero."""
+    high, low = _series(high), _series(low)
+    up = np.r_[0.0, np.diff(high)]
+    down = np.r_[0.0, -np.diff(low)]
+    plus_dm = np.where((up > down) & (up > 0), up, 0.0)
+    minus_dm = np.where((down > up) & (down > 0), down, 0.0)
+    return plus_dm, minus_dm
+
+
+def adx(high, low, close, lookback=14):
+    """Wilder's average directional index for the last bar."""
+    plus_dm, minus_dm = directional_movement(high, low)
+    tr = true_range(high, low, close)
+    s_plus = wilder_series(plus_dm, lookback, start=1, seed_sum=True)
+    s_minus = wilder_series(minus_dm, lookback, start=1, seed_sum=True)
+    s_tr = wilder_series(tr, lookback, start=1, seed_sum=True)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        di_plus = 100*s_plus/s_tr
+        di_minus = 100*s_minus/s_tr
+        total = di_plus + di_minus
+        dx = np.where(total > 0, 100*np.abs(di_plus - di_minus)/total, 0.0)
+    dx[np.isnan(s_tr)] = np.nan
+    return wilder_series(dx, lookback, start=lookback)[-1]
+
+
+def obv(close, volume):
+    """On-balance volume at the last bar."""
+    close, volume = _series(close), _series(volume)
+    direction = np.sign(np.r_[0.0, np.diff(close)])
+    return (direction*volume).sum()
+
+
+def doji(px, lookback=10, body_ratio=0.1):
+    """
+        100 if the last bar is a doji, else 0: its real body is at most
+        `body_ratio` of the average high-low range of the prior `lookback`
+        bars.
+    """
+    open_, high = _column(px, 'open'), _column(px, 'high')
+    low, close = _column(px, 'low'), _column(px, 'close')
+    if len(close) <= lookback:
+        return 0
+    avg_range = (high[-lookback - 1:-1] - low[-lookback - 1:-1]).mean()
+    return 100 if abs(close[-1] - open_[-1]) <= body_ratio*avg_range else 0
@@ -0,0 +1,65 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backtester.data import Asset, MinuteBars  # noqa: E402
+
+SYMBOLS = ['MSFT', 'GOOG', 'AAPL', 'AMZN', 'TSLA']
+SESSION_BARS = 375
+
+
+def synthetic_bars(sessions=3, symbols=SYMBOLS, seed=7):
+    """Random-walk minute bars, 09:15 to 15:29 on consecutive days."""
+    rng = np.random.default_rng(seed)
+    minutes = (np.datetime64('2023-01-02T09:15', 'ns')
+               + np.arange(SESSION_BARS).astype('timedelta64[m]'))
+    index = np.concatenate([minutes + np.timedelta64(day, 'D')
+                            for day in range(sessions)])
+    shape = (len(symbols), len(index))
+    close = 100*np.exp(np.cumsum(rng.normal(0, 2e-3, shape), axis=1))
+    open_ = np.roll(close, 1, axis=1)
+    open_[:, 0] = close[:, 0]
+    # some bars with almost no body, so every candle pattern turns up
+    flat = rng.random(shape) < 0.2
+    open_[flat] = close[flat]*(1 + rng.normal(0, 1e-5, flat.sum()))
+    top = np.maximum(open_, close)
+    bottom = np.minimum(open_, close)
+    high = top + np.abs(rng.normal(0, 2e-3, shape))*close
+    low = bottom - np.abs(rng.normal(0, 2e-3, shape))*close
+    volume = rng.lognormal(8, 1, shape).round()
+    arrays = dict(open=open_, high=high, low=low, close=close, volume=volume)
+    return MinuteBars(symbols, index, arrays)
+
+
+@pytest.fixture(scope='session')
+def bars():
+    return synthetic_bars()
+
+
+@pytest.fixture(scope='session')
+def assets(bars):
+    return [Asset(symbol, sid) for sid, symbol in enumerate(bars.symbols)]
+
+
+# Source_Code_18's signal parameters, with a loose volume filter so the
+# synthetic bars give signals of both signs
+PARAMS = dict(indicator_lookback=120, BBands_period=20, MACD_fast=5,
+              MACD_slow=35, MACD_signal=5, volume_threshold=0.5)
+
+
+@pytest.fixture(scope='session')
+def long_bars():
+    # enough sessions for the daily ATR the strategies size positions with
+    return synthetic_bars(sessions=24)
+
+
+@pytest.fixture(scope='session')
+def long_store(long_bars, tmp_path_factory):
+    from backtester.store import write_store
+    path = str(tmp_path_factory.mktemp('long_store'))
+    write_store(long_bars, path)
+    return path
@@ -0,0 +1,97 @@
+import logging
+import queue
+
+import pandas as pd
+import pytest
+
+from backtester.engine import Engine
+from backtester.eventlog import EventLog, read_events
+
+STRATEGY = '''
+import logging
+
+log = logging.getLogger(__name__)
+
+
+def initialize(context):
+    pass
+
+
+def handle_data(context, data):
+    log.warning("Data history error: %s", "stale bar")
+'''
+
+
+@pytest.fixture
+def events(tmp_path):
+    log = EventLog(str(tmp_path / 'events.jsonl'), rate=1/60, burst=3)
+    yield log
+    log.close()
+
+
+def logger_for(log, name, clock):
+    logger = logging.getLogger(name)
+    logger.propagate = False
+    logger.handlers = [log.handler(clock)]
+    return logger
+
+
+def test_token_bucket_per_key(events):
+    now = [pd.Timestamp('2023-02-01 09:15')]
+    logger = logger_for(events, 'test.eventlog.bucket', lambda: now[0])
+    for _ in range(10):
+        logger.warning("No price for %s", 'MSFT', extra=dict(security='MSFT'))
+    logger.warning("No price for %s", 'TSLA', extra=dict(security='TSLA'))
+    # one token a minute comes back
+    now[0] += pd.Timedelta(seconds=60)
+    logger.warning("No price for %s", 'MSFT', extra=dict(security='MSFT'))
+    logger.warning("No price for %s", 'MSFT', extra=dict(security='MSFT'))
+    events.flush()
+
+    assert events.stats == dict(written=5, suppressed=8, dropped=0)
+    written = read_events(events.sink)
+    assert list(written['security']) == ['MSFT']*3 + ['TSLA', 'MSFT']
+    # the event after the gap reports what the bucket held back
+    assert list(written['suppressed']) == [0, 0, 0, 0, 7]
+    assert written['time'].iloc[-1] == now[0]
+    assert written['message'].iloc[0] == 'No price for MSFT'
+    assert written['event'].iloc[0] == 'No price for %s'
+
+
+def test_dropped_events_are_reported_by_the_next_one(events):
+    now = [pd.Timestamp('2023-02-01 09:15')]
+    logger = logger_for(events, 'test.eventlog.full', lambda: now[0])
+    # a full queue the writer does not drain
+    writer_queue, events._queue = events._queue, queue.Queue(1)
+    events.burst = 10
+    for _ in range(4):
+        logger.error("Order failed")
+    assert events.stats['dropped'] == 3
+    events._queue = writer_queue
+    logger.error("Order failed")
+    events.flush()
+    written = read_events(events.sink)
+    assert list(written['suppressed']) == [3]
+    assert list(written['level']) == ['ERROR']
+
+
+def test_engine_restores_propagation(bars, tmp_path, caplog):
+    path = tmp_path / 'noisy.py'
+    path.write_text(STRATEGY)
+    log = EventLog(str(tmp_path / 'events.jsonl'))
+    engine = Engine(str(path), bars, event_log=log)
+    logger = logging.getLogger(engine.strategy.__name__)
+    assert not logger.propagate
+    with caplog.at_level(logging.WARNING):
+        engine.run()
+    log.close()
+    # kept off the console during the run, and put back after it
+    assert not caplog.records
+    assert logger.propagate and not logger.handlers
+    written = read_events(log.sink)
+    assert written['message'].iloc[0] == 'Data history error: stale bar'
+    assert written['time'].iloc[0] == pd.Timestamp(bars.index[0])
+    # every session opens with a full bucket of ten, then one an hour
+    minutes = int(bars.session_ends[0] - bars.session_starts[0]) - 1
+    assert log.stats['written'] == len(bars.sessions)*(10 + minutes//60)
+    assert log.stats['written'] + log.stats['suppressed'] == len(bars)
@@ -0,0 +1,106 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtester.engine import Engine, run_backtest
+from backtester.fills import FillSimulator
+
+from conftest import synthetic_bars
+
+COSTS = dict(per_share=0.005, min_trade_cost=1.0, spread_bps=4.0,
+             impact=0.05)
+
+# trades a few names every seven minutes through the platform's
+# per-order cost models: PerShare and a square-root impact slippage
+TRADER = '''
+import math
+
+from blueshift.api import (
+    order_target_percent,
+    set_commission,
+    set_slippage,
+    symbol,
+)
+from blueshift.finance import commission
+
+COSTS = %r
+
+
+class SqrtImpact:
+    def __init__(self, spread_bps, impact):
+        self.spread_bps = spread_bps
+        self.impact = impact
+
+    def simulate(self, quantity, price, volume):
+        size = abs(quantity)
+        participation = size/volume if volume > 0 else 1.0
+        slip = self.spread_bps/2e4 + self.impact*math.sqrt(
+            min(participation, 1.0))
+        side = (quantity > 0) - (quantity < 0)
+        return price*(1 + side*slip)
+
+
+def initialize(context):
+    set_commission(commission.PerShare(cost=COSTS['per_share'],
+                                       min_trade_cost=COSTS['min_trade_cost']))
+    set_slippage(SqrtImpact(COSTS['spread_bps'], COSTS['impact']))
+    context.assets = [symbol(s) for s in ('MSFT', 'GOOG', 'AAPL', 'TSLA')]
+    context.tick = 0
+
+
+def handle_data(context, data):
+    context.tick += 1
+    if context.tick %% 7:
+        return
+    step = context.tick//7
+    for i, asset in enumerate(context.assets):
+        order_target_percent(asset, 0.05*((step*(i + 3)) %% 7 - 3))
+''' % COSTS
+
+
+@pytest.mark.parametrize('strategy', ['Source_Code_17.py',
+                                      'Source_Code_18.py'])
+def test_zero_cost_simulator_matches_default_fills(long_bars, strategy):
+    start, end = long_bars.sessions[16], long_bars.sessions[18]
+    default, _ = run_backtest(strategy, long_bars, start=start, end=end)
+    simulated, _ = run_backtest(strategy, long_bars, start=start, end=end,
+                                fills=FillSimulator())
+    assert default['fills'].iloc[-1] > 0
+    pd.testing.assert_frame_equal(simulated, default)
+
+
+def test_batch_matches_order_by_order_fills(tmp_path):
+    bars = synthetic_bars()
+    # bars without volume fill as if they traded all of it
+    bars.arrays['volume'][:, ::5] = 0.0
+    path = tmp_path / 'trader.py'
+    path.write_text(TRADER)
+    loop = Engine(str(path), bars)
+    batch = Engine(str(path), bars, fills=FillSimulator(**COSTS))
+    expected, result = loop.run(), batch.run()
+    assert expected['fills'].iloc[-1] > 100
+    assert expected['commission'].iloc[-1] > 0
+    pd.testing.assert_frame_equal(result, expected, check_exact=False,
+                                  rtol=1e-12)
+    for asset, pos in loop.portfolio.positions.items():
+        other = batch.portfolio.positions[asset]
+        assert other.quantity == pos.quantity
+        assert other.cost_basis == pytest.approx(pos.cost_basis, rel=1e-12)
+
+
+def test_fill_prices_and_commissions():
+    sim = FillSimulator(per_share=0.01, min_trade_cost=1.0, bps=2.0,
+                        spread_bps=10.0, impact=0.1)
+    quantity = np.array([100.0, -400.0, 0.0, 50.0])
+    close = np.array([10.0, 20.0, 30.0, 40.0])
+    volume = np.array([10000.0, 100.0, 500.0, 0.0])
+    prices, costs = sim.fill(quantity, close, volume)
+
+    size = np.abs(quantity)
+    slip = 10.0/2e4 + 0.1*np.sqrt(np.minimum(size/np.r_[volume[:3], 1], 1))
+    # no volume: the whole bar
+    slip[3] = 10.0/2e4 + 0.1
+    np.testing.assert_allclose(prices, close*(1 + np.sign(quantity)*slip))
+    expected = np.maximum(size*0.01, 1.0) + size*prices*2e-4
+    expected[2] = 0.0
+    np.testing.assert_allclose(costs, expected)
@@ -0,0 +1,27 @@
+import pandas as pd
+import pytest
+
+from backtester.engine import Engine
+from backtester.host import StrategyHost
+
+STRATEGIES = ['Source_Code_6.py', 'Source_Code_17.py', 'Source_Code_18.py']
+
+
+@pytest.mark.parametrize('share_indicators', [True, False])
+def test_host_matches_standalone_runs(long_bars, share_indicators):
+    start, end = long_bars.sessions[16], long_bars.sessions[18]
+    host = StrategyHost(STRATEGIES, long_bars, start=start, end=end,
+                        share_indicators=share_indicators)
+    results = host.run()
+    assert not host.errors
+    assert list(results) == STRATEGIES
+    for name in STRATEGIES:
+        engine = Engine(name, long_bars, start=start, end=end)
+        expected = engine.run()
+        assert expected['orders'].iloc[-1] > 0
+        pd.testing.assert_frame_equal(results[name], expected)
+        hosted = host.engines[name].portfolio
+        assert hosted.portfolio_value == engine.portfolio.portfolio_value
+        assert dict((a, p.quantity) for a, p in hosted.positions.items()) \
+            == dict((a, p.quantity)
+                    for a, p in engine.portfolio.positions.items())
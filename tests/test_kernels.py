@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from blueshift.library.technicals.indicators import macd
+
+from backtester.data import FIELDS
+from backtester.kernels import (
+    KernelTable,
+    bollinger_matrix,
+    ema_matrix,
+    macd_matrix,
+)
+from backtester.signals import CrossSectionalSignals
+
+from conftest import PARAMS
+
+
+def seeded_ema(x, span, start=0):
+    """EMA seeded with the SMA of x[start:start + span], through pandas."""
+    seed = start + span - 1
+    values = pd.Series(np.r_[x[start:start + span].mean(), x[seed + 1:]])
+    out = np.full(len(x), np.nan)
+    out[seed:] = values.ewm(span=span, adjust=False).mean().to_numpy()
+    return out
+
+
+def test_ema_matrix_matches_pandas(bars):
+    close = bars.arrays['close'][0]
+    spans, starts = [5, 12, 26, 12], [0, 0, 3, 14]
+    result = ema_matrix(close, spans, starts)
+    for row, span, start in zip(result, spans, starts):
+        np.testing.assert_allclose(row, seeded_ema(close, span, start),
+                                   rtol=1e-12, equal_nan=True)
+
+
+def test_ema_matrix_series_per_row(bars):
+    close = bars.arrays['close'][:3]
+    result = ema_matrix(close, [5, 9, 20], [0, 2, 0])
+    for row, x, span, start in zip(result, close, [5, 9, 20], [0, 2, 0]):
+        np.testing.assert_allclose(row, seeded_ema(x, span, start),
+                                   rtol=1e-12, equal_nan=True)
+
+
+@pytest.mark.parametrize('periods', [[20], [5, 14, 20, 60, 300]])
+def test_bollinger_matrix_matches_pandas(bars, periods):
+    close = pd.Series(bars.arrays['close'][1])
+    upper, mid, lower = bollinger_matrix(close.to_numpy(), periods)
+    for i, period in enumerate(periods):
+        rolling = close.rolling(period)
+        mean = rolling.mean().to_numpy()
+        std = rolling.std(ddof=0).to_numpy()
+        # pandas' own rolling std is only good to about 1e-7
+        np.testing.assert_allclose(mid[i], mean, rtol=1e-10, equal_nan=True)
+        np.testing.assert_allclose(upper[i] - mid[i], 2*std, rtol=1e-6,
+                                   atol=1e-9, equal_nan=True)
+        np.testing.assert_allclose(mid[i] - lower[i], 2*std, rtol=1e-6,
+                                   atol=1e-9, equal_nan=True)
+
+
+def test_bollinger_matrix_nan_windows():
+    close = np.r_[np.arange(1.0, 11.0), np.nan, np.arange(12.0, 22.0)]
+    _, mid, _ = bollinger_matrix(close, [3])
+    assert np.isnan(mid[0, 10:13]).all()
+    assert mid[0, 9] == pytest.approx(9.0)
+    assert mid[0, 13] == pytest.approx(13.0)
+
+
+def test_macd_matrix_matches_per_bar_macd(bars):
+    close = bars.arrays['close'][2, :400]
+    params = [(12, 26, 9), (5, 35, 5)]
+    line, signal, hist = macd_matrix(close, params)
+    for t in range(60, len(close), 37):
+        for i, (fast, slow, sig) in enumerate(params):
+            np.testing.assert_allclose((line[i, t], signal[i, t], hist[i, t]),
+                                       macd(close[:t + 1], fast, slow, sig),
+                                       rtol=1e-10, atol=1e-12)
+
+
+def test_kernel_signals_match_streaming(bars, assets):
+    table = KernelTable(bars, periods=[14, 20],
+                        macds=[(5, 35, 5), (12, 26, 9)])
+    kernel = CrossSectionalSignals(PARAMS, assets=assets, kernels=table)
+    streaming = CrossSectionalSignals(PARAMS, assets=assets)
+    lookback = PARAMS['indicator_lookback']
+    traded = 0
+    for bar in range(lookback - 1, len(bars)):
+        rows = slice(bar - lookback + 1, bar + 1)
+        window = np.stack([bars.arrays[f][:, rows] for f in FIELDS], axis=-1)
+        stamps = bars.index[rows]
+        expected = streaming.update(window, stamps)
+        np.testing.assert_array_equal(kernel.update(window, stamps), expected)
+        traded += np.count_nonzero(expected)
+    assert traded
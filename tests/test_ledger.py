@@ -0,0 +1,118 @@
+import types
+
+import numpy as np
+import pytest
+
+from backtester.engine import Engine
+from backtester.ledger import PositionLedger
+
+T0 = np.datetime64('2023-02-01T09:15')
+T1 = np.datetime64('2023-02-01T10:15')
+T2 = np.datetime64('2023-02-01T11:15')
+
+ROTATE = '''
+from blueshift.api import order_target_percent, symbol
+
+
+def initialize(context):
+    context.assets = [symbol(s) for s in ('MSFT', 'GOOG', 'AAPL')]
+    context.tick = 0
+
+
+def handle_data(context, data):
+    context.tick += 1
+    if context.tick % 40:
+        return
+    step = context.tick//40
+    for i, asset in enumerate(context.assets):
+        order_target_percent(asset, (-1)**(step + i)*0.1*(step % 4))
+'''
+
+
+@pytest.fixture
+def ledger():
+    return PositionLedger(['A', 'B'])
+
+
+def test_adds_average_the_entry(ledger):
+    ledger.fill('A', 100, 10.0, T0)
+    ledger.mark([0], [12.0])
+    ledger.fill('A', 50, 13.0, T1)
+    assert ledger.quantity[0] == 150 and ledger.side[0] == 1
+    assert ledger.entry[0] == pytest.approx(11.0)
+    # an add keeps the entry time and the watermarks
+    assert ledger.entry_time[0] == T0
+    assert (ledger.high[0], ledger.low[0]) == (12.0, 10.0)
+    ledger.fill('B', -10, 20.0, T0)
+    ledger.fill('B', -30, 24.0, T1)
+    assert ledger.entry[1] == pytest.approx(23.0) and ledger.side[1] == -1
+
+
+def test_partial_and_full_closes(ledger):
+    ledger.fill('A', 100, 10.0, T0)
+    ledger.fill('A', -60, 15.0, T1)
+    assert ledger.quantity[0] == 40 and ledger.entry[0] == 10.0
+    assert ledger.entry_time[0] == T0
+    ledger.fill('A', -40, 9.0, T2)
+    assert ledger.quantity[0] == 0 and ledger.side[0] == 0
+    assert np.isnan([ledger.entry[0], ledger.high[0], ledger.low[0]]).all()
+    assert np.isnat(ledger.entry_time[0])
+    assert list(ledger.open_rows()) == []
+
+
+def test_side_flips_start_a_new_entry(ledger):
+    ledger.fill('A', 100, 10.0, T0)
+    ledger.mark([0], [14.0])
+    ledger.fill('A', -150, 12.0, T1)
+    assert ledger.quantity[0] == -50 and ledger.side[0] == -1
+    assert ledger.entry[0] == 12.0 and ledger.entry_time[0] == T1
+    assert (ledger.high[0], ledger.low[0]) == (12.0, 12.0)
+
+
+def test_watermarks_reset_on_reentry(ledger):
+    ledger.fill('A', 100, 10.0, T0)
+    assert ledger.mark([0, 1], [15.0, 99.0])
+    assert not ledger.mark([0], [11.0])
+    ledger.mark([0], [8.0])
+    assert (ledger.high[0], ledger.low[0]) == (15.0, 8.0)
+    # flat rows have no watermark to move
+    assert np.isnan(ledger.high[1])
+    ledger.fill('A', -100, 9.0, T1)
+    ledger.fill('A', 100, 9.5, T2)
+    assert (ledger.high[0], ledger.low[0]) == (9.5, 9.5)
+    assert ledger.entry_time[0] == T2
+
+
+def test_sync_follows_the_portfolio(ledger):
+    def pos(quantity, cost_basis):
+        return types.SimpleNamespace(quantity=quantity, cost_basis=cost_basis)
+
+    assert ledger.sync({'A': pos(10, 5.0), 'Z': pos(1, 1.0)}, T0) == [0]
+    # unchanged quantities are left alone, a missing position is flat
+    assert ledger.sync({'A': pos(10, 5.5)}, T1) == []
+    assert ledger.entry[0] == 5.0
+    assert ledger.sync({'B': pos(-5, 7.0)}, T1) == [1, 0]
+    assert list(ledger.side) == [0, -1]
+
+
+def test_sync_matches_engine_positions(bars, tmp_path):
+    path = tmp_path / 'rotate.py'
+    path.write_text(ROTATE)
+    engine = Engine(str(path), bars)
+    ledger = PositionLedger(engine.symbol(s) for s in
+                            ('MSFT', 'GOOG', 'AAPL', 'AMZN'))
+    changes = 0
+    for session in bars.sessions:
+        engine.advance(session)
+        positions = engine.portfolio.positions
+        changes += len(ledger.sync(positions, session))
+        for row, asset in enumerate(ledger.assets):
+            held = positions.get(asset)
+            quantity = held.quantity if held is not None else 0
+            assert ledger.quantity[row] == quantity
+            assert ledger.side[row] == np.sign(quantity)
+            if quantity:
+                assert ledger.entry[row] == held.cost_basis
+            else:
+                assert np.isnan(ledger.entry[row])
+    assert changes
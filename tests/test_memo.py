@@ -0,0 +1,119 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from blueshift.library.technicals.indicators import bollinger_band, sma
+
+from backtester.data import BarData
+from backtester.engine import Engine
+from backtester.memo import IndicatorCache
+
+
+@pytest.fixture
+def cache(bars):
+    cache = IndicatorCache()
+    cache.watch(bars)
+    return cache
+
+
+def test_windows_are_keyed_by_place(bars, assets, cache):
+    cached = cache.wrap(bollinger_band)
+    data = BarData(bars, lambda: 600)
+    panel = data.history(assets, ['high', 'low', 'close'], 120, '1m')
+    close = panel.xs(assets[1]).close
+    assert cached(close.values, 20) == bollinger_band(close.values, 20)
+    # the same window of the same security from another history call
+    again = BarData(bars, lambda: 600).history(assets[1], 'close', 120, '1m')
+    assert cached(again.values, 20) == bollinger_band(close.values, 20)
+    assert cache.stats == dict(hits=1, misses=1, evictions=0, uncached=0)
+    # one bar later, a shorter window, another security, other params
+    for values, period in [(bars.arrays['close'][1, 482:602], 20),
+                           (close.values[-60:], 20),
+                           (panel.xs(assets[2]).close.values, 20),
+                           (close.values, 14)]:
+        assert cached(values, period) == bollinger_band(values, period)
+    assert cache.stats['misses'] == 5 and cache.stats['hits'] == 1
+    assert len(cache) == 5
+
+
+def test_frames_are_keyed_by_security(bars, assets, cache):
+    data = BarData(bars, lambda: 900)
+    daily = data.history(assets, ['high', 'low', 'close'], 3, '1d')
+    frame = daily.xs(assets[0])
+    cached = cache.wrap(sma)
+    assert cached(frame.close, 2) == sma(frame.close.values, 2)
+    # the partial day is a copy, keyed by its security and stamp
+    again = BarData(bars, lambda: 900).history(assets[0], 'close', 3, '1d')
+    assert cached(again, 2) == sma(frame.close.values, 2)
+    assert cache.stats['hits'] == 1
+    assert cached(daily.xs(assets[1]).close, 2) == sma(
+        daily.xs(assets[1]).close.values, 2)
+    assert cache.stats['misses'] == 2
+
+
+def test_other_arguments_are_not_cached(bars, cache):
+    cached = cache.wrap(sma)
+    values = bars.arrays['close'][0, :50].copy()
+    series = pd.Series(values)
+    assert cached(values, 20) == sma(values, 20)
+    assert cached(series, 20) == sma(values, 20)
+    assert cached(values, 20) == sma(values, 20)
+    assert cache.stats == dict(hits=0, misses=0, evictions=0, uncached=3)
+    assert not len(cache)
+
+
+def test_lru_eviction_at_the_cap(bars, cache):
+    cached = cache.wrap(bollinger_band)
+    close = bars.arrays['close'][0]
+    windows = [close[i:i + 100] for i in range(0, 500, 100)]
+    cached(windows[0], 20)
+    size = cache.nbytes
+    cache.clear()
+    cache.max_bytes = 3*size + size//2
+    for window in windows[:3]:
+        cached(window, 20)
+    cached(windows[0], 20)
+    cached(windows[3], 20)
+    # windows[1] was the least recently used
+    assert cache.stats['evictions'] == 1 and len(cache) == 3
+    assert cache.nbytes <= cache.max_bytes
+    cached(windows[0], 20)
+    cached(windows[3], 20)
+    assert cache.stats['hits'] == 3
+    cached(windows[1], 20)
+    # misses: the sizing call, three fills, windows[3] and windows[1]
+    assert cache.stats['misses'] == 6 and cache.stats['evictions'] == 2
+
+    small = IndicatorCache(size//2)
+    small.watch(bars)
+    # an entry larger than the cap is computed but not kept
+    assert small.wrap(bollinger_band)(windows[0], 20) == \
+        bollinger_band(windows[0], 20)
+    assert not len(small) and small.nbytes == 0
+
+
+def test_cached_run_matches_uncached(long_bars):
+    start, end = long_bars.sessions[16], long_bars.sessions[17]
+    cache = IndicatorCache()
+    for _ in range(2):
+        cached = Engine('Source_Code_17.py', long_bars, start=start, end=end,
+                        indicator_cache=cache).run()
+    plain = Engine('Source_Code_17.py', long_bars, start=start,
+                   end=end).run()
+    pd.testing.assert_frame_equal(cached, plain)
+    stats = cache.stats
+    assert stats['misses'] and stats['hits'] >= stats['misses']
+    assert not stats['uncached']
+    assert np.isfinite(cached['portfolio_value']).all()
+
+
+def test_columns_of_a_frame_of_assets(bars, assets, cache):
+    cached = cache.wrap(sma)
+    data = BarData(bars, lambda: 600)
+    frame = data.history(assets, 'close', 50, '1m')
+    panel = data.history(assets, ['close'], 50, '1m')
+    assert cached(frame[assets[2]], np.int64(20)) == sma(
+        panel.xs(assets[2]).close.values, 20)
+    assert cached(panel.xs(assets[2]).close.values, 20) == sma(
+        frame[assets[2]].values, 20)
+    assert cache.stats['hits'] == 1 and not cache.stats['uncached']
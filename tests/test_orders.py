@@ -0,0 +1,98 @@
+import types
+
+import pytest
+
+from backtester.orders import OrderManager
+
+
+class Book:
+    """A portfolio stand-in: quantity and last price by asset."""
+    def __init__(self, value=1000.0, **holdings):
+        self.portfolio_value = value
+        self.positions = dict(
+            (asset, types.SimpleNamespace(quantity=q, last_price=p))
+            for asset, (q, p) in holdings.items())
+
+
+@pytest.fixture
+def sent():
+    return []
+
+
+def manager(sent, tolerance, portfolio=None):
+    def order(asset, weight):
+        sent.append((asset, weight))
+        return len(sent)
+    return OrderManager(order, tolerance, portfolio)
+
+
+def test_changes_within_tolerance_are_suppressed(sent):
+    # weights A 0.20, B 0.50, C -0.30
+    book = Book(A=(20, 10.0), B=(5, 100.0), C=(-3, 100.0))
+    orders = manager(sent, 0.05, book)
+    orders.target('A', 0.24)
+    orders.target('B', 0.40)
+    orders.target('C', -0.34)
+    orders.target('C', -0.36)
+    assert orders.flush() == [('B', 0.40, 1), ('C', -0.36, 2)]
+    assert orders.stats == dict(requested=4, submitted=2, skipped=1)
+    assert orders.submitted == {'B': 0.40, 'C': -0.36}
+
+
+def test_exits_and_flips_are_always_sent(sent):
+    book = Book(A=(1, 10.0), B=(-1, 10.0), C=(1, 10.0))
+    orders = manager(sent, 0.5, book)
+    orders.target('A', 0.0)
+    orders.target('B', 0.005)
+    orders.target('C', -0.005)
+    orders.target('D', 0.0)
+    orders.target('E', 0.2)
+    orders.flush()
+    # D is already flat; E opens well inside the tolerance but from flat
+    assert sent == [('A', 0.0), ('B', 0.005), ('C', -0.005), ('E', 0.2)]
+
+
+def test_diff_against_portfolio_weights(sent):
+    book = Book(A=(10, 10.0))
+    orders = manager(sent, 0.02, book)
+    orders.target('A', 0.5)
+    orders.flush()
+    # only part of the order filled: the target is sent again
+    orders.target('A', 0.5)
+    orders.flush()
+    book.positions['A'].quantity = 49
+    orders.target('A', 0.5)
+    orders.flush()
+    # the price moved the weight off target
+    book.positions['A'].last_price = 12.0
+    orders.target('A', 0.5)
+    orders.flush()
+    assert sent == [('A', 0.5)]*3
+    assert orders.weights(['A', 'B']) == {'A': pytest.approx(0.588),
+                                          'B': 0.0}
+
+
+def test_without_portfolio_the_last_submitted_weight_stands_in(sent):
+    orders = manager(sent, 0.05)
+    orders.target('A', 0.3)
+    orders.flush()
+    orders.target('A', 0.32)
+    assert orders.orders() == []
+    orders.flush()
+    orders.forget('A')
+    orders.target('A', 0.32)
+    orders.target('B', 0.0)
+    orders.flush()
+    assert sent == [('A', 0.3), ('A', 0.32)]
+
+
+def test_forget_resends_whatever_the_weight(sent):
+    book = Book(A=(50, 10.0))
+    orders = manager(sent, 0.05, book)
+    orders.forget()
+    assert orders.weights(['A']) == {'A': None}
+    orders.target('A', 0.5)
+    orders.flush()
+    orders.target('A', 0.5)
+    orders.flush()
+    assert sent == [('A', 0.5)]
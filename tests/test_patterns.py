@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+
+from backtester.patterns import (
+    DOJI,
+    PATTERN_NAMES,
+    classify_patterns,
+    label_bars,
+)
+
+from Source_Code_17 import identify_patterns
+
+OHLC = ('open', 'high', 'low', 'close')
+
+
+def names(codes):
+    # identify_patterns reports a plain doji as no pattern
+    return [None if code == DOJI else PATTERN_NAMES[code]
+            for code in codes.tolist()]
+
+
+def test_classify_matches_identify_patterns(bars):
+    for sid in range(len(bars.symbols)):
+        frame = pd.DataFrame(dict((f, bars.column(sid, f)) for f in OHLC))
+        codes = classify_patterns(frame.open, frame.high, frame.low,
+                                  frame.close)
+        expected = [identify_patterns(frame.iloc[t:t + 1])
+                    for t in range(len(frame))]
+        assert names(codes) == expected
+
+
+def test_every_pattern_occurs(bars):
+    assert set(np.unique(label_bars(bars)).tolist()) == set(PATTERN_NAMES)
+
+
+def test_label_bars_matches_per_security(bars):
+    labels = label_bars(bars, 100, 400)
+    assert labels.shape == (len(bars.symbols), 300)
+    for sid in range(len(bars.symbols)):
+        np.testing.assert_array_equal(labels[sid], classify_patterns(
+            *(bars.column(sid, f)[100:400] for f in OHLC)))
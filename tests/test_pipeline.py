@@ -0,0 +1,101 @@
+import numpy as np
+import pytest
+
+from backtester.data import FIELDS, BarData
+from backtester.pipeline import Filter, Indicator, Pipeline
+from backtester.signals import signal_pipeline, stack_history
+
+from conftest import PARAMS
+from Source_Code_17 import signal_function
+
+
+def toy_pipeline(log):
+    """Rows are integers 0..n-1; every stage logs the rows it sees."""
+    def stage(name, func):
+        def run(rows, *values):
+            log.append((name, rows.index.tolist()))
+            return func(rows, *values)
+        return run
+
+    stages = [
+        Indicator('value', stage('value', lambda rows: rows.window[:, 0]),
+                  cost=0.1),
+        Indicator('costly', stage('costly', lambda rows, v: v*10),
+                  cost=50, requires=('value',)),
+        Filter('even', stage('even', lambda rows, v: v % 2 == 0),
+               cost=1, requires=('value',)),
+        Filter('small', stage('small', lambda rows, v: v < 6),
+               cost=0.5, requires=('value',)),
+        Filter('big', stage('big', lambda rows, c: c > 10),
+               cost=0.1, requires=('costly',)),
+    ]
+    return Pipeline(stages, lambda rows, c: np.sign(c),
+                    requires=('costly',))
+
+
+def test_filters_run_cheapest_first_on_survivors():
+    log = []
+    pipeline = toy_pipeline(log)
+    window = np.arange(10.0)[:, None]
+    signals = pipeline.run(window)
+    np.testing.assert_array_equal(np.flatnonzero(signals), [2, 4])
+    assert [name for name, _ in log] == ['value', 'small', 'even',
+                                         'costly', 'big']
+    assert log[2] == ('even', [0, 1, 2, 3, 4, 5])
+    # the costly indicator only sees what the cheap filters let through
+    assert log[3] == ('costly', [0, 2, 4])
+    assert pipeline.stats['small'] == dict(evaluated=10, rejected=4)
+    assert pipeline.stats['even'] == dict(evaluated=6, rejected=3)
+    assert pipeline.stats['big'] == dict(evaluated=3, rejected=1)
+    assert pipeline.stats['costly'] == dict(computed=3)
+    assert pipeline.rejection_rates()['even'] == pytest.approx(0.5)
+    np.testing.assert_array_equal(pipeline.values['costly'][[0, 2, 4]],
+                                  [0, 20, 40])
+    assert np.isnan(pipeline.values['costly'][1])
+
+
+def test_nothing_runs_once_every_row_is_rejected():
+    log = []
+    pipeline = toy_pipeline(log)
+    pipeline.run(np.arange(7.0, 12.0)[:, None])
+    assert [name for name, _ in log] == ['value', 'small']
+    assert pipeline.stats['costly'] == dict(computed=0)
+
+
+def test_rows_restrict_scoring():
+    pipeline = toy_pipeline([])
+    window = np.arange(10.0)[:, None]
+    mask = np.zeros(10, dtype=bool)
+    mask[[1, 2]] = True
+    np.testing.assert_array_equal(np.flatnonzero(pipeline.run(window, mask)),
+                                  [2])
+    assert pipeline.stats['small'] == dict(evaluated=2, rejected=0)
+
+
+def test_signal_pipeline_matches_signal_function(bars, assets):
+    lookback = PARAMS['indicator_lookback']
+    pipeline = signal_pipeline(PARAMS)
+    clock = [0]
+    data = BarData(bars, lambda: clock[0], as_pandas=True)
+    traded = 0
+    # one synthetic session, every minute with a full lookback window
+    for bar in range(int(bars.session_starts[1]), int(bars.session_ends[1])):
+        clock[0] = bar
+        panel = data.history(assets, list(FIELDS), lookback, '1m')
+        signals = pipeline.run(stack_history(panel, assets)[0])
+        expected = [signal_function(panel.xs(asset), PARAMS)
+                    for asset in assets]
+        np.testing.assert_array_equal(signals, expected)
+        traded += np.count_nonzero(expected)
+    assert traded
+
+    # cheapest first: each filter sees what the one before let through
+    stats = pipeline.stats
+    order = ['pattern_gate', 'volume', 'flat_bands', 'trend']
+    assert stats[order[0]]['evaluated'] == stats['calls']*len(assets)
+    for before, after in zip(order, order[1:]):
+        assert stats[after]['evaluated'] == (stats[before]['evaluated']
+                                             - stats[before]['rejected'])
+    # and the ADX is only computed for the rows that reach the trend filter
+    assert stats['adx']['computed'] == stats['trend']['evaluated']
+    assert stats['adx']['computed'] < stats['pattern_gate']['evaluated']/2
@@ -0,0 +1,66 @@
+import json
+import types
+
+import numpy as np
+import pytest
+
+from backtester.profiling import LatencyHistogram, Profiler
+
+
+@pytest.fixture(scope='module')
+def latencies():
+    # nanosecond timings over six orders of magnitude
+    rng = np.random.default_rng(3)
+    return np.r_[rng.integers(0, 40, 200),
+                 rng.lognormal(10, 2, 20000).astype(np.int64)]
+
+
+@pytest.mark.parametrize('sub_bits', [3, 5, 7])
+def test_percentiles_within_bucket_precision(latencies, sub_bits):
+    hist = LatencyHistogram(sub_bits)
+    for value in latencies:
+        hist.record(value)
+    assert hist.count == len(latencies)
+    assert hist.total == latencies.sum()
+    assert (hist.min, hist.max) == (latencies.min(), latencies.max())
+    for q in [0, 1, 25, 50, 90, 99, 99.9, 100]:
+        exact = np.percentile(latencies, q, method='inverted_cdf')
+        # the upper bound of the bucket holding the exact value
+        assert exact <= hist.percentile(q) <= exact*(1 + 2.0**-sub_bits)
+
+
+def test_small_values_are_exact():
+    hist = LatencyHistogram()
+    for value in [3, 1, 4, 1, 5, 9, 2, 6, -2]:
+        hist.record(value)
+    assert [hist.percentile(q) for q in (0, 50, 100)] == [0, 3, 9]
+    assert LatencyHistogram().percentile(50) == 0
+
+
+def test_merge_equals_one_histogram(latencies):
+    whole, left, right = (LatencyHistogram() for _ in range(3))
+    for value in latencies:
+        whole.record(value)
+    for value in latencies[:5000]:
+        left.record(value)
+    for value in latencies[5000:]:
+        right.record(value)
+    right.merge(left)
+    assert right.counts == whole.counts
+    assert right.summary() == whole.summary()
+
+
+def test_profiler_sessions(tmp_path):
+    sink = tmp_path / 'profile.jsonl'
+    module = types.ModuleType('strategy')
+    exec('def work(n):\n    return sum(range(n))\n', vars(module))
+    profiler = Profiler(str(sink))
+    assert profiler.instrument(module) == ['work']
+    for session in range(2):
+        for _ in range(10):
+            module.work(1000)
+        profiler.end_session(session)
+    lines = [json.loads(line) for line in sink.read_text().splitlines()]
+    assert [(r['session'], r['stage'], r['count']) for r in lines] == \
+        [('0', 'work', 10), ('1', 'work', 10)]
+    assert profiler.report().loc['work', 'count'] == 20
@@ -0,0 +1,188 @@
+import types
+
+import numpy as np
+import pytest
+
+from backtester.risk import RiskMonitor
+
+STOP, TAKE = 1.5, 2.5
+
+
+def position(quantity, price):
+    return types.SimpleNamespace(quantity=quantity, cost_basis=price)
+
+
+def loop_exit(side, base, entry, atr, price):
+    """
+        The per-security check of Source_Code_17's rebalance, with the
+        stop trailing `base` (the watermark), mirrored for shorts.
+    """
+    if not atr or not side or np.isnan(atr):
+        return None
+    if side > 0:
+        stop = max(base*(1 - atr*STOP), base - atr*STOP)
+        take = entry + atr*TAKE
+        if price <= stop:
+            return 'stop'
+        if price >= take:
+            return 'take'
+    else:
+        stop = min(base*(1 + atr*STOP), base + atr*STOP)
+        take = entry - atr*TAKE
+        if price >= stop:
+            return 'stop'
+        if price <= take:
+            return 'take'
+    return None
+
+
+@pytest.fixture
+def book():
+    rng = np.random.default_rng(11)
+    n = 60
+    assets = [f"S{i}" for i in range(n)]
+    entry = rng.uniform(50, 150, n)
+    side = rng.choice([-1, 0, 1], n, p=[0.4, 0.2, 0.4])
+    atr = rng.uniform(0.002, 0.03, n)
+    atr[:4] = [np.nan, 0.0, np.nan, 0.0]
+    positions = dict((a, position(s*10, e)) for a, s, e
+                     in zip(assets, side, entry) if s)
+    monitor = RiskMonitor(assets, STOP, TAKE)
+    atrs = dict(zip(assets, atr.tolist()))
+    atrs[assets[0]] = atrs[assets[2]] = None
+    monitor.set_atr(atrs)
+    monitor.sync(positions, np.datetime64('2023-02-01T09:15'))
+    return types.SimpleNamespace(monitor=monitor, assets=assets, side=side,
+                                 entry=entry, atr=atr, rng=rng)
+
+
+def expected(book, prices, base=None):
+    base = book.entry if base is None else base
+    return [loop_exit(s, b, e, a, p) for s, b, e, a, p
+            in zip(book.side, base, book.entry, book.atr, prices)]
+
+
+def decisions(monitor, prices):
+    stopped, taken = monitor.check(prices)
+    return [('stop' if s else 'take' if t else None)
+            for s, t in zip(stopped, taken)]
+
+
+def test_levels_match_the_loop_at_entry(book):
+    stop, take = book.monitor.levels()
+    for i, (s, e, a) in enumerate(zip(book.side, book.entry, book.atr)):
+        if not s or not a or np.isnan(a):
+            assert np.isnan(stop[i]) and np.isnan(take[i])
+        elif s > 0:
+            assert stop[i] == max(e*(1 - a*STOP), e - a*STOP)
+            assert take[i] == e + a*TAKE
+        else:
+            assert stop[i] == min(e*(1 + a*STOP), e + a*STOP)
+            assert take[i] == e - a*TAKE
+    for _ in range(20):
+        prices = book.entry*book.rng.uniform(0.95, 1.05, len(book.entry))
+        result = decisions(book.monitor, prices)
+        assert result == expected(book, prices)
+    assert {'stop', 'take', None} <= set(result)
+
+
+def test_stops_trail_the_watermark(book):
+    monitor = book.monitor
+    favourable = book.entry*(1 + 0.03*np.where(book.side < 0, -1, 1))
+    monitor.mark(favourable)
+    base = np.where(book.side != 0, favourable, np.nan)
+    for _ in range(20):
+        prices = book.entry*book.rng.uniform(0.95, 1.05, len(book.entry))
+        assert decisions(monitor, prices) == expected(book, prices, base)
+
+
+def test_flat_and_missing_atr_never_trigger(book):
+    monitor = book.monitor
+    quiet = ~((book.side != 0) & (book.atr > 0))
+    assert quiet[:4].all() and quiet.sum() > 4
+    for prices in (np.zeros(len(book.entry)),
+                   np.full(len(book.entry), 1e9)):
+        stopped, taken = monitor.check(prices)
+        assert not stopped[quiet].any() and not taken[quiet].any()
+        assert (stopped | taken)[~quiet].all()
+
+
+def test_triggered_rows_stay_disarmed_until_the_position_changes(book):
+    monitor = book.monitor
+    row = int(np.flatnonzero((book.side > 0) & (book.atr > 0))[0])
+    prices = book.entry.copy()
+    prices[row] = 0.5*book.entry[row]
+    stopped, _ = monitor.check(prices)
+    monitor.exit(stopped)
+    assert not monitor.check(prices)[0].any()
+    # a new entry re-arms it
+    positions = dict((a, position(s*10, e)) for a, s, e
+                     in zip(book.assets, book.side, book.entry) if s)
+    positions[book.assets[row]] = position(20, book.entry[row])
+    assert monitor.sync(positions, np.datetime64('2023-02-01T10:00')) \
+        == [row]
+    assert monitor.check(prices)[0][row]
+
+
+class Feed:
+    """data.current over a price array, counting the securities read."""
+    def __init__(self, assets, prices):
+        self.rows = dict((a, i) for i, a in enumerate(assets))
+        self.prices = prices
+        self.reads = 0
+
+    def current(self, assets, field):
+        if isinstance(assets, str):
+            self.reads += 1
+            return self.prices[self.rows[assets]]
+        self.reads += len(assets)
+        return self.prices[[self.rows[a] for a in assets]]
+
+
+def test_rank_orders_by_distance_to_the_nearer_trigger(book):
+    monitor = book.monitor
+    prices = book.entry*book.rng.uniform(0.99, 1.01, len(book.entry))
+    monitor.rank(prices)
+    stop, take = monitor.levels()
+    side = book.side
+    with np.errstate(invalid='ignore'):
+        distance = np.fmin(side*(prices - stop), side*(take - prices))/prices
+    armed = ~np.isnan(distance)
+    assert np.isinf(monitor.distance[armed.sum():]).all()
+    np.testing.assert_array_equal(monitor.distance[:armed.sum()],
+                                  np.sort(distance[armed]))
+    np.testing.assert_array_equal(distance[monitor.order[:armed.sum()]],
+                                  monitor.distance[:armed.sum()])
+    band = np.median(distance[armed])
+    near = monitor.near(band)
+    outside = np.setdiff1d(np.flatnonzero(armed), near)
+    assert len(near) and len(outside)
+    assert (distance[near] <= band).all()
+    assert (distance[outside] > band).all()
+
+
+def test_poll_prices_only_the_rows_near_a_trigger(book):
+    monitor = book.monitor
+    prices = book.entry.copy()
+    feed = Feed(book.assets, prices)
+    # a full poll first: every security is read and the book ranked
+    assert [len(r) for r in monitor.poll(feed, refresh=1)] == [0, 0]
+    assert feed.reads == len(book.assets)
+    band = np.median(monitor.distance[np.isfinite(monitor.distance)])
+    near = monitor.near(band)
+    far = np.setdiff1d(np.flatnonzero(np.isfinite(monitor.stop)), near)
+    assert len(near) and len(far)
+
+    # a row far from its stop crashes: unseen until the next full poll
+    crash = int(far[0])
+    prices[crash] = book.entry[crash]*(0.2 if book.side[crash] > 0 else 5)
+    feed.reads = 0
+    stopped, taken = monitor.poll(feed, band, refresh=3)
+    assert crash not in stopped and feed.reads == len(near)
+    monitor.poll(feed, band, refresh=3)
+    stopped, taken = monitor.poll(feed, band, refresh=3)
+    assert list(stopped) == [crash] and not len(taken)
+    assert monitor.age == 0
+    # disarmed after it fired
+    assert np.isnan(monitor.stop[crash])
+    assert np.isinf(monitor.distance[list(monitor.order).index(crash)])
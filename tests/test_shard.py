@@ -0,0 +1,69 @@
+import multiprocessing
+
+import numpy as np
+import pytest
+
+from backtester.data import FIELDS, Asset, BarData
+from backtester.shard import ShardedSignals, can_shard
+from backtester.signals import CrossSectionalSignals
+
+from conftest import PARAMS, synthetic_bars
+
+NAMES = ['MSFT', 'GOOG', 'AAPL', 'AMZN', 'TSLA', 'NFLX', 'NVDA']
+
+
+@pytest.fixture(scope='module')
+def wide_bars():
+    return synthetic_bars(sessions=2, symbols=NAMES)
+
+
+# 5 names over 2 shards, 7 over 3, and a universe out of sid order
+@pytest.mark.parametrize('order,shards', [
+    ([0, 1, 2, 3, 4], 2),
+    ([0, 1, 2, 3, 4, 5, 6], 3),
+    ([6, 2, 4, 0, 5], 3),
+])
+def test_sharded_matches_in_process(wide_bars, order, shards):
+    bars = wide_bars
+    assets = [Asset(NAMES[sid], sid) for sid in order]
+    lookback = PARAMS['indicator_lookback']
+    local = CrossSectionalSignals(PARAMS, assets=assets)
+    sharded = ShardedSignals(PARAMS, assets, shards)
+    clock = [0]
+    data = BarData(bars, lambda: clock[0])
+    held = np.arange(len(assets)) % 3 == 0
+    traded = 0
+    try:
+        for bar in range(lookback - 1, len(bars)):
+            clock[0] = bar
+            rows = slice(bar - lookback + 1, bar + 1)
+            window = np.stack([bars.arrays[f][order, rows] for f in FIELDS],
+                              axis=-1)
+            # the degraded modes of the slot watchdog on some ticks
+            skip_adx = bar % 50 == 7
+            mask = held if bar % 30 == 11 else None
+            expected = local.update(window, bars.index[rows], skip_adx,
+                                    mask)
+            np.testing.assert_array_equal(
+                sharded.update(data, lookback, skip_adx, mask), expected)
+            traded += np.count_nonzero(expected)
+    finally:
+        sharded.close()
+    assert traded
+
+
+def _start_in_worker(assets):
+    signals = ShardedSignals(PARAMS, assets, shards=2)
+    try:
+        signals.update(None, PARAMS['indicator_lookback'])
+    except RuntimeError as e:
+        return can_shard(), str(e)
+    return can_shard(), None
+
+
+def test_daemonic_worker_is_rejected(assets):
+    assert can_shard()
+    with multiprocessing.get_context().Pool(1) as pool:
+        allowed, error = pool.apply(_start_in_worker, (assets,))
+    assert not allowed
+    assert 'daemonic' in error
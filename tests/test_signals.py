@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from backtester.data import FIELDS, BarData
+from backtester.signals import CrossSectionalSignals, stack_history
+
+from conftest import PARAMS
+
+
+def test_to_array_matches_frames(bars, assets):
+    data = BarData(bars, lambda: 600)
+    panel = data.history(assets, list(FIELDS), 50, '1m')
+    for order in (assets, assets[::-1]):
+        window, stamps = stack_history(panel, order)
+        np.testing.assert_array_equal(stamps, panel.index)
+        for i, asset in enumerate(order):
+            np.testing.assert_array_equal(
+                window[i], panel.xs(asset).to_pandas()[list(FIELDS)])
+    # the same window through pandas
+    pandas = stack_history(panel.to_pandas(), assets)[0]
+    np.testing.assert_array_equal(pandas, stack_history(panel, assets)[0])
+
+
+@pytest.mark.parametrize('every', [1, 3])
+def test_short_windows_match_full_lookback(bars, assets, every):
+    lookback = PARAMS['indicator_lookback']
+    full = CrossSectionalSignals(PARAMS, assets=assets)
+    short = CrossSectionalSignals(PARAMS, assets=assets)
+    clock = [0]
+    data = BarData(bars, lambda: clock[0])
+    lengths = set()
+    for bar in range(0, len(bars), every):
+        clock[0] = bar
+        # the slot watchdog's degraded mode leaves the ADX behind
+        skip_adx = bar % 40 in (3, 4, 5)
+        nbars = short.window_length(lookback, bar, bars.index)
+        lengths.add(nbars)
+        expected = full.update(*stack_history(
+            data.history(assets, list(FIELDS), lookback, '1m'), assets),
+            skip_adx=skip_adx)
+        result = short.update(*stack_history(
+            data.history(assets, list(FIELDS), nbars, '1m'), assets),
+            skip_adx=skip_adx)
+        np.testing.assert_array_equal(result, expected)
+        for name, value in full.last.items():
+            np.testing.assert_allclose(short.last[name], value, rtol=1e-9,
+                                       equal_nan=True)
+    assert min(lengths) <= every + 1 and lookback in lengths
@@ -0,0 +1,90 @@
+import numpy as np
+import pytest
+
+from backtester.data import FIELDS, Asset, BarData
+from backtester.store import ColumnarStore, is_store, open_bars, write_store
+
+
+@pytest.fixture(scope='module')
+def store(bars, tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('store'))
+    write_store(bars, path)
+    return ColumnarStore(path)
+
+
+def history(source, bar, nbars, frequency, assets, fields=list(FIELDS)):
+    data = BarData(source, lambda: bar)
+    return data.history(assets, fields, nbars, frequency)
+
+
+def test_store_layout(bars, store):
+    assert is_store(store.path)
+    assert isinstance(open_bars(store.path), ColumnarStore)
+    assert store.symbols == bars.symbols
+    np.testing.assert_array_equal(store.index, bars.index)
+    np.testing.assert_array_equal(store.sessions, bars.sessions)
+    for sid in range(len(bars.symbols)):
+        for field in FIELDS:
+            np.testing.assert_array_equal(store.column(sid, field),
+                                          bars.column(sid, field))
+            np.testing.assert_array_equal(store.daily_column(sid, field),
+                                          bars.daily_column(sid, field))
+
+
+# first bar, mid-session, the last bar of a session and the last bar
+@pytest.mark.parametrize('bar', [0, 500, 749, 1124])
+@pytest.mark.parametrize('frequency,nbars', [('1m', 300), ('1d', 5)])
+def test_history_windows_match_memory(bars, store, assets, bar, frequency,
+                                      nbars):
+    expected = history(bars, bar, nbars, frequency, assets)
+    result = history(store, bar, nbars, frequency, assets)
+    np.testing.assert_array_equal(result.index, expected.index)
+    np.testing.assert_array_equal(result.to_array(), expected.to_array())
+
+    asset = assets[2]
+    frame = history(store, bar, nbars, frequency, asset)
+    for field in FIELDS:
+        np.testing.assert_array_equal(frame[field].values,
+                                      expected.xs(asset)[field].values)
+    column = history(store, bar, nbars, frequency, assets, 'close')
+    for asset in assets:
+        np.testing.assert_array_equal(column[asset].values,
+                                      expected.xs(asset).close.values)
+
+
+def test_daily_window_aggregates_the_current_session(bars, store):
+    # 100 minutes into the second session
+    bar = int(bars.session_starts[1]) + 99
+    today = slice(int(bars.session_starts[1]), bar + 1)
+    asset = Asset(bars.symbols[0], 0)
+    frame = history(store, bar, 2, '1d', asset)
+    minute = dict((f, bars.column(0, f)[today]) for f in FIELDS)
+    partial = dict(open=minute['open'][0], high=minute['high'].max(),
+                   low=minute['low'].min(), close=minute['close'][-1],
+                   volume=minute['volume'].sum())
+    for field in FIELDS:
+        values = frame[field].values
+        assert values[0] == bars.daily_column(0, field)[0]
+        assert values[-1] == pytest.approx(partial[field], rel=1e-12)
+
+
+@pytest.mark.parametrize('frequency,nbars', [('1m', 300), ('1d', 2)])
+def test_shuffled_universe_reads_views(bars, store, assets, frequency,
+                                       nbars):
+    shuffled = [assets[3], assets[0], assets[4], assets[1]]
+    panel = history(store, 600, nbars, frequency, shuffled)
+    column = history(store, 600, nbars, frequency, shuffled, 'close')
+    for i, asset in enumerate(shuffled):
+        expected = history(bars, 600, nbars, frequency, asset)
+        np.testing.assert_array_equal(panel.to_array()[i],
+                                      np.stack([expected[f].values
+                                                for f in FIELDS], axis=-1))
+        np.testing.assert_array_equal(column[asset].values,
+                                      expected.close.values)
+        np.testing.assert_array_equal(
+            panel.to_pandas().loc[asset].to_numpy(),
+            panel.xs(asset).to_pandas().to_numpy())
+    if frequency == '1m':
+        # the span of the universe, not a copy of its rows
+        assert np.shares_memory(panel.xs(assets[3]).close.values,
+                                store.block('close'))
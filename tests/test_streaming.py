@@ -0,0 +1,105 @@
+import numpy as np
+import pytest
+
+from blueshift.library.technicals.indicators import (
+    adx,
+    bollinger_band,
+    macd,
+)
+
+from backtester.streaming import (
+    StreamingADX,
+    StreamingBollinger,
+    StreamingMACD,
+    StreamingMean,
+)
+
+LOOKBACK = 120
+HLC = ('high', 'low', 'close')
+
+
+def windows(bars, sid=None):
+    """(end bar, stamps, high, low, close) of every minute's history."""
+    for end in range(LOOKBACK - 1, len(bars)):
+        rows = slice(end - LOOKBACK + 1, end + 1)
+        if sid is None:
+            columns = [bars.arrays[f][:, rows].T for f in HLC]
+        else:
+            columns = [bars.arrays[f][sid, rows] for f in HLC]
+        yield (end, bars.index[rows], *columns)
+
+
+def test_bollinger_matches_batch(bars):
+    close = bars.arrays['close'][0]
+    state = StreamingBollinger(20, refresh=50)
+    for end, stamps, _, _, window in windows(bars, sid=0):
+        np.testing.assert_allclose(state.sync(window, stamps),
+                                   bollinger_band(close[:end + 1], 20),
+                                   rtol=1e-9)
+
+
+def test_universe_matches_batch_per_security(bars):
+    bands = StreamingBollinger(20)
+    lines = StreamingMACD(5, 35, 5)
+    trend = StreamingADX(14)
+    for end, stamps, h, l, c in windows(bars):
+        upper, mid, lower = bands.sync(c, stamps)
+        line, signal, hist = lines.sync(c, stamps)
+        value = trend.sync(h, l, c, stamps)
+        if end % 97:
+            continue
+        for sid in range(len(bars.symbols)):
+            high, low, close = (bars.arrays[f][sid, :end + 1] for f in HLC)
+            np.testing.assert_allclose((upper[sid], mid[sid], lower[sid]),
+                                       bollinger_band(close, 20), rtol=1e-9)
+            np.testing.assert_allclose((line[sid], signal[sid], hist[sid]),
+                                       macd(close, 5, 35, 5), rtol=1e-9,
+                                       atol=1e-12)
+            assert value[sid] == pytest.approx(adx(high, low, close, 14),
+                                               rel=1e-9, nan_ok=True)
+
+
+def test_macd_matches_batch(bars):
+    close = bars.arrays['close'][0]
+    state = StreamingMACD(5, 35, 5)
+    for end, stamps, _, _, window in windows(bars, sid=0):
+        # the state carries over from the first window, starting at bar 0
+        np.testing.assert_allclose(state.sync(window, stamps),
+                                   macd(close[:end + 1], 5, 35, 5),
+                                   rtol=1e-9, atol=1e-12)
+
+
+def test_macd_rewarms_on_a_gap(bars):
+    close = bars.arrays['close'][0]
+    state = StreamingMACD(12, 26, 9)
+    state.sync(close[:200], bars.index[:200])
+    value = state.sync(close[400:600], bars.index[400:600])
+    np.testing.assert_allclose(value, macd(close[400:600], 12, 26, 9),
+                               rtol=1e-12)
+
+
+def test_adx_matches_batch(bars):
+    high, low, close = (bars.arrays[f][0] for f in HLC)
+    state = StreamingADX(14)
+    for end, stamps, h, l, c in windows(bars, sid=0):
+        expected = adx(high[:end + 1], low[:end + 1], close[:end + 1], 14)
+        assert state.sync(h, l, c, stamps) == pytest.approx(
+            expected, rel=1e-9, nan_ok=True)
+
+
+def test_adx_warmup_check(bars):
+    high, low, close = (bars.arrays[f][:, :200].T for f in HLC)
+    StreamingADX(14).warmup(high, low, close, check=True)
+    close = close.copy()
+    close[50, 1] = np.nan
+    with pytest.raises(ValueError):
+        StreamingADX(14).warmup(high, low, close, check=True)
+
+
+def test_mean_matches_window_mean(bars):
+    volume = bars.arrays['volume']
+    state = StreamingMean(50, refresh=64)
+    for end, stamps, _, _, _ in windows(bars):
+        window = volume[:, end - LOOKBACK + 1:end + 1].T
+        np.testing.assert_allclose(state.sync(window, stamps),
+                                   window[-50:].mean(axis=0), rtol=1e-12)
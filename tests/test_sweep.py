@@ -0,0 +1,58 @@
+import pandas as pd
+import pytest
+
+from backtester.engine import Engine, load_strategy, run_backtest, summarize
+from backtester.store import ColumnarStore
+from backtester.sweep import expand_grid, grid_variants, run_sweep
+
+STRATEGY = '''
+def initialize(context):
+    context.params = {'lookback': 10, 'threshold': 0.5}
+    context.seen = dict(context.params)
+'''
+
+
+def test_expand_grid():
+    points = expand_grid({'a': [1, 2], 'b,c': [[3, 4], [5, 6]], 'd': [0]})
+    assert points == [dict(a=1, b=3, c=4, d=0), dict(a=1, b=5, c=6, d=0),
+                      dict(a=2, b=3, c=4, d=0), dict(a=2, b=5, c=6, d=0)]
+    assert expand_grid({}) == [{}]
+    with pytest.raises(ValueError):
+        expand_grid({'b,c': [[1, 2, 3]]})
+
+
+def test_grid_variants():
+    points = expand_grid({'BBands_period': [14, 20],
+                          'MACD_fast,MACD_slow,MACD_signal': [[12, 26, 9]]})
+    assert grid_variants(points) == ({14, 20}, {(12, 26, 9)})
+
+
+def test_overrides_reach_context(bars, tmp_path):
+    path = tmp_path / 'strategy.py'
+    path.write_text(STRATEGY)
+    engine = Engine(str(path), bars, params={'threshold': 0.9})
+    engine.run()
+    # initialize already reads the overridden value
+    assert engine.context.seen == {'lookback': 10, 'threshold': 0.9}
+    assert engine.context.params['threshold'] == 0.9
+    with pytest.raises(ValueError, match='unknown strategy params'):
+        Engine(str(path), bars, params={'thresold': 0.9}).run()
+
+
+def test_single_worker_sweep_matches_engine(long_bars, long_store):
+    start, end = long_bars.sessions[16], long_bars.sessions[18]
+    grid = {'BBands_period': [14, 20], 'trade_freq': [1, 5]}
+    results = run_sweep('Source_Code_18.py', long_store, grid, start=start,
+                        end=end, processes=1)
+    assert results['error'].isna().all()
+    store = ColumnarStore(long_store)
+    for run, params in enumerate(expand_grid(grid)):
+        perf, _ = run_backtest(load_strategy('Source_Code_18.py'), store,
+                               start=start, end=end, params=params)
+        expected = pd.Series(dict(summarize(perf), final_value=perf[
+            'portfolio_value'].iloc[-1]))
+        row = results.loc[run, expected.index]
+        assert row['orders'] > 0
+        pd.testing.assert_series_equal(row.astype(float),
+                                       expected.astype(float),
+                                       check_names=False)
@@ -0,0 +1,82 @@
+import json
+import types
+
+import pytest
+
+from backtester.engine import Engine
+from backtester.tracing import Tracer
+
+STRATEGY = '''
+def inner(x):
+    return x + 1
+
+
+def outer(x):
+    return inner(x)*2
+'''
+
+
+def spans(path):
+    with open(path) as fp:
+        trace = json.load(fp)
+    events = trace['traceEvents']
+    assert all(e['ph'] in ('M', 'X') for e in events)
+    return trace, [e for e in events if e['ph'] == 'X']
+
+
+def enclosing(span, events):
+    """The spans that contain `span`, innermost last."""
+    end = span['ts'] + span['dur']
+    return sorted((e for e in events if e is not span
+                   and e['ts'] <= span['ts'] and end <= e['ts'] + e['dur']),
+                  key=lambda e: -e['dur'])
+
+
+def test_long_run_stays_under_the_cap(tmp_path):
+    module = types.ModuleType('strategy')
+    exec(STRATEGY, vars(module))
+    tracer = Tracer(str(tmp_path / 'trace.json'))
+    assert (tracer.sample_every, tracer.max_events) == (20, 100_000)
+    tracer.instrument(module)
+    for session in range(1500):
+        tracer.begin_session(session)
+        for x in range(1000):
+            module.outer(x)
+        tracer.end_session()
+    assert len(tracer.events) == tracer.max_events
+    assert tracer.dropped > 0
+    # sessions 0, 20, ... until the cap
+    assert tracer.traced == [str(s) for s in range(0, 1000, 20)]
+
+    trace, events = spans(tracer.write())
+    assert len(events) == 100_000
+    assert trace['otherData']['dropped_events'] == tracer.dropped
+    assert (tmp_path / 'trace.json').stat().st_size < 16 << 20
+    calls = [e for e in events if e['name'] == 'inner']
+    for span in calls[::997]:
+        assert enclosing(span, events)[-1]['name'] == 'outer'
+
+
+def test_engine_trace_nests_spans(long_bars, tmp_path):
+    tracer = Tracer(str(tmp_path / 'trace.json'), sample_every=3)
+    engine = Engine('Source_Code_17.py', long_bars,
+                    start=long_bars.sessions[16],
+                    end=long_bars.sessions[22], tracer=tracer)
+    engine.run()
+    assert tracer.sessions == 7 and len(tracer.traced) == 3
+    _, events = spans(tracer.path)
+    sessions = [e for e in events if e['name'] == 'session']
+    assert [e['args']['session'] for e in sessions] == tracer.traced
+    names = set(e['name'] for e in events)
+    assert {'generate_signals', 'signal_function', 'data.history',
+            'bollinger_band'} <= names
+    for span in events:
+        if span['name'] == 'bollinger_band':
+            stack = [e['name'] for e in enclosing(span, events)]
+            assert stack[0] == 'session' and 'signal_function' in stack
+            break
+
+
+def test_sample_every_must_be_positive(tmp_path):
+    with pytest.raises(ValueError):
+        Tracer(str(tmp_path / 'trace.json'), sample_every=0)
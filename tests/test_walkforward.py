@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+
+from backtester.engine import Engine
+from backtester.walkforward import make_folds, walk_forward
+
+HOLD = '''
+from blueshift.api import order_target_percent, symbol
+
+
+def initialize(context):
+    context.asset = symbol('MSFT')
+
+
+def handle_data(context, data):
+    order_target_percent(context.asset, 0.5)
+'''
+
+
+def test_folds_roll_without_overlap():
+    sessions = pd.bdate_range('2023-01-02', periods=20)
+    folds = make_folds(sessions, 5, 3, start=sessions[2])
+    assert [f[0] for f in folds] == list(sessions[2:15:3])
+    for is_start, is_end, oos_start, oos_end in folds:
+        first = sessions.get_loc(is_start)
+        assert sessions.get_loc(is_end) == first + 4
+        # trading starts on the session after the tuning window
+        assert sessions.get_loc(oos_start) == first + 5
+        assert is_start <= is_end < oos_start <= oos_end
+    for (_, _, _, oos_end), (_, _, oos_start, _) in zip(folds, folds[1:]):
+        assert sessions.get_loc(oos_start) == sessions.get_loc(oos_end) + 1
+    # the last out-of-sample window is cut at the end of the data
+    assert folds[-1][2:] == (sessions[19], sessions[19])
+    assert make_folds(sessions, 5, 3, end=sessions[4]) == []
+
+
+def test_flatten_leaves_a_flat_book(bars, tmp_path):
+    path = tmp_path / 'hold.py'
+    path.write_text(HOLD)
+    engine = Engine(str(path), bars)
+    engine.advance(bars.sessions[0])
+    before = engine.portfolio.portfolio_value
+    assert any(p.quantity for p in engine.portfolio.positions.values())
+    engine.flatten()
+    assert not any(p.quantity for p in engine.portfolio.positions.values())
+    assert engine.portfolio.cash == engine.portfolio.portfolio_value
+    # closed at the current close, net of the cost of the exits
+    assert engine.portfolio.portfolio_value <= before
+
+
+def test_out_of_sample_returns_stitch_the_folds(long_bars, long_store):
+    folds, returns, points = walk_forward(
+        'Source_Code_18.py', long_store, {'BBands_period': [14, 20]},
+        in_sample=2, out_of_sample=2, start=long_bars.sessions[16],
+        processes=1)
+    assert len(folds) == 3 and 'error' not in folds
+    assert len(points) == 2*len(folds)
+    expected = [d for s, e in zip(folds['oos_start'], folds['oos_end'])
+                for d in pd.date_range(s, e)]
+    assert list(returns.index.normalize()) == expected
+    assert np.isfinite(returns).all()
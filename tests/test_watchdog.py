@@ -0,0 +1,60 @@
+import types
+
+import numpy as np
+
+from backtester.watchdog import SlotWatchdog
+
+STRATEGY = '''
+def adx(high, low, close, period):
+    return 30.0
+
+
+def rebalance(context, data):
+    context.calls.append((context.degradation.level,
+                          context.degradation.held, adx(0, 0, 0, 14)))
+    context.now[0] += context.durations.pop(0)
+'''
+
+
+def test_ladder_down_and_back_up():
+    module = types.ModuleType('strategy')
+    exec(STRATEGY, vars(module))
+    now = [0.0]
+    context = types.SimpleNamespace(
+        securities=['A', 'B', 'C'], calls=[], now=now,
+        portfolio=types.SimpleNamespace(positions=dict(
+            A=types.SimpleNamespace(quantity=0),
+            C=types.SimpleNamespace(quantity=-5))))
+    data = types.SimpleNamespace(current_dt=None)
+    watchdog = SlotWatchdog(1.0, patience=3, clock=lambda: now[0])
+    guarded = watchdog.wrap(module.rebalance)
+    # near the budget twice, an overrun, then calm calls with one
+    # middling call that restarts the count
+    context.durations = [0.9, 0.85, 1.2, 0.1, 0.1, 0.6, 0.1, 0.1, 0.1,
+                         0.1, 0.1, 0.1, 0.1]
+    for _ in range(14):
+        guarded(context, data)
+    assert not context.durations
+
+    levels = [level for level, _, _ in context.calls]
+    assert levels == ['normal', 'skip_adx', 'positions_only',
+                      'positions_only', 'positions_only', 'positions_only',
+                      'positions_only', 'positions_only', 'positions_only',
+                      'skip_adx', 'skip_adx', 'skip_adx', 'normal']
+    # the module's adx is stubbed out while degraded, and put back after
+    assert [value for _, _, value in context.calls] == \
+        [30.0] + [0.0]*11 + [30.0]
+    assert module.adx(0, 0, 0, 14) == 30.0
+    held = [h for level, h, _ in context.calls if level == 'positions_only']
+    for mask in held:
+        np.testing.assert_array_equal(mask, [False, False, True])
+    assert all(h is None for level, h, _ in context.calls
+               if level != 'positions_only')
+
+    events = watchdog.events_frame()
+    assert list(events['event']) == ['degrade', 'degrade', 'overrun',
+                                     'skip', 'recover', 'recover']
+    assert list(events['level']) == ['skip_adx', 'positions_only',
+                                     'positions_only', 'positions_only',
+                                     'skip_adx', 'normal']
+    assert watchdog.level == 0